@@ -3,8 +3,11 @@ from __future__ import annotations
 
 from flask import Flask
 
-from arkas.config import SECRET_KEY, ensure_folders
+from arkas.config import DEBUG, MAX_CONTENT_LENGTH, SECRET_KEY, ensure_folders
+from arkas.db import init_app as init_db_pool
 from arkas.db_init import init_db
+from arkas.metrics import init_app as init_metrics
+from arkas.uploads import init_app as init_uploads
 from arkas.routes import bp as web_bp
 
 
@@ -14,6 +17,10 @@ def create_app() -> Flask:
 
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.secret_key = SECRET_KEY
+    app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+    init_db_pool(app)
+    init_metrics(app)
+    init_uploads(app)
 
     app.register_blueprint(web_bp)
     return app
@@ -22,5 +29,6 @@ def create_app() -> Flask:
 app = create_app()
 
 if __name__ == "__main__":
-    # jalanin: python app.py
-    app.run(debug=True)
\ No newline at end of file
+    # jalanin (development): python app2.py  -- debug lewat ARKAS_DEBUG=1
+    # production: gunicorn -c gunicorn.conf.py wsgi:app / python wsgi.py
+    app.run(debug=DEBUG)
\ No newline at end of file
@@ -1,15 +1,26 @@
 # arkas/__init__.py
-from flask import Flask
-from .config import SECRET_KEY, ensure_folders
-from .db_init import init_db
-from .routes import bp as main_bp
+# Sengaja tanpa import di level modul: `import arkas.config` (script, worker
+# export, benchmark) tidak ikut memuat routes + semua dependensinya.
 
 def create_app():
+    from flask import Flask
+
+    from .config import MAX_CONTENT_LENGTH, SECRET_KEY, ensure_folders
+    from .db import init_app as init_db_pool
+    from .db_init import init_db
+    from .metrics import init_app as init_metrics
+    from .routes import bp as main_bp
+    from .uploads import init_app as init_uploads
+
     ensure_folders()
     init_db()
 
     app = Flask(__name__, template_folder="../templates", static_folder="../static")
     app.secret_key = SECRET_KEY
+    app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+    init_db_pool(app)
+    init_metrics(app)
+    init_uploads(app)
 
     app.register_blueprint(main_bp)
     return app
\ No newline at end of file
@@ -1,8 +1,13 @@
 import os
+import secrets
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from .db import get_conn
+from .db import get_conn, retry_on_busy
 from .config import STATIC_PHOTO_DIR
+from .bpu_summary import refresh_bpu_flags
+from .render_cache import invalidate_render_cache
+from .photos import is_image_file, make_photo_variants, remove_photo_files
+from .uploads import save_upload
 
 # arkas/bpu_override.py
 
@@ -49,6 +54,7 @@ def get_bpu_override(bpu: str) -> dict:
         conn.close()
 
 
+@retry_on_busy
 def upsert_bpu_override(
     bpu: str,
     kegiatan: str,
@@ -76,9 +82,11 @@ def upsert_bpu_override(
             """,
             (bpu, kegiatan, p1_nama, p1_jabatan, p1_perusahaan, p1_alamat, p1_telp, now),
         )
+        refresh_bpu_flags(conn, bpu)
         conn.commit()
     finally:
         conn.close()
+    invalidate_render_cache([bpu])
 
 # --- Fungsi Pengelolaan Foto ---
 
@@ -86,50 +94,73 @@ def list_bpu_photos(bpu: str) -> list[dict]:
     conn = get_conn()
     try:
         rows = conn.execute(
-            "SELECT id, filename, uploaded_at FROM bpu_photos WHERE bpu=? ORDER BY id DESC",
+            "SELECT id, filename, uploaded_at, print_filename, thumb_filename FROM bpu_photos WHERE bpu=? ORDER BY id DESC",
             (bpu,),
         ).fetchall()
         out = []
-        for rid, fn, ts in rows:
+        for rid, fn, ts, print_fn, thumb_fn in rows:
             out.append({
                 "id": rid, 
                 "filename": fn, 
                 "uploaded_at": ts or "", 
-                "url": f"/static/uploads/bpu_photos/{fn}"
+                "url": f"/static/uploads/bpu_photos/{fn}",
+                # varian hasil ingest (fallback ke file asli untuk foto lama)
+                "print_filename": print_fn or fn,
+                "thumb_url": f"/static/uploads/bpu_photos/{thumb_fn or fn}",
             })
         return out
     finally:
         conn.close()
 
 def add_bpu_photo(bpu: str, filename: str):
+    # putar sesuai EXIF + buat varian cetak & thumbnail
+    v = make_photo_variants(filename)
+    _insert_bpu_photo(bpu, filename, v)
+    invalidate_render_cache([bpu])
+
+@retry_on_busy
+def _insert_bpu_photo(bpu: str, filename: str, v: dict):
     conn = get_conn()
     try:
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn.execute("INSERT INTO bpu_photos (bpu, filename, uploaded_at) VALUES (?, ?, ?)", 
-                     (bpu, filename, ts))
+        conn.execute(
+            """
+            INSERT INTO bpu_photos (bpu, filename, uploaded_at, print_filename, thumb_filename, width, height)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (bpu, filename, ts, v.get("print_filename"), v.get("thumb_filename"), v.get("width"), v.get("height")),
+        )
+        refresh_bpu_flags(conn, bpu)
         conn.commit()
     finally:
         conn.close()
 
 def save_uploaded_photo(bpu: str, file_storage) -> str:
-    """Menyimpan file fisik ke folder statis."""
+    """
+    Menyimpan file fisik ke folder statis. Upload masih di folder privat
+    (UPLOAD_TMP_FOLDER) dan baru dipindah ke sini kalau isinya gambar;
+    selain itu ValueError (file sementara dibuang saat request selesai).
+    """
+    if not is_image_file(file_storage.stream):
+        raise ValueError("File foto rusak / bukan gambar yang bisa dibaca.")
     base = secure_filename(file_storage.filename)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    fn = f"{bpu}_{ts}_{base}"
+    # token acak: upload bersamaan (detik & nama sama) tidak saling menimpa
+    fn = f"{bpu}_{ts}_{secrets.token_hex(3)}_{base}"
     
     if not os.path.exists(STATIC_PHOTO_DIR):
         os.makedirs(STATIC_PHOTO_DIR, exist_ok=True)
         
-    save_path = os.path.join(STATIC_PHOTO_DIR, fn)
-    file_storage.save(save_path)
+    save_upload(file_storage, STATIC_PHOTO_DIR, fn)
     return fn
 
+@retry_on_busy
 def delete_bpu_photo(photo_id: int) -> bool:
     """Hapus row di DB dan file fisik terkait."""
     conn = get_conn()
     try:
         row = conn.execute(
-            "SELECT filename FROM bpu_photos WHERE id=?",
+            "SELECT filename, bpu FROM bpu_photos WHERE id=?",
             (int(photo_id),),
         ).fetchone()
         
@@ -138,17 +169,18 @@ def delete_bpu_photo(photo_id: int) -> bool:
 
         filename = row[0]
         conn.execute("DELETE FROM bpu_photos WHERE id=?", (int(photo_id),))
+        refresh_bpu_flags(conn, row[1])
         conn.commit()
+        invalidate_render_cache([row[1]])
         
-        # Hapus file fisik
-        path = os.path.join(STATIC_PHOTO_DIR, filename)
-        if os.path.exists(path):
-            os.remove(path)
+        # Hapus file fisik (asli + varian)
+        remove_photo_files(filename)
             
         return True
     finally:
         conn.close()
 
+@retry_on_busy
 def delete_all_photos_for_bpu(bpu: str) -> int:
     """Hapus semua foto milik satu BPU."""
     conn = get_conn()
@@ -159,14 +191,14 @@ def delete_all_photos_for_bpu(bpu: str) -> int:
         ).fetchall()
 
         conn.execute("DELETE FROM bpu_photos WHERE bpu=?", (bpu,))
+        refresh_bpu_flags(conn, bpu)
         conn.commit()
+        invalidate_render_cache([bpu])
         
         deleted_count = 0
         for (fn,) in rows:
             try:
-                path = os.path.join(STATIC_PHOTO_DIR, fn)
-                if os.path.exists(path):
-                    os.remove(path)
+                remove_photo_files(fn)
                 deleted_count += 1
             except Exception:
                 pass
@@ -0,0 +1,103 @@
+# arkas/bpu_summary.py
+from __future__ import annotations
+
+
+# =========================================================
+# BPU SUMMARY (1 baris = 1 BPU, diisi saat import)
+# =========================================================
+def ensure_bpu_summary_schema(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS bpu_summary (
+            bpu TEXT PRIMARY KEY,
+            bpu_seq INTEGER,
+            tgl TEXT,
+            tgl_iso TEXT,
+            ym TEXT,
+            keg TEXT,
+            rek TEXT,
+            nama_kegiatan TEXT,
+            rekap_rekening TEXT,
+            uraian_gabung TEXT,
+            total_out INTEGER,
+            line_count INTEGER,
+            photo_count INTEGER DEFAULT 0,
+            has_override INTEGER DEFAULT 0
+        )
+    """)
+    # (bpu_seq, bpu): urutan + cursor keyset SPJ (bpu_seq saja tidak unik)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bpu_summary_seq_bpu ON bpu_summary(bpu_seq, bpu)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bpu_summary_ym_seq_bpu ON bpu_summary(ym, bpu_seq, bpu)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bpu_summary_kegiatan ON bpu_summary(nama_kegiatan)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bpu_summary_rekap ON bpu_summary(rekap_rekening)")
+
+
+_SUMMARY_INSERT = """
+    INSERT OR REPLACE INTO bpu_summary (
+        bpu, bpu_seq, tgl, tgl_iso, ym, keg, rek, nama_kegiatan, rekap_rekening,
+        uraian_gabung, total_out, line_count, photo_count, has_override
+    )
+    SELECT
+        t.bpu,
+        t.bpu_seq,
+        -- Tgl teks (dd-mm-yyyy) dari baris dengan tanggal paling awal;
+        -- MIN() atas teks itu salah urut kalau beda bulan / tahun
+        COALESCE(
+            (SELECT b2.[Tgl] FROM bku b2
+             WHERE b2.[Bukti] = t.bpu AND b2.bpu_seq IS NOT NULL
+             ORDER BY b2.tgl_iso IS NULL, b2.tgl_iso, b2.rowid LIMIT 1),
+            t.tgl
+        ),
+        t.tgl_iso,
+        COALESCE(substr(t.tgl_iso, 1, 7), ''),
+        t.keg,
+        t.rek,
+        (SELECT k.nama_kegiatan FROM master_kegiatan k WHERE k.kode_kegiatan = t.keg LIMIT 1),
+        (SELECT r.rekap_rekening_belanja FROM master_rekening r WHERE r.kode_rekening_belanja = t.rek LIMIT 1),
+        t.uraian_gabung,
+        t.total_out,
+        t.line_count,
+        (SELECT COUNT(1) FROM bpu_photos p WHERE p.bpu = t.bpu),
+        EXISTS (SELECT 1 FROM bpu_override o WHERE o.bpu = t.bpu)
+    FROM (
+        SELECT
+            b.[Bukti] AS bpu,
+            MIN(b.bpu_seq) AS bpu_seq,
+            MIN(b.[Tgl]) AS tgl,
+            MIN(b.tgl_iso) AS tgl_iso,
+            MIN(b.[Keg]) AS keg,
+            MIN(b.[Rek]) AS rek,
+            COALESCE(REPLACE(GROUP_CONCAT(DISTINCT b.[Uraian]), ',', ' | '), '') AS uraian_gabung,
+            SUM(b.out_amt) AS total_out,
+            COUNT(1) AS line_count
+        FROM bku b
+        WHERE b.bpu_seq IS NOT NULL {scope}
+        GROUP BY b.[Bukti]
+    ) t
+"""
+
+
+def rebuild_bpu_summary(cur, after_rowid: int | None = None):
+    """
+    after_rowid None -> bangun ulang seluruh tabel.
+    after_rowid N    -> hanya BPU yang punya baris bku dengan rowid > N (import append).
+    """
+    if after_rowid is None:
+        cur.execute("DELETE FROM bpu_summary")
+        cur.execute(_SUMMARY_INSERT.format(scope=""))
+        return
+
+    scope = "AND b.[Bukti] IN (SELECT DISTINCT [Bukti] FROM bku WHERE rowid > ? AND bpu_seq IS NOT NULL)"
+    cur.execute(_SUMMARY_INSERT.format(scope=scope), (int(after_rowid),))
+
+
+def refresh_bpu_flags(conn, bpu: str):
+    """Update photo_count + has_override untuk satu BPU (setelah edit foto/override)."""
+    conn.execute(
+        """
+        UPDATE bpu_summary SET
+            photo_count = (SELECT COUNT(1) FROM bpu_photos p WHERE p.bpu = bpu_summary.bpu),
+            has_override = EXISTS (SELECT 1 FROM bpu_override o WHERE o.bpu = bpu_summary.bpu)
+        WHERE bpu = ?
+        """,
+        (bpu,),
+    )
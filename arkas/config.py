@@ -1,19 +1,156 @@
+import multiprocessing
 import os
+import secrets
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Jika config.py ada di folder arkas/, maka:
 # BASE_DIR = folder project utama (yang ada app.py)
 
-SECRET_KEY = "arkas-secret-key"
 
-DB_PATH = os.path.join(BASE_DIR, "arkas.db")
+def _env(name: str, default):
+    """
+    Nilai dari environment ARKAS_<name>, dikonversi mengikuti tipe default.
+    Kosong / tidak di-set -> default.
+    """
+    raw = os.environ.get(f"ARKAS_{name}")
+    if raw is None or raw.strip() == "":
+        return default
+    raw = raw.strip()
+    if isinstance(default, bool):
+        return raw.lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    return raw
 
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
-PDF_UPLOAD_FOLDER = os.path.join(BASE_DIR, "pdf_uploads")
+
+def _secret_key_file(path: str) -> str:
+    """
+    Secret key yang sama untuk semua worker: dibaca dari file, dibuat sekali
+    kalau belum ada. Dibuat via hard link dari file sementara supaya worker
+    yang start bersamaan tidak pernah membaca file setengah jadi.
+    """
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass  # worker lain lebih dulu
+        finally:
+            os.remove(tmp)
+    with open(path) as f:
+        return f.read().strip()
+
+
+# Debug Flask (reloader + debugger) hanya untuk `python app2.py` di lokal
+DEBUG = _env("DEBUG", False)
+
+# ARKAS_SECRET_KEY, atau file .secret_key yang dibuat otomatis
+SECRET_KEY = _env("SECRET_KEY", "") or _secret_key_file(
+    _env("SECRET_KEY_FILE", os.path.join(BASE_DIR, ".secret_key"))
+)
+
+DB_PATH = _env("DB_PATH", os.path.join(BASE_DIR, "arkas.db"))
+
+# SQLite connection pool + pragma
+DB_POOL_SIZE = _env("DB_POOL_SIZE", 8)
+DB_CACHED_STATEMENTS = 256
+DB_MMAP_SIZE = _env("DB_MMAP_SIZE", 256 * 1024 * 1024)
+DB_CACHE_SIZE_KB = _env("DB_CACHE_SIZE_KB", 16000)
+
+# Beberapa worker menulis ke file SQLite yang sama: tunggu lock sampai
+# DB_BUSY_TIMEOUT_MS, lalu tulisan pendek diulang DB_BUSY_RETRIES kali
+DB_BUSY_TIMEOUT_MS = _env("DB_BUSY_TIMEOUT_MS", 5000)
+DB_BUSY_RETRIES = _env("DB_BUSY_RETRIES", 3)
+
+UPLOAD_FOLDER = _env("UPLOAD_FOLDER", os.path.join(BASE_DIR, "uploads"))
+PDF_UPLOAD_FOLDER = _env("PDF_UPLOAD_FOLDER", os.path.join(BASE_DIR, "pdf_uploads"))
+JOB_RESULT_FOLDER = _env("JOB_RESULT_FOLDER", os.path.join(BASE_DIR, "job_results"))
+# Foto BPU di-stream ke sini (tidak ikut disajikan /static) dan baru dipindah
+# ke STATIC_PHOTO_DIR setelah terbukti gambar
+UPLOAD_TMP_FOLDER = os.path.join(UPLOAD_FOLDER, ".tmp")
+
+# Batas ukuran satu request upload (byte); lebih besar -> 413
+MAX_CONTENT_LENGTH = _env("MAX_CONTENT_LENGTH", 200 * 1024 * 1024)
+# Batas per file, dicek selama file di-stream ke disk (413 sebelum body habis)
+MAX_PDF_UPLOAD_BYTES = _env("MAX_PDF_UPLOAD_BYTES", 100 * 1024 * 1024)
+MAX_XLSX_UPLOAD_BYTES = _env("MAX_XLSX_UPLOAD_BYTES", 50 * 1024 * 1024)
+MAX_PHOTO_UPLOAD_BYTES = _env("MAX_PHOTO_UPLOAD_BYTES", 20 * 1024 * 1024)
 
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 STATIC_PHOTO_DIR = os.path.join(STATIC_DIR, "uploads", "bpu_photos")
 
+# Pool proses (convert PDF, export BAST/BKP) tidak memakai fork: app
+# multi-thread (job, pool SQLite) -> anak hasil fork bisa mewarisi lock /
+# koneksi yang sedang dipakai thread lain. forkserver (Linux) / spawn (Windows)
+PROCESS_START_METHOD = _env(
+    "PROCESS_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+# Convert PDF: jumlah proses paralel (1 = serial) & halaman per task.
+# Di bawah CONVERT_MIN_PARALLEL_PAGES halaman tetap serial (start proses
+# worker + import pdfplumber lebih mahal dari parse beberapa halaman)
+CONVERT_WORKERS = _env("CONVERT_WORKERS", os.cpu_count() or 1)
+CONVERT_PAGES_PER_TASK = 4
+CONVERT_MIN_PARALLEL_PAGES = _env("CONVERT_MIN_PARALLEL_PAGES", 16)
+
+# Cache hasil ekstrak PDF (per file & per halaman, LRU)
+PDF_CACHE_ENABLED = _env("PDF_CACHE_ENABLED", True)
+PDF_CACHE_DB = _env("PDF_CACHE_DB", os.path.join(BASE_DIR, "pdf_cache.db"))
+PDF_CACHE_MAX_BYTES = _env("PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+
+# Foto BPU: varian cetak untuk slot 16 x 22 cm di BAST + thumbnail web
+PHOTO_PRINT_MAX_CM = (16.0, 22.0)
+PHOTO_PRINT_DPI = 200
+PHOTO_JPEG_QUALITY = 85
+PHOTO_THUMB_PX = 320
+
+# Cache PDF BAST/BKP yang sudah dirender (file di disk, index di PDF_CACHE_DB)
+RENDER_CACHE_ENABLED = _env("RENDER_CACHE_ENABLED", True)
+RENDER_CACHE_DIR = _env("RENDER_CACHE_DIR", os.path.join(BASE_DIR, "render_cache"))
+RENDER_CACHE_MAX_BYTES = _env("RENDER_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+
+# Export massal BAST/BKP: jumlah proses & BPU per task
+EXPORT_WORKERS = _env("EXPORT_WORKERS", CONVERT_WORKERS)
+EXPORT_BPUS_PER_TASK = 8
+
+# Export tabel CSV (stream): jumlah baris per potongan yang dikirim
+TABLE_EXPORT_CHUNK_ROWS = 1000
+
+# Import workbook: jumlah baris per executemany
+IMPORT_CHUNK_ROWS = 5000
+
+# Autocomplete pihak 1: ukuran LRU hasil per proses & Cache-Control (detik)
+PIHAK1_SEARCH_CACHE_SIZE = 256
+PIHAK1_SEARCH_MAX_AGE = 30
+
+# Instrumentasi (opt-in): waktu SQL/template/PDF/pandas per request, /metrics
+# (format Prometheus), log request lebih lambat dari SLOW_REQUEST_MS
+METRICS_ENABLED = _env("METRICS_ENABLED", False)
+SLOW_REQUEST_MS = _env("SLOW_REQUEST_MS", 500)
+
+# Profil per request: kirim header X-Arkas-Profile: 1 (cProfile, .prof) atau
+# "pyinstrument" (.html, kalau terpasang); file disimpan di PROFILE_DIR.
+# Tidak bergantung pada METRICS_ENABLED
+PROFILE_ENABLED = _env("PROFILE_ENABLED", False)
+PROFILE_HEADER = "X-Arkas-Profile"
+PROFILE_DIR = _env("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+
+# Background job (convert / import): jumlah worker thread per proses web
+JOB_WORKERS = _env("JOB_WORKERS", 1)
+# Proses yang menjalankan job memperbarui jobs.updated_at tiap
+# JOB_HEARTBEAT_SECONDS; job queued/running yang lebih lama dari
+# JOB_STALE_SECONDS tanpa update = prosesnya mati / restart -> status error.
+# Heartbeat tertahan selama transaksi tulis import, jadi JOB_STALE_SECONDS
+# harus jauh lebih lama dari transaksi tulis terlama (lihat arkas.jobs).
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = _env("JOB_STALE_SECONDS", 600)
+
 ALLOWED_EXT = {".xlsx"}
 ALLOWED_PDF = {".pdf"}
 ALLOWED_IMG = {".jpg", ".jpeg", ".png", ".webp"}
@@ -21,4 +158,5 @@ ALLOWED_IMG = {".jpg", ".jpeg", ".png", ".webp"}
 def ensure_folders():
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     os.makedirs(PDF_UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(JOB_RESULT_FOLDER, exist_ok=True)
     os.makedirs(STATIC_PHOTO_DIR, exist_ok=True)
\ No newline at end of file
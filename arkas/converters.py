@@ -1,9 +1,29 @@
 from __future__ import annotations
 
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import pdfplumber
 
+from .config import (
+    CONVERT_MIN_PARALLEL_PAGES,
+    CONVERT_PAGES_PER_TASK,
+    CONVERT_WORKERS,
+    PDF_CACHE_ENABLED,
+    PROCESS_START_METHOD,
+)
+from .pdf_cache import cache_get_many, cache_put_many, file_sha256, page_sha256
+
+# Naikkan jika cara ekstrak tabel / sidik jari halaman berubah (cache lama otomatis tidak terpakai)
+CONVERTER_VERSION = f"2-pdfplumber{pdfplumber.__version__}"
+
+
+def _as_text(s: pd.Series) -> pd.Series:
+    # setara str(x) per sel: sel kosong (NaN) ikut jadi "nan"
+    return s.astype(str).fillna("nan")
+
 
 def clean_rek(s: str) -> str:
     return str(s).replace("\n", "").replace(" ", "").strip()
@@ -19,68 +39,208 @@ def to_num_plain(x):
     return pd.to_numeric(str(x).replace(".", "").replace(",", ""), errors="coerce")
 
 
+# versi satu kolom sekaligus (hasil sama dengan .apply versi per sel di atas)
+def clean_rek_series(s: pd.Series) -> pd.Series:
+    return _as_text(s).str.replace("\n", "", regex=False).str.replace(" ", "", regex=False).str.strip()
+
+
+def to_num_id_series(s: pd.Series) -> pd.Series:
+    s = s.astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
+def to_num_plain_series(s: pd.Series) -> pd.Series:
+    s = s.astype(str).str.replace(".", "", regex=False).str.replace(",", "", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+
 def gabung_id_barang(df: pd.DataFrame) -> pd.DataFrame:
     """
     Kasus ID Barang kadang terpotong jadi 2 baris.
     Jika baris berikutnya hanya digit, digabung.
+
+    Baris digit yang sudah digabung tidak dicek lagi, jadi pada deretan baris
+    digit berurutan posisinya bergantian: digabung ke atas / jadi baris induk.
+    Posisi dihitung per kelompok (baris non-digit + baris digit sesudahnya).
     """
     if df.empty or "ID Barang" not in df.columns:
         return df
 
-    rows = []
-    skip_next = False
-    for i in range(len(df)):
-        if skip_next:
-            skip_next = False
-            continue
+    ids = _as_text(df["ID Barang"]).str.strip()
+    is_digit = ids.str.replace(" ", "", regex=False).str.isdigit()
 
-        id_barang = str(df.loc[i, "ID Barang"]).strip()
+    pos = is_digit.groupby((~is_digit).cumsum()).cumcount()
+    merged = is_digit & (pos % 2 == 1)
+    takes_next = merged.shift(-1, fill_value=False)
 
-        if i + 1 < len(df):
-            next_id = str(df.loc[i + 1, "ID Barang"]).strip()
-            if next_id.replace(" ", "").isdigit():
-                id_barang = (id_barang + next_id).strip()
-                skip_next = True
+    ids = ids.where(~takes_next, (ids + ids.shift(-1, fill_value="")).str.strip())
 
-        row = df.loc[i].copy()
-        row["ID Barang"] = id_barang
-        rows.append(row)
+    out = df.loc[~merged].copy()
+    out["ID Barang"] = ids[~merged]
+    return out
 
-    return pd.DataFrame(rows)
 
+# =========================================================
+# EKSTRAK TABEL PDF (per halaman, bisa paralel multi-proses)
+# =========================================================
+def _page_tables(task: tuple[str, int, int], on_page=None) -> list[list]:
+    """Ambil tabel mentah per halaman [start, stop) satu file PDF -> [[tabel, ...], ...]."""
+    path, start, stop = task
+    out: list[list] = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:stop]:
+            out.append(page.extract_tables())
+            if on_page is not None:
+                on_page()
+    return out
 
-def convert_bku_pdfs(pdf_paths: list[str]) -> pd.DataFrame:
-    all_data: list[pd.DataFrame] = []
 
+def count_pdf_pages(pdf_paths: list[str]) -> int:
+    total = 0
     for path in pdf_paths:
         with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                for table in tables:
-                    df = pd.DataFrame(table)
-                    if df.shape[1] < 5:
-                        continue
+            total += len(pdf.pages)
+    return total
 
-                    df = df.iloc[:, :8]
-                    df.columns = ["Tgl", "Keg", "Rek", "Bukti", "Uraian", "In", "Out", "Saldo"][: df.shape[1]]
 
-                    # buang header baris
-                    df = df[~df["Tgl"].astype(str).str.contains("Tanggal", na=False)]
+def _runs(indexes: list[int], step: int | None):
+    """Pecah index halaman (urut) jadi rentang [start, stop) bersambung, maks `step` halaman."""
+    start = prev = None
+    for i in indexes:
+        if start is not None and i == prev + 1 and (step is None or i - start < step):
+            prev = i
+            continue
+        if start is not None:
+            yield start, prev + 1
+        start = prev = i
+    if start is not None:
+        yield start, prev + 1
+
+
+def extract_pdf_tables(
+    pdf_paths: list[str],
+    workers: int | None = None,
+    on_progress=None,
+    use_cache: bool | None = None,
+) -> list[tuple[str, list]]:
+    """
+    Return [(path, tabel), ...] sesuai urutan file & halaman asli.
+    - cache: file identik (SHA-256) tidak diparse ulang; halaman yang sama
+      (mis. laporan yang ditambah halaman baru) diambil dari cache per halaman.
+    - workers > 1: halaman yang belum ada di cache dibagi per potongan
+      CONVERT_PAGES_PER_TASK ke ProcessPoolExecutor (forkserver / spawn),
+      kecuali sisa halamannya < CONVERT_MIN_PARALLEL_PAGES (serial).
+    - on_progress(done, total): dipanggil setiap ada halaman selesai diparse.
+    """
+    workers = CONVERT_WORKERS if workers is None else int(workers)
+    use_cache = PDF_CACHE_ENABLED if use_cache is None else use_cache
+
+    pages_by_file: list[list] = []
+    file_keys: list[str | None] = []
+    page_keys: list[list] = []
+
+    # 1) cache per file
+    if use_cache:
+        file_keys = [f"file:{CONVERTER_VERSION}:{file_sha256(p)}" for p in pdf_paths]
+        file_hits = cache_get_many(file_keys)
+        page_hits = cache_get_many([k for fk in file_keys for k in (file_hits.get(fk) or [])])
+    else:
+        file_keys = [None] * len(pdf_paths)
+        file_hits, page_hits = {}, {}
+
+    # 2) cache per halaman -> daftar halaman yang masih harus diparse
+    tasks: list[tuple[int, tuple[str, int, int]]] = []
+    step = None if workers <= 1 else max(1, int(CONVERT_PAGES_PER_TASK))
+    for i, path in enumerate(pdf_paths):
+        keys = file_hits.get(file_keys[i]) or []
+        if keys and all(k in page_hits for k in keys):
+            pages_by_file.append([page_hits[k] for k in keys])
+            page_keys.append(keys)
+            continue
+
+        with pdfplumber.open(path) as pdf:
+            n_pages = len(pdf.pages)
+            memo: dict = {}
+            keys = [f"page:{CONVERTER_VERSION}:{page_sha256(pg, memo)}" for pg in pdf.pages] if use_cache else []
+        if keys:
+            page_hits.update(cache_get_many([k for k in keys if k not in page_hits]))
+
+        pages = [page_hits.get(k) for k in keys] if keys else [None] * n_pages
+        missing = [j for j, v in enumerate(pages) if v is None]
+        for start, stop in _runs(missing, step):
+            tasks.append((i, (path, start, stop)))
+        pages_by_file.append(pages)
+        page_keys.append(keys)
+
+    # 3) parse halaman yang belum ada (serial / paralel)
+    total_pages = sum(stop - start for _, (_, start, stop) in tasks)
+    done = 0
+
+    def _tick(n: int = 1):
+        nonlocal done
+        done += n
+        if on_progress is not None:
+            on_progress(done, total_pages)
+
+    if workers <= 1 or len(tasks) <= 1 or total_pages < CONVERT_MIN_PARALLEL_PAGES:
+        results = [_page_tables(t, on_page=_tick) for _, t in tasks]
+    else:
+        results = []
+        ctx = multiprocessing.get_context(PROCESS_START_METHOD)
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=ctx) as ex:
+            # map() menjaga urutan hasil = urutan task
+            for (_, (_, start, stop)), tables in zip(tasks, ex.map(_page_tables, [t for _, t in tasks])):
+                results.append(tables)
+                _tick(stop - start)
+
+    new_items: dict = {}
+    for (i, (_, start, _)), per_page in zip(tasks, results):
+        for offset, tables in enumerate(per_page):
+            pages_by_file[i][start + offset] = tables
+            if use_cache:
+                new_items[page_keys[i][start + offset]] = tables
+
+    if use_cache:
+        for i, fk in enumerate(file_keys):
+            if fk not in file_hits:
+                new_items[fk] = page_keys[i]
+        cache_put_many(new_items)
+
+    out: list[tuple[str, list]] = []
+    for path, pages in zip(pdf_paths, pages_by_file):
+        for tables in pages:
+            out.extend((path, table) for table in tables)
+    return out
+
+
+def convert_bku_pdfs(pdf_paths: list[str], workers: int | None = None, on_progress=None) -> pd.DataFrame:
+    all_data: list[pd.DataFrame] = []
+
+    for _path, table in extract_pdf_tables(pdf_paths, workers, on_progress):
+        df = pd.DataFrame(table)
+        if df.shape[1] < 5:
+            continue
+
+        df = df.iloc[:, :8]
+        df.columns = ["Tgl", "Keg", "Rek", "Bukti", "Uraian", "In", "Out", "Saldo"][: df.shape[1]]
 
-                    # hanya ambil transaksi BPU
-                    df = df[df["Bukti"].astype(str).str.contains("BPU", na=False)]
+        # buang header baris
+        df = df[~df["Tgl"].astype(str).str.contains("Tanggal", na=False)]
 
-                    all_data.append(df)
+        # hanya ambil transaksi BPU
+        df = df[df["Bukti"].astype(str).str.contains("BPU", na=False)]
+
+        all_data.append(df)
 
     if not all_data:
         return pd.DataFrame(columns=["Tgl", "Keg", "Rek", "Bukti", "Uraian", "In", "Out", "Saldo"])
 
     df_final = pd.concat(all_data, ignore_index=True)
-    df_final["Rek"] = df_final["Rek"].astype(str).apply(clean_rek)
+    df_final["Rek"] = clean_rek_series(df_final["Rek"])
 
     for col in ["In", "Out", "Saldo"]:
         if col in df_final.columns:
-            df_final[col] = df_final[col].apply(to_num_id).fillna(0)
+            df_final[col] = to_num_id_series(df_final[col]).fillna(0)
 
     # rapikan
     for col in ["Tgl", "Keg", "Rek", "Bukti", "Uraian"]:
@@ -90,39 +250,35 @@ def convert_bku_pdfs(pdf_paths: list[str]) -> pd.DataFrame:
     return df_final
 
 
-def convert_bhp_pdfs(pdf_paths: list[str]) -> pd.DataFrame:
+def convert_bhp_pdfs(pdf_paths: list[str], workers: int | None = None, on_progress=None) -> pd.DataFrame:
     all_data: list[pd.DataFrame] = []
 
-    for path in pdf_paths:
+    for path, table in extract_pdf_tables(pdf_paths, workers, on_progress):
         nama_file = os.path.basename(path)
 
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                for table in tables:
-                    df = pd.DataFrame(table)
-                    if df.shape[1] < 9:
-                        continue
-
-                    df = df.iloc[:, :9]
-                    df.columns = [
-                        "Tanggal",
-                        "Kode Kegiatan",
-                        "Kode Rekening",
-                        "No Bukti",
-                        "ID Barang",
-                        "Uraian",
-                        "Jumlah Barang",
-                        "Harga Satuan",
-                        "Realisasi",
-                    ]
-
-                    # buang header baris
-                    df = df[~df["Tanggal"].astype(str).str.contains("Tanggal", na=False)]
-                    df = df[~df["Tanggal"].astype(str).str.contains("Jumlah", na=False)]
-
-                    df["Sumber Data"] = nama_file
-                    all_data.append(df)
+        df = pd.DataFrame(table)
+        if df.shape[1] < 9:
+            continue
+
+        df = df.iloc[:, :9]
+        df.columns = [
+            "Tanggal",
+            "Kode Kegiatan",
+            "Kode Rekening",
+            "No Bukti",
+            "ID Barang",
+            "Uraian",
+            "Jumlah Barang",
+            "Harga Satuan",
+            "Realisasi",
+        ]
+
+        # buang header baris
+        df = df[~df["Tanggal"].astype(str).str.contains("Tanggal", na=False)]
+        df = df[~df["Tanggal"].astype(str).str.contains("Jumlah", na=False)]
+
+        df["Sumber Data"] = nama_file
+        all_data.append(df)
 
     if not all_data:
         return pd.DataFrame(
@@ -150,7 +306,7 @@ def convert_bhp_pdfs(pdf_paths: list[str]) -> pd.DataFrame:
 
     for col in ["Jumlah Barang", "Harga Satuan", "Realisasi"]:
         if col in df_final.columns:
-            df_final[col] = df_final[col].apply(to_num_plain).fillna(0)
+            df_final[col] = to_num_plain_series(df_final[col]).fillna(0)
 
     # rapikan text kolom utama
     for col in ["Tanggal", "Kode Kegiatan", "Kode Rekening", "No Bukti", "Uraian", "Sumber Data"]:
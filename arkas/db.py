@@ -1,89 +1,160 @@
+import functools
+import queue
+import random
 import sqlite3
-from .config import DB_PATH
+import time
+
+from flask import g, has_app_context
+
+from .config import (
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_CACHED_STATEMENTS,
+    DB_MMAP_SIZE,
+    DB_CACHE_SIZE_KB,
+    DB_BUSY_TIMEOUT_MS,
+    DB_BUSY_RETRIES,
+    METRICS_ENABLED,
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Koneksi yang dipinjam dari pool selama satu request, dipakai bersama
+    semua helper yang memanggil get_conn() di request itu.
+    close() dari helper tidak menutup koneksi. Rollback hanya kalau helper
+    itu sendiri yang membuka transaksi (tidak ada transaksi saat ia memanggil
+    get_conn); tulisan pemanggil yang belum di-commit tidak ikut dibatalkan.
+    Sisa transaksi dibatalkan saat koneksi dikembalikan ke pool (teardown).
+    """
+
+    borrowed = False
+
+    def close(self):
+        if self.borrowed:
+            owners = self.__dict__.get("_owners")
+            started_here = owners.pop() if owners else True
+            if started_here and self.in_transaction:
+                self.rollback()
+            return
+        super().close()
+
+
+# Pool hanya membatasi jumlah koneksi *idle* yang disimpan (DB_POOL_SIZE);
+# koneksi aktif = jumlah request yang sedang jalan (thread server), yang
+# dibatasi oleh konfigurasi server (gunicorn workers x threads).
+_pool: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+
+def _connect() -> PooledConnection:
+    factory = PooledConnection
+    if METRICS_ENABLED:
+        from .metrics import InstrumentedConnection as factory
+    # check_same_thread=False: koneksi pool berpindah thread antar request,
+    # tapi selalu dipinjam oleh satu request (satu thread) pada satu waktu.
+    # timeout = busy handler SQLite: tunggu lock worker lain, bukan langsung
+    # "database is locked".
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=DB_CACHED_STATEMENTS,
+        factory=factory,
+    )
+    # pragma sekali per koneksi (bukan per query)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE)}")
+    conn.execute(f"PRAGMA cache_size={-int(DB_CACHE_SIZE_KB)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _acquire() -> PooledConnection:
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    conn.borrowed = True
+    conn._owners = []
+    return conn
+
+
+def _release(conn: PooledConnection):
+    conn.borrowed = False
+    conn._owners = []
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+    except sqlite3.Error:
+        conn.close()
+
 
 def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
-
-def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # master
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS master_kegiatan (
-            kode_kegiatan TEXT,
-            nama_kegiatan TEXT
-        )
-    """)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS master_rekening (
-            kode_rekening_belanja TEXT,
-            nama_rekening_belanja TEXT,
-            rekap_rekening_belanja TEXT
-        )
-    """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_master_kegiatan_kode ON master_kegiatan(kode_kegiatan)")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_master_rekening_kode ON master_rekening(kode_rekening_belanja)")
-
-    # settings
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS app_settings (
-            id INTEGER PRIMARY KEY CHECK (id = 1),
-            nama_sekolah TEXT,
-            npsn TEXT,
-            alamat TEXT,
-            kab_kota TEXT,
-            tahun TEXT,
-            tempat_ttd TEXT,
-            kepala_sekolah_nama TEXT,
-            kepala_sekolah_nip TEXT,
-            bendahara_nama TEXT,
-            bendahara_nip TEXT
-        )
-    """)
-    cur.execute("INSERT OR IGNORE INTO app_settings (id) VALUES (1)")
-
-    # tambah kolom BAST default global
-    cols = [r[1] for r in cur.execute("PRAGMA table_info(app_settings)").fetchall()]
-    add_cols = [
-        ("pihak1_nama", "TEXT"),
-        ("pihak1_jabatan", "TEXT"),
-        ("pihak1_perusahaan", "TEXT"),
-        ("pihak1_alamat", "TEXT"),
-        ("pihak1_telp", "TEXT"),
-        ("pihak2_nama", "TEXT"),
-        ("pihak2_jabatan", "TEXT"),
-        ("pihak2_nama_satdik", "TEXT"),
-        ("pihak2_alamat", "TEXT"),
-        ("pihak2_telp", "TEXT"),
-    ]
-    for c, typ in add_cols:
-        if c not in cols:
-            cur.execute(f"ALTER TABLE app_settings ADD COLUMN {c} {typ}")
-
-    # override per BPU
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS bpu_override (
-            bpu TEXT PRIMARY KEY,
-            kegiatan_override TEXT,
-            pihak1_nama TEXT,
-            pihak1_jabatan TEXT,
-            pihak1_perusahaan TEXT,
-            created_at TEXT
-        )
-    """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_bpu_override_bpu ON bpu_override(bpu)")
-
-    # foto per BPU
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS bpu_photos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            bpu TEXT,
-            filename TEXT,
-            uploaded_at TEXT
-        )
-    """)
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_bpu_photos_bpu ON bpu_photos(bpu)")
-
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    """
+    Di dalam app context: satu koneksi per request (dipinjam dari pool).
+    Di luar app context (init_db, script): koneksi baru biasa.
+    """
+    if not has_app_context():
+        return _connect()
+    conn = g.get("_arkas_conn")
+    if conn is None:
+        conn = _acquire()
+        g._arkas_conn = conn
+    # True = transaksi (kalau nanti ada) milik pemanggil ini, lihat close()
+    conn._owners.append(not conn.in_transaction)
+    return conn
+
+
+def _caller_in_transaction() -> bool:
+    if not has_app_context():
+        return False
+    conn = g.get("_arkas_conn")
+    return conn is not None and conn.in_transaction
+
+
+def release_conn(exc=None):
+    conn = g.pop("_arkas_conn", None)
+    if conn is not None:
+        _release(conn)
+
+
+def is_busy_error(exc: BaseException) -> bool:
+    """OperationalError karena lock ditahan koneksi/proses lain."""
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    msg = str(exc).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def retry_on_busy(fn):
+    """
+    Ulangi fungsi tulis pendek kalau SQLite tetap busy sesudah busy timeout,
+    atau langsung busy karena transaksi baca yang naik jadi tulis (WAL
+    SQLITE_BUSY_SNAPSHOT, busy handler tidak dipanggil). Fungsi harus
+    membuka transaksinya sendiri lewat get_conn() dan commit di dalamnya.
+    Kalau pemanggil sudah memegang transaksi di koneksi request, tidak
+    diulang: transaksi itu milik pemanggil dan tidak boleh di-rollback di sini.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _caller_in_transaction():
+            return fn(*args, **kwargs)
+        for attempt in range(DB_BUSY_RETRIES + 1):
+            try:
+                return fn(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if attempt >= DB_BUSY_RETRIES or not is_busy_error(e):
+                    raise
+            # jeda acak supaya worker yang bentrok tidak bangun bersamaan
+            time.sleep(0.05 * (2 ** attempt) * (0.5 + random.random()))
+
+    return wrapper
+
+
+def init_app(app):
+    app.teardown_appcontext(release_conn)
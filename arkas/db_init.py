@@ -2,12 +2,124 @@
 from __future__ import annotations
 
 from .db import get_conn
+from .ledger import ensure_ledger_schema, refresh_derived_columns
+from .bpu_summary import ensure_bpu_summary_schema, rebuild_bpu_summary
+from .jobs import ensure_jobs_schema, fail_stale_jobs
+from .photos import ensure_photo_variant_schema
+from .pihak1_history import ensure_pihak1_search_schema
+from .queries import ensure_data_version_schema
+from .rekap import ensure_rekap_schema, rebuild_rekap
+from .search import ensure_search_schema
 
 
-def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
+# ======================================================
+# MIGRASI BERVERSI (PRAGMA user_version)
+# ======================================================
+def _migrasi_v1_ledger_typed(cur):
+    """Kolom turunan BKU/BHP (tgl_iso, ym, bpu_seq, *_amt) + index."""
+    for table in ("bku", "bhp_bhm"):
+        ensure_ledger_schema(cur, table)
+        refresh_derived_columns(cur, table)
+
+
+def _migrasi_v2_bpu_seq_index(cur):
+    """Index bku(bpu_seq) untuk pagination keyset SPJ per BPU."""
+    ensure_ledger_schema(cur, "bku")
+
+
+def _migrasi_v3_bpu_summary(cur):
+    """Tabel ringkasan per BPU untuk halaman SPJ."""
+    ensure_bpu_summary_schema(cur)
+    rebuild_bpu_summary(cur)
+
+
+def _migrasi_v4_jobs(cur):
+    """Tabel jobs untuk convert/import di background."""
+    ensure_jobs_schema(cur)
+
+
+def _migrasi_v5_row_key(cur):
+    """Row key (row_ident, row_ord) + UNIQUE index untuk import mode merge."""
+    for table in ("bku", "bhp_bhm"):
+        ensure_ledger_schema(cur, table)
+        refresh_derived_columns(cur, table)
+
+
+def _migrasi_v6_photo_variants(cur):
+    """Kolom varian foto (cetak + thumbnail); isi file lama via `python -m arkas.photos`."""
+    ensure_photo_variant_schema(cur)
+
+
+def _migrasi_v7_data_version(cur):
+    """Counter versi data: cache opsi filter / COUNT di tiap proses dibuang saat berubah."""
+    ensure_data_version_schema(cur)
+
+
+def _migrasi_v8_search_index(cur):
+    """Index full-text FTS5 atas bukti / uraian BKU + BHP/BHM, diisi dari data yang ada."""
+    ensure_search_schema(cur, rebuild=True)
+
+
+def _migrasi_v9_pihak1_trigram(cur):
+    """Index trigram nama / perusahaan pihak 1 (autocomplete), sinkron lewat trigger."""
+    ensure_pihak1_search_schema(cur, rebuild=True)
+
 
+def _migrasi_v10_rekap(cur):
+    """Tabel rekap bulanan (dashboard /rekap), diisi dari data yang ada."""
+    ensure_rekap_schema(cur)
+    rebuild_rekap(cur)
+
+
+def _migrasi_v11_spj_cursor_index(cur):
+    """Index bpu_summary (bpu_seq, bpu) untuk cursor keyset SPJ yang unik."""
+    cur.execute("DROP INDEX IF EXISTS idx_bpu_summary_seq")
+    cur.execute("DROP INDEX IF EXISTS idx_bpu_summary_ym_seq")
+    ensure_bpu_summary_schema(cur)
+
+
+def _migrasi_v12_bpu_summary_tgl(cur):
+    """Isi ulang bpu_summary: Tgl dari baris BPU dengan tgl_iso paling awal."""
+    rebuild_bpu_summary(cur)
+
+
+MIGRATIONS = [
+    (1, _migrasi_v1_ledger_typed),
+    (2, _migrasi_v2_bpu_seq_index),
+    (3, _migrasi_v3_bpu_summary),
+    (4, _migrasi_v4_jobs),
+    (5, _migrasi_v5_row_key),
+    (6, _migrasi_v6_photo_variants),
+    (7, _migrasi_v7_data_version),
+    (8, _migrasi_v8_search_index),
+    (9, _migrasi_v9_pihak1_trigram),
+    (10, _migrasi_v10_rekap),
+    (11, _migrasi_v11_spj_cursor_index),
+    (12, _migrasi_v12_bpu_summary_tgl),
+]
+
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(cur) -> int:
+    return int(cur.execute("PRAGMA user_version").fetchone()[0] or 0)
+
+
+def run_migrations(cur, current: int | None = None):
+    current = get_schema_version(cur) if current is None else current
+    for version, fn in MIGRATIONS:
+        if version > current:
+            fn(cur)
+            cur.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def _buat_tabel_dasar(cur):
+    """
+    Tabel awal aplikasi (sebelum ada migrasi berversi) + migrasi kolom lama.
+    Semua idempotent; hanya dijalankan kalau user_version < SCHEMA_VERSION.
+    Perubahan skema baru -> tambahkan migrasi di MIGRATIONS, jangan di sini.
+    """
     # ======================================================
     # 1) CREATE TABLES (jika belum ada)
     # ======================================================
@@ -122,5 +234,25 @@ def init_db():
     # Foto: index bpu
     cur.execute("CREATE INDEX IF NOT EXISTS idx_bpu_photos_bpu ON bpu_photos(bpu)")
 
-    conn.commit()
-    conn.close()
\ No newline at end of file
+
+def init_db():
+    """
+    Dipanggil tiap start (tiap worker). Skema sudah terbaru -> cukup 1 PRAGMA.
+    Kalau belum: BEGIN IMMEDIATE (worker lain yang start bersamaan menunggu),
+    cek ulang versinya, lalu buat tabel dasar + jalankan migrasi yang belum.
+    Sesudahnya job yang terputus restart sebelumnya ditandai error.
+    """
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        if get_schema_version(cur) < SCHEMA_VERSION:
+            cur.execute("BEGIN IMMEDIATE")
+            current = get_schema_version(cur)
+            if current < SCHEMA_VERSION:
+                _buat_tabel_dasar(cur)
+                run_migrations(cur, current)
+            conn.commit()
+
+        fail_stale_jobs(conn)
+    finally:
+        conn.close()
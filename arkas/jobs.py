@@ -0,0 +1,298 @@
+# arkas/jobs.py
+from __future__ import annotations
+
+import json
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from .config import JOB_HEARTBEAT_SECONDS, JOB_STALE_SECONDS, JOB_WORKERS
+from .db import get_conn, retry_on_busy
+
+
+# =========================================================
+# JOB QUEUE LOKAL (tabel jobs di SQLite + worker thread)
+# Status disimpan di SQLite supaya semua proses web bisa membaca progress.
+# =========================================================
+def ensure_jobs_schema(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            progress_done INTEGER DEFAULT 0,
+            progress_total INTEGER DEFAULT 0,
+            message TEXT,
+            result_json TEXT,
+            result_path TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at)")
+
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="arkas-job")
+
+
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _now() -> str:
+    return datetime.now().strftime(_TS_FORMAT)
+
+
+# status job yang belum selesai; done / error tidak pernah berubah lagi
+_OPEN_STATUSES = ("queued", "running")
+
+
+@retry_on_busy
+def _update_job(job_id: str, only_status: tuple[str, ...] = (), **fields) -> bool:
+    """
+    UPDATE satu job. only_status: hanya kalau status job saat ini salah satu
+    dari ini (dicek di WHERE yang sama, bukan SELECT terpisah).
+    Return True kalau barisnya ter-update.
+    """
+    fields["updated_at"] = _now()
+    cols = ", ".join(f"{k}=?" for k in fields)
+    where = "id=?"
+    if only_status:
+        where += f" AND status IN ({', '.join('?' * len(only_status))})"
+    conn = get_conn()
+    try:
+        n = conn.execute(
+            f"UPDATE jobs SET {cols} WHERE {where}", (*fields.values(), job_id, *only_status)
+        ).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return n > 0
+
+
+class JobContext:
+    """
+    Dipakai fungsi job untuk melaporkan progress. Progress langsung ditulis
+    ke tabel jobs (koneksi sendiri), jadi jangan dipanggil sambil menahan
+    transaksi tulis arkas.db -- lihat import_ledger_rows.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def progress(self, done: int, total: int, message: str | None = None):
+        fields = {"progress_done": int(done), "progress_total": int(total)}
+        if message is not None:
+            fields["message"] = message
+        _update_job(self.job_id, **fields)
+
+
+# =========================================================
+# HEARTBEAT + JOB TERPUTUS
+# Thread job mati bersama prosesnya (restart / crash worker) tanpa sempat
+# menulis status akhir. Proses yang hidup memperbarui updated_at job-nya
+# secara berkala; job queued/running yang updated_at-nya lewat
+# JOB_STALE_SECONDS ditandai error, saat start (init_db) dan saat di-poll.
+#
+# Selama import memegang transaksi tulis arkas.db (BEGIN IMMEDIATE), heartbeat
+# ikut tertahan lock yang sama. Karena itu:
+#  - JOB_STALE_SECONDS harus jauh di atas transaksi tulis terlama + heartbeat
+#    (default 600 dt; import 100k baris hanya belasan detik di dalam lock);
+#  - penandaan stale memakai UPDATE bersyarat (status masih queued/running DAN
+#    updated_at masih lama), jadi job yang baru selesai / baru heartbeat di
+#    antara SELECT dan UPDATE tidak ditimpa;
+#  - status akhir dari _run juga bersyarat: job yang sudah ditandai error
+#    tidak "hidup lagi" jadi done. Kalau job ternyata tetap selesai, message
+#    diberi catatan supaya import tidak dijalankan ulang tanpa cek data.
+# =========================================================
+STALE_JOB_MESSAGE = "worker restarted"
+LATE_FINISH_MESSAGE = (
+    STALE_JOB_MESSAGE + " -- tetapi job tetap selesai sesudah ditandai error; "
+    "periksa data sebelum menjalankan ulang"
+)
+
+# job milik proses ini yang belum selesai (queued / running)
+_active_jobs: set[str] = set()
+_active_lock = threading.Lock()
+_heartbeat_thread: threading.Thread | None = None
+
+
+@retry_on_busy
+def _touch_jobs(job_ids: list[str]):
+    marks = ", ".join("?" * len(job_ids))
+    conn = get_conn()
+    try:
+        conn.execute(
+            f"UPDATE jobs SET updated_at=? WHERE id IN ({marks}) AND status IN ('queued', 'running')",
+            (_now(), *job_ids),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_SECONDS)
+        with _active_lock:
+            job_ids = list(_active_jobs)
+        if not job_ids:
+            continue
+        try:
+            _touch_jobs(job_ids)
+        except Exception:
+            traceback.print_exc()
+
+
+def _start_heartbeat():
+    # dimulai saat job pertama, di proses worker (bukan master gunicorn sebelum fork)
+    global _heartbeat_thread
+    with _active_lock:
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="arkas-job-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+
+def _stale_cutoff() -> str:
+    return (datetime.now() - timedelta(seconds=JOB_STALE_SECONDS)).strftime(_TS_FORMAT)
+
+
+def fail_stale_jobs(conn) -> int:
+    """
+    Tandai error job queued/running yang prosesnya sudah tidak ada
+    (updated_at lebih lama dari JOB_STALE_SECONDS). Return jumlah job.
+    Dipanggil saat start; tidak menulis apa-apa kalau tidak ada job terputus.
+    """
+    cutoff = _stale_cutoff()
+    stale = conn.execute(
+        "SELECT 1 FROM jobs WHERE status IN ('queued', 'running') AND updated_at < ? LIMIT 1",
+        (cutoff,),
+    ).fetchone()
+    if not stale:
+        return 0
+    n = conn.execute(
+        """
+        UPDATE jobs SET status='error', message=?, updated_at=?
+        WHERE status IN ('queued', 'running') AND updated_at < ?
+        """,
+        (STALE_JOB_MESSAGE, _now(), cutoff),
+    ).rowcount
+    conn.commit()
+    return n
+
+
+@retry_on_busy
+def _fail_stale_job(job_id: str) -> bool:
+    """Versi satu job dari fail_stale_jobs (dipanggil saat job di-poll)."""
+    conn = get_conn()
+    try:
+        n = conn.execute(
+            """
+            UPDATE jobs SET status='error', message=?, updated_at=?
+            WHERE id=? AND status IN ('queued', 'running') AND updated_at < ?
+            """,
+            (STALE_JOB_MESSAGE, _now(), job_id, _stale_cutoff()),
+        ).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return n > 0
+
+
+def _run(job_id: str, fn, args, kwargs):
+    try:
+        if not _update_job(job_id, only_status=("queued",), status="running"):
+            # sudah ditandai error (stale) selagi antre: jangan dijalankan
+            return
+        try:
+            result = fn(JobContext(job_id), *args, **kwargs) or {}
+            result_path = result.pop("file", None)
+            result_json = json.dumps(result, default=str)
+        except Exception as e:
+            traceback.print_exc()
+            _update_job(job_id, only_status=_OPEN_STATUSES, status="error", message=str(e))
+            return
+
+        if not _update_job(
+            job_id,
+            only_status=_OPEN_STATUSES,
+            status="done",
+            result_json=result_json,
+            result_path=result_path,
+        ):
+            # proses lain sudah menandai job ini stale: status tetap error
+            _update_job(
+                job_id,
+                only_status=("error",),
+                message=LATE_FINISH_MESSAGE,
+                result_json=result_json,
+                result_path=result_path,
+            )
+    finally:
+        with _active_lock:
+            _active_jobs.discard(job_id)
+
+
+def submit_job(kind: str, fn, *args, **kwargs) -> str:
+    """
+    Daftarkan job baru lalu jalankan di background.
+    fn(ctx, *args, **kwargs) -> dict hasil; key "file" = path file hasil (opsional).
+    """
+    job_id = uuid.uuid4().hex
+    _insert_job(job_id, kind)
+    with _active_lock:
+        _active_jobs.add(job_id)
+    _start_heartbeat()
+    _executor.submit(_run, job_id, fn, args, kwargs)
+    return job_id
+
+
+@retry_on_busy
+def _insert_job(job_id: str, kind: str):
+    now = _now()
+    conn = get_conn()
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+            (job_id, kind, now, now),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_job(job_id: str) -> dict | None:
+    conn = get_conn()
+    try:
+        row = conn.execute(
+            """
+            SELECT id, kind, status, progress_done, progress_total, message,
+                   result_json, result_path, created_at, updated_at
+            FROM jobs
+            WHERE id=?
+            """,
+            (job_id,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+    if not row:
+        return None
+    if row[2] in _OPEN_STATUSES and job_id not in _active_jobs and (row[9] or "") < _stale_cutoff():
+        # proses pemilik job mati sesudah start proses ini (crash / timeout worker);
+        # UPDATE bersyarat -- bisa saja job baru selesai / heartbeat barusan
+        _fail_stale_job(job_id)
+        return get_job(job_id)
+    return {
+        "id": row[0],
+        "kind": row[1],
+        "status": row[2],
+        "progress": {"done": row[3] or 0, "total": row[4] or 0},
+        "message": row[5] or "",
+        "result": json.loads(row[6]) if row[6] else None,
+        "result_path": row[7] or "",
+        "created_at": row[8] or "",
+        "updated_at": row[9] or "",
+    }
@@ -0,0 +1,389 @@
+# arkas/ledger.py
+from __future__ import annotations
+
+import math
+import numbers
+from datetime import date, datetime
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from .bpu_summary import rebuild_bpu_summary
+from .config import IMPORT_CHUNK_ROWS
+from .metrics import timed
+from .rekap import rebuild_rekap
+from .render_cache import invalidate_render_cache
+from .search import refresh_search_index
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# =========================================================
+# KOLOM LEDGER (BKU & BHP/BHM)
+# =========================================================
+BKU_COLUMNS = ["Tgl", "Keg", "Rek", "Bukti", "Uraian", "In", "Out", "Saldo"]
+BHP_COLUMNS = [
+    "Tanggal",
+    "Kode Kegiatan",
+    "Kode Rekening",
+    "No Bukti",
+    "ID Barang",
+    "Uraian",
+    "Jumlah Barang",
+    "Harga Satuan",
+    "Realisasi",
+    "Sumber Data",
+]
+
+# kolom turunan yang diisi saat import (dipakai filter & index)
+DERIVED_COLUMNS = {
+    "bku": [
+        ("tgl_iso", "TEXT"),
+        ("ym", "TEXT"),
+        ("bpu_seq", "INTEGER"),
+        ("in_amt", "INTEGER"),
+        ("out_amt", "INTEGER"),
+        ("saldo_amt", "INTEGER"),
+        ("row_ident", "TEXT"),
+        ("row_ord", "INTEGER"),
+    ],
+    "bhp_bhm": [
+        ("tgl_iso", "TEXT"),
+        ("ym", "TEXT"),
+        ("bpu_seq", "INTEGER"),
+        ("jumlah_amt", "INTEGER"),
+        ("harga_amt", "INTEGER"),
+        ("realisasi_amt", "INTEGER"),
+        ("row_ident", "TEXT"),
+        ("row_ord", "INTEGER"),
+    ],
+}
+
+LEDGER_INDEXES = {
+    "bku": [
+        ("idx_bku_bukti", "[Bukti]"),
+        ("idx_bku_tgl_iso", "tgl_iso"),
+        ("idx_bku_ym", "ym"),
+        ("idx_bku_bpu_seq", "bpu_seq"),
+    ],
+    "bhp_bhm": [
+        ("idx_bhp_no_bukti", "[No Bukti]"),
+        ("idx_bhp_tgl_iso", "tgl_iso"),
+        ("idx_bhp_ym", "ym"),
+    ],
+}
+
+# identitas transaksi untuk import "merge": (kolom..., urutan kemunculan)
+ROW_KEY_COLUMNS = {
+    "bku": ["Tgl", "Bukti", "Rek", "Uraian", "Out"],
+    "bhp_bhm": ["Tanggal", "No Bukti", "Kode Rekening", "ID Barang", "Uraian", "Realisasi"],
+}
+
+LEDGER_UNIQUE_INDEXES = {
+    "bku": ("ux_bku_row_key", "row_ident, row_ord"),
+    "bhp_bhm": ("ux_bhp_row_key", "row_ident, row_ord"),
+}
+
+IMPORT_MODES = ("append", "replace", "merge")
+
+
+# =========================================================
+# SQLITE EXPRESSIONS (support multiple formats)
+# =========================================================
+def _sqlite_date_expr(col: str) -> str:
+    """Return SQLite DATE() expression from text date in a column."""
+    c = f"TRIM(CAST({col} AS TEXT))"
+    return (
+        f"CASE "
+        f"WHEN {c} GLOB '????-??-??*' THEN date(substr({c},1,10)) "
+        f"WHEN {c} GLOB '??-??-????*' THEN date(substr({c},7,4)||'-'||substr({c},4,2)||'-'||substr({c},1,2)) "
+        f"WHEN {c} GLOB '??/??/????*' THEN date(substr({c},7,4)||'-'||substr({c},4,2)||'-'||substr({c},1,2)) "
+        f"ELSE NULL END"
+    )
+
+
+def _sqlite_ym_expr(col: str) -> str:
+    """Return YYYY-MM expression from a text date column."""
+    c = f"TRIM(CAST({col} AS TEXT))"
+    return (
+        f"CASE "
+        f"WHEN {c} GLOB '????-??-??*' THEN substr({c},1,7) "
+        f"WHEN {c} GLOB '??-??-????*' THEN (substr({c},7,4)||'-'||substr({c},4,2)) "
+        f"WHEN {c} GLOB '??/??/????*' THEN (substr({c},7,4)||'-'||substr({c},4,2)) "
+        f"ELSE '' END"
+    )
+
+
+def _sqlite_bpu_seq_expr(col: str) -> str:
+    """Nomor urut BPU (BPU12 -> 12), NULL untuk bukti non-BPU."""
+    c = f"TRIM(CAST({col} AS TEXT))"
+    return f"CASE WHEN {c} LIKE 'BPU%' THEN CAST(substr({c},4) AS INTEGER) ELSE NULL END"
+
+
+def _sqlite_int_expr(col: str) -> str:
+    return f"CAST(ROUND(COALESCE(CAST({col} AS REAL), 0)) AS INTEGER)"
+
+
+def _sqlite_row_ident_expr(table: str) -> str:
+    """
+    Identitas baris dari ROW_KEY_COLUMNS (tanpa urutan), dinormalisasi:
+    tanggal -> ISO, angka -> integer, teks di-TRIM, dipisah char(31).
+    """
+    parts = []
+    for col in ROW_KEY_COLUMNS[table]:
+        c = f"[{col}]"
+        if col in ("Tgl", "Tanggal"):
+            expr = f"COALESCE({_sqlite_date_expr(c)}, TRIM(CAST({c} AS TEXT)))"
+        elif col in ("Out", "Realisasi"):
+            expr = _sqlite_int_expr(c)
+        else:
+            expr = f"TRIM(CAST({c} AS TEXT))"
+        parts.append(f"COALESCE({expr}, '')")
+    return " || char(31) || ".join(parts)
+
+
+def _derived_set_sql(table: str) -> str:
+    if table == "bku":
+        return (
+            f"tgl_iso = {_sqlite_date_expr('[Tgl]')}, "
+            f"ym = {_sqlite_ym_expr('[Tgl]')}, "
+            f"bpu_seq = {_sqlite_bpu_seq_expr('[Bukti]')}, "
+            f"in_amt = {_sqlite_int_expr('[In]')}, "
+            f"out_amt = {_sqlite_int_expr('[Out]')}, "
+            f"saldo_amt = {_sqlite_int_expr('[Saldo]')}, "
+            f"row_ident = {_sqlite_row_ident_expr('bku')}, row_ord = NULL"
+        )
+    if table == "bhp_bhm":
+        return (
+            f"tgl_iso = {_sqlite_date_expr('[Tanggal]')}, "
+            f"ym = {_sqlite_ym_expr('[Tanggal]')}, "
+            f"bpu_seq = {_sqlite_bpu_seq_expr('[No Bukti]')}, "
+            f"jumlah_amt = {_sqlite_int_expr('[Jumlah Barang]')}, "
+            f"harga_amt = {_sqlite_int_expr('[Harga Satuan]')}, "
+            f"realisasi_amt = {_sqlite_int_expr('[Realisasi]')}, "
+            f"row_ident = {_sqlite_row_ident_expr('bhp_bhm')}, row_ord = NULL"
+        )
+    raise ValueError(f"Tabel ledger tidak dikenal: {table}")
+
+
+# =========================================================
+# SCHEMA + ISI KOLOM TURUNAN
+# =========================================================
+def ensure_ledger_schema(cur, table: str):
+    """Tambah kolom turunan + index (idempotent)."""
+    existing = [r[1] for r in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+    for col_name, col_type in DERIVED_COLUMNS[table]:
+        if col_name not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+    for idx_name, col in LEDGER_INDEXES[table]:
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {idx_name} ON {table}({col})")
+    idx_name, cols = LEDGER_UNIQUE_INDEXES[table]
+    cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {idx_name} ON {table}({cols})")
+
+
+def _assign_row_ord(cur, target: str, after_rowid: int = 0):
+    """
+    row_ord = urutan kemunculan baris dengan row_ident yang sama.
+    Baris baru (rowid > after_rowid) melanjutkan nomor terakhir baris lama,
+    jadi transaksi kembar yang memang ada di laporan tetap tersimpan semua.
+    """
+    cur.execute(
+        f"""
+        UPDATE {target} SET row_ord = n.ord
+        FROM (
+            SELECT
+                x.rowid AS rid,
+                ROW_NUMBER() OVER (PARTITION BY x.row_ident ORDER BY x.rowid)
+                + COALESCE((
+                    SELECT MAX(e.row_ord) FROM {target} e
+                    WHERE e.row_ident = x.row_ident AND e.rowid <= ?
+                ), 0) AS ord
+            FROM {target} x
+            WHERE x.rowid > ?
+        ) AS n
+        WHERE {target}.rowid = n.rid
+        """,
+        (int(after_rowid), int(after_rowid)),
+    )
+
+
+def refresh_derived_columns(cur, table: str, after_rowid: int = 0):
+    """Hitung ulang kolom turunan untuk baris dengan rowid > after_rowid."""
+    cur.execute(f"UPDATE {table} SET {_derived_set_sql(table)} WHERE rowid > ?", (int(after_rowid),))
+    _assign_row_ord(cur, table, after_rowid)
+
+
+def _cell(v):
+    """Normalisasi 1 sel sebelum disimpan (kosong -> NULL, 15000.0 -> 15000, tanggal -> ISO)."""
+    if v is None:
+        return None
+    if isinstance(v, str):
+        return v
+    if isinstance(v, bool):
+        return int(v)
+    if isinstance(v, numbers.Integral):
+        return int(v)
+    if isinstance(v, numbers.Real):
+        v = float(v)
+        if math.isnan(v):
+            return None
+        return int(v) if v.is_integer() else v
+    if isinstance(v, datetime):
+        return v.isoformat(" ")
+    if isinstance(v, date):
+        return v.isoformat()
+    return str(v)
+
+
+_STAGE_TABLE = "ledger_stage"
+
+
+def _merge_stage(cur, table: str) -> int:
+    """Staging -> tabel ledger, 1 statement set-based; return jumlah baris baru."""
+    stage = f"temp.{_STAGE_TABLE}"
+    cur.execute(f"UPDATE {stage} SET {_derived_set_sql(table)}")
+    _assign_row_ord(cur, stage)
+
+    cols = ", ".join(f"[{r[1]}]" for r in cur.execute(f"PRAGMA main.table_info({table})").fetchall())
+    cur.execute(f"INSERT OR IGNORE INTO main.{table} ({cols}) SELECT {cols} FROM {stage} ORDER BY rowid")
+    inserted = cur.rowcount
+    cur.execute(f"DROP TABLE {stage}")
+    return inserted
+
+
+def import_ledger_rows(
+    conn,
+    table: str,
+    columns: list[str],
+    rows,
+    mode: str = "append",
+    on_progress=None,
+) -> int:
+    """
+    Simpan baris (iterable of tuple, urutan = `columns`) ke tabel ledger.
+    - baris dibaca per potongan IMPORT_CHUNK_ROWS ke tabel staging TEMP
+      (executemany) dan di-commit per potongan: selama file dibaca arkas.db
+      tidak dikunci, dan on_progress (progress job, koneksi lain) bisa
+      menulis di antara potongan
+    - isi staging lalu dipindah ke tabel ledger dalam 1 transaksi
+      (BEGIN IMMEDIATE), jadi import tetap semua-atau-tidak-sama-sekali.
+      `conn` tidak boleh sedang di dalam transaksi.
+    - mode "replace" mengosongkan tabel; index ledger dibuat ulang setelah
+      semua baris masuk (lebih cepat daripada update index per baris)
+    - mode "merge" hanya memasukkan baris yang row key-nya
+      (row_ident, row_ord) belum ada -> import ulang periode yang sama
+      tidak menggandakan transaksi
+    - kolom turunan (tgl_iso, ym, bpu_seq, *_amt) langsung diisi
+    - bpu_summary ikut diperbarui (hanya BPU yang berubah kalau append)
+    - index full-text (FTS5) ikut diisi untuk baris baru
+    - rekap bulanan dihitung ulang untuk bulan yang tersentuh
+    - on_progress(jumlah_baris) dipanggil setiap 1 potongan di-commit
+    Return jumlah baris yang benar-benar masuk ke tabel.
+    """
+    if table not in LEDGER_INDEXES:
+        raise ValueError(f"Tabel ledger tidak dikenal: {table}")
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Mode import tidak dikenal: {mode}")
+
+    stage = f"temp.{_STAGE_TABLE}"
+    col_sql = ", ".join(f"[{c}]" for c in columns)
+    insert_sql = f"INSERT INTO {stage} ({col_sql}) VALUES ({', '.join('?' * len(columns))})"
+    rows = iter(rows)
+    total = 0
+
+    cur = conn.cursor()
+    try:
+        # 1) baca baris -> staging (database temp koneksi ini, bukan arkas.db)
+        cur.execute(f"DROP TABLE IF EXISTS {stage}")
+        cur.execute(f"CREATE TEMP TABLE {_STAGE_TABLE} AS SELECT * FROM main.{table} WHERE 0")
+        while True:
+            chunk = [tuple(_cell(v) for v in r) for r in islice(rows, IMPORT_CHUNK_ROWS)]
+            if not chunk:
+                break
+            cur.executemany(insert_sql, chunk)
+            conn.commit()
+            total += len(chunk)
+            if on_progress is not None:
+                on_progress(total)
+
+        # 2) staging -> tabel ledger + turunannya, 1 transaksi tulis
+        cur.execute("BEGIN IMMEDIATE")
+        if mode == "replace":
+            cur.execute(f"DELETE FROM {table}")
+            for idx_name, _col in [*LEDGER_INDEXES[table], LEDGER_UNIQUE_INDEXES[table]]:
+                cur.execute(f"DROP INDEX IF EXISTS {idx_name}")
+        start = cur.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+
+        if mode == "merge":
+            total = _merge_stage(cur, table)
+        else:
+            cur.execute(f"INSERT INTO main.{table} ({col_sql}) SELECT {col_sql} FROM {stage} ORDER BY rowid")
+            cur.execute(f"DROP TABLE {stage}")
+            refresh_derived_columns(cur, table, start)
+        if mode == "replace":
+            ensure_ledger_schema(cur, table)
+        if table == "bku":
+            rebuild_bpu_summary(cur, None if mode == "replace" else start)
+        refresh_search_index(cur, table, None if mode == "replace" else start)
+        rebuild_rekap(cur, table, None if mode == "replace" else start)
+
+        changed = None
+        if mode != "replace":
+            bukti = "[Bukti]" if table == "bku" else "[No Bukti]"
+            changed = [r[0] for r in cur.execute(f"SELECT DISTINCT {bukti} FROM {table} WHERE rowid > ?", (start,))]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        cur.execute(f"DROP TABLE IF EXISTS {stage}")
+        raise
+    invalidate_render_cache(changed)
+    return total
+
+
+def import_ledger_df(conn, table: str, df: pd.DataFrame, mode: str = "append") -> int:
+    """Simpan DataFrame BKU / BHP_BHM (hasil convert PDF) ke tabel ledger."""
+    cols = BKU_COLUMNS if table == "bku" else BHP_COLUMNS
+    cols = [c for c in cols if c in df.columns]
+    # NaN / NaT / pd.NA -> None di sini, jadi _cell tidak perlu kenal pandas
+    with timed("pandas_to_rows"):
+        df = df[cols].astype(object)
+        rows = df.where(df.notna(), None)
+    rows = rows.itertuples(index=False, name=None)
+    return import_ledger_rows(conn, table, cols, rows, mode)
+
+
+def import_ledger_xlsx(conn, table: str, path: str, sheet_name: str, mode: str = "append", on_progress=None) -> int:
+    """
+    Import 1 sheet workbook OUTPUT_ARKAS langsung dari file (openpyxl read_only),
+    baris dibaca bertahap jadi memori tetap kecil berapapun ukuran file.
+    Baris pertama = header; kolom yang tidak dikenal diabaikan, baris kosong dilewati.
+    """
+    from openpyxl import load_workbook
+
+    known = BKU_COLUMNS if table == "bku" else BHP_COLUMNS
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"sheet {sheet_name} tidak ada di workbook")
+        it = wb[sheet_name].iter_rows(values_only=True)
+        header = next(it, None) or ()
+
+        pos = {}
+        for i, h in enumerate(header):
+            name = "" if h is None else str(h)
+            if name in known and name not in pos:
+                pos[name] = i
+        cols = [c for c in known if c in pos]
+        if not cols:
+            raise ValueError(f"Sheet {sheet_name} tidak punya kolom {', '.join(known[:4])}, ...")
+        idx = [pos[c] for c in cols]
+
+        def _rows():
+            for r in it:
+                vals = tuple(r[i] if i < len(r) else None for i in idx)
+                if any(v is not None and v != "" for v in vals):
+                    yield vals
+
+        return import_ledger_rows(conn, table, cols, _rows(), mode, on_progress)
+    finally:
+        wb.close()
@@ -0,0 +1,354 @@
+# arkas/metrics.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Blueprint, Response, before_render_template, g, has_app_context, request, template_rendered
+
+from .config import METRICS_ENABLED, PROFILE_DIR, PROFILE_ENABLED, PROFILE_HEADER, SLOW_REQUEST_MS
+from .db import PooledConnection
+
+
+log = logging.getLogger("arkas.metrics")
+
+
+# =========================================================
+# INSTRUMENTASI (opt-in: METRICS_ENABLED di config)
+#  - waktu + jumlah baris tiap query (koneksi dari get_conn)
+#  - waktu per bagian: render template, PDF, pandas (timed / timed_section)
+#  - log request lambat (> SLOW_REQUEST_MS) beserta rinciannya
+#  - /metrics format teks Prometheus (angka per proses worker)
+#  - profil cProfile / pyinstrument per request lewat header PROFILE_HEADER
+#    (opt-in terpisah: PROFILE_ENABLED)
+# =========================================================
+_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_METRICS = {
+    "arkas_http_requests_total": ("counter", "Jumlah request per endpoint, method, status"),
+    "arkas_http_request_seconds": ("histogram", "Durasi request per endpoint"),
+    "arkas_http_slow_requests_total": ("counter", "Jumlah request lebih lambat dari SLOW_REQUEST_MS"),
+    "arkas_sql_queries_total": ("counter", "Jumlah query SQL per jenis statement"),
+    "arkas_sql_seconds": ("histogram", "Durasi execute query SQL per jenis statement"),
+    "arkas_sql_rows_total": ("counter", "Jumlah baris yang di-fetch / diubah query SQL"),
+    "arkas_section_seconds": ("histogram", "Durasi bagian kerja (template, pdf, pandas, ...)"),
+}
+
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict = {}
+        self._hists: dict = {}
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1):
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: tuple, seconds: float):
+        with self._lock:
+            h = self._hists.get((name, labels))
+            if h is None:
+                h = self._hists[(name, labels)] = [[0] * len(_BUCKETS), 0.0, 0]
+            for i, le in enumerate(_BUCKETS):
+                if seconds <= le:
+                    h[0][i] += 1
+            h[1] += seconds
+            h[2] += 1
+
+    def render(self) -> str:
+        def fmt_labels(labels, extra=()):
+            items = [*labels, *extra]
+            if not items:
+                return ""
+            esc = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in items]
+            return "{" + ",".join(f'{k}="{v}"' for k, v in esc) + "}"
+
+        with self._lock:
+            counters = dict(self._counters)
+            hists = {k: (list(v[0]), v[1], v[2]) for k, v in self._hists.items()}
+
+        lines = []
+        for name, (kind, help_text) in _METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (n, labels), v in sorted(counters.items()):
+                    if n == name:
+                        lines.append(f"{name}{fmt_labels(labels)} {v}")
+            else:
+                for (n, labels), (buckets, total, count) in sorted(hists.items()):
+                    if n != name:
+                        continue
+                    for le, c in zip(_BUCKETS, buckets):
+                        lines.append(f"{name}_bucket{fmt_labels(labels, (('le', le),))} {c}")
+                    lines.append(f"{name}_bucket{fmt_labels(labels, (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{fmt_labels(labels)} {total:.6f}")
+                    lines.append(f"{name}_count{fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = _Registry()
+
+
+def _trace() -> dict | None:
+    """Rincian request yang sedang berjalan (None di luar request / instrumentasi mati)."""
+    if not has_app_context():
+        return None
+    return g.get("_arkas_trace")
+
+
+# =========================================================
+# SQL: koneksi + cursor yang mencatat waktu & jumlah baris
+# =========================================================
+def _sql_kind(sql: str) -> str:
+    word = sql.lstrip().split(None, 1)[0].upper() if sql and sql.strip() else ""
+    return word if word in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "PRAGMA", "CREATE") else "OTHER"
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Catat durasi execute + baris; waktu & baris fetch ditambahkan ke query yang sama."""
+
+    _arkas_q = None
+
+    def _record(self, sql: str, seconds: float):
+        kind = _sql_kind(sql)
+        REGISTRY.inc("arkas_sql_queries_total", (("kind", kind),))
+        REGISTRY.observe("arkas_sql_seconds", (("kind", kind),), seconds)
+        changed = self.rowcount if self.rowcount > 0 else 0
+        if changed:
+            REGISTRY.inc("arkas_sql_rows_total", (("kind", kind),), changed)
+
+        tr = _trace()
+        if tr is not None:
+            tr["sql_count"] += 1
+            tr["sql_seconds"] += seconds
+            q = {"sql": " ".join(sql.split())[:300], "seconds": seconds, "rows": changed}
+            if len(tr["queries"]) < 500:
+                tr["queries"].append(q)
+            self._arkas_q = q
+
+    def _fetched(self, n: int, seconds: float):
+        if n:
+            REGISTRY.inc("arkas_sql_rows_total", (("kind", "SELECT"),), n)
+        tr = _trace()
+        if tr is not None:
+            tr["sql_seconds"] += seconds
+            tr["sql_rows"] += n
+            if self._arkas_q is not None:
+                self._arkas_q["seconds"] += seconds
+                self._arkas_q["rows"] += n
+
+    def execute(self, sql, *args):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            self._record(sql, time.perf_counter() - t0)
+
+    def executemany(self, sql, *args):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            self._record(sql, time.perf_counter() - t0)
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, time.perf_counter() - t0)
+        return row
+
+    def fetchmany(self, *args):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(*args)
+        self._fetched(len(rows), time.perf_counter() - t0)
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), time.perf_counter() - t0)
+        return rows
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        row = super().__next__()  # StopIteration diteruskan apa adanya
+        self._fetched(1, time.perf_counter() - t0)
+        return row
+
+
+class InstrumentedConnection(PooledConnection):
+    """Dipakai db._connect kalau METRICS_ENABLED: semua query lewat TimedCursor."""
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TimedCursor)
+
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+
+# =========================================================
+# BAGIAN KERJA: template, PDF, pandas, ...
+# =========================================================
+def _add_section(name: str, seconds: float):
+    REGISTRY.observe("arkas_section_seconds", (("section", name),), seconds)
+    tr = _trace()
+    if tr is not None:
+        tr["sections"][name] = tr["sections"].get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(name: str):
+    """with timed("pdf_bast"): ... -> masuk histogram + rincian request (kalau aktif)."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add_section(name, time.perf_counter() - t0)
+
+
+def timed_section(name: str):
+    """Decorator versi timed()."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def _before_render(sender, template, context, **extra):
+    g.setdefault("_arkas_tpl", []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    stack = g.get("_arkas_tpl")
+    if stack:
+        _add_section("template", time.perf_counter() - stack.pop())
+
+
+# =========================================================
+# HOOK REQUEST: durasi, log request lambat, profil opsional
+# =========================================================
+def _start_request():
+    g._arkas_trace = {
+        "t0": time.perf_counter(),
+        "sql_count": 0,
+        "sql_seconds": 0.0,
+        "sql_rows": 0,
+        "sections": {},
+        "queries": [],
+    }
+
+
+def _start_profile():
+    mode = (request.headers.get(PROFILE_HEADER) or "").strip().lower()
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            mode = "cprofile"
+        else:
+            g._arkas_prof = ("pyinstrument", Profiler())
+            g._arkas_prof[1].start()
+            return
+    if mode:
+        import cProfile
+
+        g._arkas_prof = ("cprofile", cProfile.Profile())
+        g._arkas_prof[1].enable()
+
+
+def _finish_profile(response):
+    if g.get("_arkas_prof") is None:
+        return response
+    kind, prof = g.pop("_arkas_prof")
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() // 1_000_000 % 1000:03d}_{request.endpoint or 'none'}_{os.getpid()}"
+    if kind == "pyinstrument":
+        prof.stop()
+        name = f"{stem}.html"
+        with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+            f.write(prof.output_html())
+    else:
+        prof.disable()
+        name = f"{stem}.prof"
+        prof.dump_stats(os.path.join(PROFILE_DIR, name))  # buka: python -m pstats / snakeviz
+    response.headers["X-Arkas-Profile-File"] = name
+    return response
+
+
+def _finish_request(response):
+    tr = g.pop("_arkas_trace", None)
+    if tr is None:
+        return response
+
+    seconds = time.perf_counter() - tr["t0"]
+    endpoint = request.endpoint or "none"
+    REGISTRY.inc(
+        "arkas_http_requests_total",
+        (("endpoint", endpoint), ("method", request.method), ("status", str(response.status_code))),
+    )
+    REGISTRY.observe("arkas_http_request_seconds", (("endpoint", endpoint),), seconds)
+
+    if seconds * 1000 >= SLOW_REQUEST_MS:
+        REGISTRY.inc("arkas_http_slow_requests_total", (("endpoint", endpoint),))
+        slowest = sorted(tr["queries"], key=lambda q: q["seconds"], reverse=True)[:5]
+        log.warning(
+            "slow request %s",
+            json.dumps({
+                "method": request.method,
+                "path": request.full_path.rstrip("?"),
+                "endpoint": endpoint,
+                "status": response.status_code,
+                "ms": round(seconds * 1000, 1),
+                "sql_count": tr["sql_count"],
+                "sql_ms": round(tr["sql_seconds"] * 1000, 1),
+                "sql_rows": tr["sql_rows"],
+                "sections_ms": {k: round(v * 1000, 1) for k, v in tr["sections"].items()},
+                "slowest_sql": [
+                    {"ms": round(q["seconds"] * 1000, 2), "rows": q["rows"], "sql": q["sql"]} for q in slowest
+                ],
+            }, ensure_ascii=False),
+        )
+    return response
+
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.route("/metrics")
+def metrics_endpoint():
+    return Response(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_app(app):
+    """
+    Pasang hook + /metrics kalau METRICS_ENABLED, dan hook profil per
+    request kalau PROFILE_ENABLED (keduanya bisa aktif sendiri-sendiri).
+    """
+    if METRICS_ENABLED:
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+        app.register_blueprint(bp)
+    if PROFILE_ENABLED:
+        # after_request dijalankan terbalik: profil ditutup sebelum metrik dicatat
+        app.before_request(_start_profile)
+        app.after_request(_finish_profile)
@@ -0,0 +1,197 @@
+# arkas/pdf_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+
+from .config import PDF_CACHE_DB, PDF_CACHE_MAX_BYTES
+
+
+# =========================================================
+# CACHE HASIL EKSTRAK PDF (SQLite terpisah, blob zlib+json)
+#  - "page:<sha>" -> tabel mentah satu halaman (sha: lihat page_sha256)
+#  - "file:<sha>" -> daftar key halaman untuk satu file
+# LRU berdasarkan last_used, dibatasi PDF_CACHE_MAX_BYTES.
+# =========================================================
+def _connect():
+    conn = sqlite3.connect(PDF_CACHE_DB, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_cache (
+            key TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pdf_cache_last_used ON pdf_cache(last_used)")
+    return conn
+
+
+# SHA-256 yang sudah dihitung saat upload di-stream ke disk (arkas.uploads):
+# path -> (ukuran, mtime_ns, sha). Dipakai file_sha256 selama file belum
+# berubah, jadi file upload tidak dibaca ulang hanya untuk key cache.
+_KNOWN_SHA: "OrderedDict[str, tuple[int, int, str]]" = OrderedDict()
+_KNOWN_SHA_MAX = 256
+
+
+def remember_sha256(path: str, digest: str):
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    _KNOWN_SHA[key] = (st.st_size, st.st_mtime_ns, digest)
+    _KNOWN_SHA.move_to_end(key)
+    while len(_KNOWN_SHA) > _KNOWN_SHA_MAX:
+        _KNOWN_SHA.popitem(last=False)
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    known = _KNOWN_SHA.get(os.path.abspath(path))
+    if known is not None:
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime_ns) == known[:2]:
+            return known[2]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _obj_digest(obj, memo: dict, busy: set) -> bytes:
+    """
+    Digest objek PDF beserta semua yang dirujuknya (dict, array, stream,
+    referensi). Hasil per objek ber-nomor disimpan di memo, jadi font /
+    XObject yang dipakai banyak halaman hanya di-decode sekali per file.
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    h = hashlib.sha256()
+    if isinstance(obj, PDFObjRef):
+        objid = obj.objid
+        if objid in memo:
+            return memo[objid]
+        if objid in busy:
+            # referensi melingkar (mis. Form XObject yang memuat dirinya sendiri)
+            return b"cycle"
+        busy.add(objid)
+        try:
+            digest = _obj_digest(obj.resolve(), memo, busy)
+        finally:
+            busy.discard(objid)
+        memo[objid] = digest
+        return digest
+
+    if isinstance(obj, PDFStream):
+        h.update(b"S")
+        h.update(_obj_digest(obj.attrs, memo, busy))
+        try:
+            h.update(obj.get_data())
+        except Exception:
+            h.update(obj.get_rawdata() or b"")
+    elif isinstance(obj, dict):
+        h.update(b"D")
+        for k in sorted(obj, key=str):
+            h.update(repr(k).encode())
+            h.update(_obj_digest(obj[k], memo, busy))
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"A")
+        for v in obj:
+            h.update(_obj_digest(v, memo, busy))
+    else:
+        h.update(repr(obj).encode())
+    return h.digest()
+
+
+def page_sha256(page, memo: dict | None = None) -> str:
+    """
+    Sidik jari satu halaman pdfplumber: ukuran + content stream + /Resources
+    yang sudah di-resolve (font beserta ToUnicode / file font, XObject dan
+    resource di dalamnya). Content stream saja tidak cukup: "/Fm1 Do" atau
+    glyph ID font subset yang sama bisa berarti isi halaman yang berbeda.
+    memo: dict bersama untuk semua halaman dari file yang sama.
+    """
+    memo = {} if memo is None else memo
+    page_obj = page.page_obj
+    h = hashlib.sha256()
+    h.update(f"{page.width}x{page.height}:{page_obj.mediabox}:{page_obj.rotate}".encode())
+    h.update(_obj_digest(page_obj.attrs.get("Contents"), memo, set()))
+    h.update(_obj_digest(page_obj.resources, memo, set()))
+    return h.hexdigest()
+
+
+def cache_get_many(keys: list[str]) -> dict:
+    """Return {key: value} untuk key yang ada di cache (sekaligus tandai last_used)."""
+    keys = [k for k in keys if k]
+    if not keys:
+        return {}
+
+    out = {}
+    conn = _connect()
+    try:
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            rows = conn.execute(
+                f"SELECT key, data FROM pdf_cache WHERE key IN ({','.join('?' * len(part))})",
+                part,
+            ).fetchall()
+            for k, data in rows:
+                out[k] = json.loads(zlib.decompress(data))
+        if out:
+            now = time.time()
+            conn.executemany("UPDATE pdf_cache SET last_used=? WHERE key=?", [(now, k) for k in out])
+            conn.commit()
+    finally:
+        conn.close()
+    return out
+
+
+def cache_put_many(items: dict):
+    if not items:
+        return
+
+    now = time.time()
+    rows = []
+    for k, v in items.items():
+        data = zlib.compress(json.dumps(v).encode("utf-8"), 6)
+        rows.append((k, data, len(data), now))
+
+    conn = _connect()
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO pdf_cache (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        _evict(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _evict(conn):
+    total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_cache").fetchone()[0])
+    if total <= PDF_CACHE_MAX_BYTES:
+        return
+
+    doomed = []
+    for key, size in conn.execute("SELECT key, size FROM pdf_cache ORDER BY last_used ASC"):
+        doomed.append((key,))
+        total -= int(size)
+        if total <= PDF_CACHE_MAX_BYTES:
+            break
+    conn.executemany("DELETE FROM pdf_cache WHERE key=?", doomed)
+
+
+def clear_cache():
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM pdf_cache")
+        conn.commit()
+    finally:
+        conn.close()
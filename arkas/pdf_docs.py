@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import functools
 import os
-import pandas as pd
+import threading
+from functools import lru_cache
 # Gunakan Pillow (PIL) sebagai pendukung ReportLab untuk pemrosesan gambar
 from io import BytesIO
 
@@ -11,13 +13,51 @@ from reportlab.platypus import (
     SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer,
     Image, PageBreak
 )
+from reportlab import rl_config
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 
 from .config import STATIC_PHOTO_DIR
 from .settings import get_settings
 from .bpu_override import get_bpu_override, list_bpu_photos
+from .queries import as_float
+from .metrics import timed_section
+
+# =========================================================
+# STREAM PDF TANPA ASCII85
+# Cukup Flate: ASCII85 hanya menambah ~25% ukuran dan encoder python-nya
+# (tanpa rl_accel) cukup berat saat export massal. rl_config.useA85 global
+# untuk seluruh proses (tidak ada opsi per dokumen), jadi hanya dimatikan
+# selama dokumen ARKAS dirender lalu dikembalikan. Dihitung per render
+# aktif: render paralel (thread lain) tidak mengembalikannya di tengah
+# dokumen yang masih dibangun.
+# =========================================================
+_a85_lock = threading.Lock()
+_a85_active = 0
+_a85_saved = None
+
+
+def _tanpa_a85(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _a85_active, _a85_saved
+        with _a85_lock:
+            if _a85_active == 0:
+                _a85_saved = rl_config.useA85
+                rl_config.useA85 = 0
+            _a85_active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with _a85_lock:
+                _a85_active -= 1
+                if _a85_active == 0:
+                    rl_config.useA85 = _a85_saved
+
+    return wrapper
 
 
 # =========================================================
@@ -64,8 +104,10 @@ def terbilang(n: int) -> str:
 # =========================================================
 # BKP / KWITANSI (LANDSCAPE)
 # =========================================================
-def buat_pdf_kwitansi(bpu: str, data: dict) -> bytes:
-    settings = get_settings()
+@timed_section("pdf_bkp")
+@_tanpa_a85
+def buat_pdf_kwitansi(bpu: str, data: dict, settings: dict | None = None) -> bytes:
+    settings = get_settings() if settings is None else settings
 
     buf = BytesIO()
     c = canvas.Canvas(buf, pagesize=landscape(A4))
@@ -232,8 +274,304 @@ def buat_pdf_kwitansi(bpu: str, data: dict) -> bytes:
 # =========================================================
 # BAST (A4) + LAMPIRAN FOTO
 # =========================================================
-def buat_pdf_bast(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> bytes:
-    settings = get_settings()
+@lru_cache(maxsize=1)
+def _bast_styles() -> dict:
+    """Style paragraf BAST (dibuat sekali per proses)."""
+    styles = getSampleStyleSheet()
+    style_cell = ParagraphStyle("cell", parent=styles["Normal"], fontName="Helvetica", fontSize=9, leading=11, wordWrap="CJK")
+    return {
+        "school": ParagraphStyle("school", parent=styles["Normal"], fontName="Helvetica-Bold", fontSize=12, alignment=1, spaceAfter=2),
+        "meta": ParagraphStyle("meta", parent=styles["Normal"], fontName="Helvetica", fontSize=9, leading=11, alignment=1, spaceAfter=2),
+        "title": ParagraphStyle("title", parent=styles["Title"], fontName="Helvetica-Bold", fontSize=12, alignment=1, spaceAfter=6),
+        "body": ParagraphStyle("body", parent=styles["Normal"], fontName="Helvetica", fontSize=9.5, leading=12, alignment=0, spaceAfter=6),
+        "kv": ParagraphStyle("kv", parent=styles["Normal"], fontName="Helvetica", fontSize=9.5, leading=12, alignment=0),
+        "cell": style_cell,
+        "cell_bold": ParagraphStyle("cellb", parent=style_cell, fontName="Helvetica-Bold"),
+        "ttd": ParagraphStyle("ttd", parent=styles["Normal"], fontName="Helvetica", fontSize=10, leading=12, alignment=1),
+    }
+
+
+def _records(rows) -> list:
+    """Baris sqlite3.Row / dict; DataFrame (API lama) diubah jadi list dict."""
+    if rows is None:
+        return []
+    if hasattr(rows, "to_dict"):
+        return rows.to_dict(orient="records")
+    return list(rows)
+
+
+def _col(row, key: str, default=""):
+    return row[key] if key in row.keys() else default
+
+
+def _bast_items(bku_rows: list, detail_rows: list) -> list[dict]:
+    """Baris tabel rincian BAST: dari BHP/BHM kalau ada, fallback uraian BKU."""
+    items = []
+    if detail_rows:
+        for i, r in enumerate(detail_rows, start=1):
+            q = int(as_float(_col(r, "Jumlah Barang", 0)))
+            items.append({"no": i, "barang": str(_col(r, "Uraian")), "dipesan": q, "baik": q, "rusak": 0})
+    else:
+        for i, r in enumerate(bku_rows, start=1):
+            items.append({"no": i, "barang": str(_col(r, "Uraian")), "dipesan": "", "baik": "", "rusak": ""})
+    return items
+
+
+# =========================================================
+# BAST JALUR CEPAT: gambar langsung di canvas (tanpa platypus)
+# Layout mengikuti versi platypus di bawah. Return None kalau
+# halaman 1 tidak muat (tabel rincian panjang) -> fallback platypus.
+# =========================================================
+@lru_cache(maxsize=8192)
+def _sw(text: str, font: str, size: float) -> float:
+    """stringWidth dengan cache (kata yang sama muncul berulang di export massal)."""
+    return stringWidth(text, font, size)
+
+
+def _wrap(text, font: str, size: float, max_w: float) -> list[str]:
+    """Pecah teks per kata agar muat max_w; kata yang terlalu panjang dipotong per huruf."""
+    words = str("" if text is None else text).split()
+    if not words:
+        return [""]
+    space = _sw(" ", font, size)
+    lines, cur, cur_w = [], "", 0.0
+    for wd in words:
+        wd_w = _sw(wd, font, size)
+        if cur and cur_w + space + wd_w <= max_w:
+            cur, cur_w = f"{cur} {wd}", cur_w + space + wd_w
+            continue
+        if cur:
+            lines.append(cur)
+        while wd_w > max_w and len(wd) > 1:
+            n = len(wd) - 1
+            while n > 1 and _sw(wd[:n], font, size) > max_w:
+                n -= 1
+            lines.append(wd[:n])
+            wd = wd[n:]
+            wd_w = _sw(wd, font, size)
+        cur, cur_w = wd, wd_w
+    lines.append(cur)
+    return lines
+
+
+def _buat_pdf_bast_canvas(bpu: str, f: dict, items: list[dict], photos: list[dict]) -> bytes | None:
+    w, h = A4
+    # frame SimpleDocTemplate: margin + padding 6pt
+    x0 = 1.5 * cm + 6
+    avail_w = w - 3.0 * cm - 12
+    top = h - 1.2 * cm - 6
+    bottom = 1.2 * cm + 6
+    xc = x0 + avail_w / 2
+
+    # ---- ukur dulu: tabel rincian + semua teks harus muat di halaman 1
+    item_cols = [1.0 * cm, 8.0 * cm, 3.0 * cm, 3.0 * cm, 3.0 * cm]
+    item_x = xc - sum(item_cols) / 2
+    head = ["No", "Barang/Jasa", "Jumlah Dipesan", "Jumlah Diterima Kondisi Baik", "Jumlah Diterima Kondisi Rusak"]
+    rows = [[_wrap(t, "Helvetica-Bold", 9, cw - 12) for t, cw in zip(head, item_cols)]]
+    for it in items:
+        vals = [it["no"], it["barang"], it["dipesan"], it["baik"], it["rusak"]]
+        rows.append([_wrap(v, "Helvetica", 9, cw - 12) for v, cw in zip(vals, item_cols)])
+    row_h = [max(len(c) for c in r) * 11 + 8 for r in rows]
+
+    kv_cols = [0.7 * cm, 4.2 * cm, 0.5 * cm, 11.6 * cm]
+    kv_x = xc - sum(kv_cols) / 2
+    pihak = [
+        ("1.", "PIHAK PERTAMA (Menyerahkan)", [
+            ("Nama", f["p1_nama"]), ("Jabatan", f["p1_jabatan"]), ("Nama Perusahaan", f["p1_perusahaan"]),
+            ("Alamat Perusahaan", f["p1_alamat"]), ("No. Telepon", f["p1_telp"]),
+        ]),
+        ("2.", "PIHAK KEDUA (Menerima)", [
+            ("Nama", f["p2_nama"]), ("Jabatan", f["p2_jabatan"]), ("Nama Satdik", f["p2_satdik"]),
+            ("Alamat Satdik", f["p2_alamat"]), ("No. Telepon", f["p2_telp"]),
+        ]),
+    ]
+    kv_lines = [
+        [(_wrap(lab, "Helvetica", 9.5, kv_cols[1]), _wrap(val, "Helvetica-Bold", 9.5, kv_cols[3])) for lab, val in kv]
+        for _, _, kv in pihak
+    ]
+
+    intro = _wrap(
+        "PIHAK PERTAMA menyerahkan hasil pekerjaan Pengadaan Barang/Jasa melalui mitra "
+        f"{f['p1_perusahaan']} kepada PIHAK KEDUA, dan PIHAK KEDUA telah menerima hasil pekerjaan tersebut "
+        "dalam jumlah yang lengkap dan kondisi yang baik sesuai dengan rincian berikut:",
+        "Helvetica", 9.5, avail_w,
+    )
+    closing = _wrap(
+        "Berita Acara Serah Terima ini berfungsi sebagai bukti serah terima hasil pekerjaan kepada PIHAK KEDUA, "
+        "untuk selanjutnya dicatat pada buku penerimaan barang sekolah. Demikian Berita Acara Serah Terima ini "
+        "dibuat dengan sebenarnya untuk dipergunakan sebagaimana seharusnya.",
+        "Helvetica", 9.5, avail_w,
+    )
+    school = _wrap(f["nama_sekolah"] or "—", "Helvetica-Bold", 12, avail_w)
+    meta = _wrap(f"NPSN: {f['npsn'] or '-'} • {f['alamat'] or '-'} • {f['kab_kota'] or '-'}", "Helvetica", 9, avail_w)
+
+    kv_h = sum(max(len(a), len(b)) * 12 + 2 for blk in kv_lines for a, b in blk) + 2 * 14 + 14
+    needed = (
+        len(school) * 12 + 2 + len(meta) * 11 + 2 + 22 + 6 + 11 + 2 + 8
+        + 12 + 6 + kv_h + 6 + len(intro) * 12 + 6 + 6
+        + sum(row_h) + 10 + len(closing) * 12 + 6 + 14
+        + 16 * 6 + 28
+    )
+    if needed > top - bottom:
+        return None
+
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    c.setTitle(f"BAST {bpu}")
+    y = top
+
+    def center_lines(lines, font, size, leading, space_after):
+        nonlocal y
+        c.setFont(font, size)
+        for i, li in enumerate(lines):
+            c.drawCentredString(xc, y - size - i * leading, li)
+        y -= len(lines) * leading + space_after
+
+    def body_lines(lines, space_after):
+        nonlocal y
+        c.setFont("Helvetica", 9.5)
+        for i, li in enumerate(lines):
+            c.drawString(x0, y - 9.5 - i * 12, li)
+        y -= len(lines) * 12 + space_after
+
+    # ---- kop + judul
+    center_lines(school, "Helvetica-Bold", 12, 12, 2)
+    center_lines(meta, "Helvetica", 9, 11, 2)
+    center_lines(["BERITA ACARA SERAH TERIMA (BAST)"], "Helvetica-Bold", 12, 22, 6)
+
+    c.setFont("Helvetica", 9)
+    parts = [("Nomor BPU: ", "Helvetica"), (bpu, "Helvetica-Bold"), ("   Tahun: ", "Helvetica"), (f["tahun"] or "-", "Helvetica-Bold")]
+    xx = xc - sum(_sw(t, fn, 9) for t, fn in parts) / 2
+    for t, fn in parts:
+        c.setFont(fn, 9)
+        c.drawString(xx, y - 9, t)
+        xx += _sw(t, fn, 9)
+    y -= 11 + 2 + 8
+
+    body_lines(["Kami yang tercantum di bawah ini:"], 6)
+
+    # ---- tabel pihak
+    for bi, ((no, judul, _), blk) in enumerate(zip(pihak, kv_lines)):
+        if bi:
+            y -= 14  # baris Spacer(1, 6) di tabel platypus
+        c.setFont("Helvetica-Bold", 9.5)
+        c.drawString(kv_x, y - 1 - 9.5, no)
+        c.drawString(kv_x + kv_cols[0], y - 1 - 9.5, judul)
+        y -= 14
+        for lab, val in blk:
+            by = y - 1 - 9.5
+            c.setFont("Helvetica", 9.5)
+            for i, li in enumerate(lab):
+                c.drawString(kv_x + kv_cols[0], by - i * 12, li)
+            c.drawString(kv_x + kv_cols[0] + kv_cols[1], by, ":")
+            c.setFont("Helvetica-Bold", 9.5)
+            for i, li in enumerate(val):
+                c.drawString(kv_x + sum(kv_cols[:3]), by - i * 12, li)
+            y -= max(len(lab), len(val)) * 12 + 2
+    y -= 6
+
+    body_lines(intro, 6)
+    y -= 6
+
+    # ---- tabel rincian
+    tbl_top = y
+    c.setLineWidth(0.5)
+    c.setFillColor(colors.lightgrey)
+    c.rect(item_x, y - row_h[0], sum(item_cols), row_h[0], stroke=0, fill=1)
+    c.setFillColor(colors.black)
+    for ri, (cells, rh) in enumerate(zip(rows, row_h)):
+        xx = item_x
+        c.setFont("Helvetica-Bold" if ri == 0 else "Helvetica", 9)
+        for lines, cw in zip(cells, item_cols):
+            for i, li in enumerate(lines):
+                c.drawString(xx + 6, y - 4 - 9 - i * 11, li)
+            xx += cw
+        y -= rh
+        c.line(item_x, y, item_x + sum(item_cols), y)
+    c.line(item_x, tbl_top, item_x + sum(item_cols), tbl_top)
+    xx = item_x
+    for cw in [0.0, *item_cols]:
+        xx += cw
+        c.line(xx, tbl_top, xx, y)
+    y -= 10
+
+    body_lines(closing, 6)
+    y -= 14
+
+    # ---- tanda tangan (2 kolom 9 cm, baris 16pt, nama 28pt)
+    ttd_x = xc - 9.0 * cm
+    col_c = [ttd_x + 4.5 * cm, ttd_x + 13.5 * cm]
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(xc, y - 8 - 3.5, f"{f['tempat_ttd']}, {f['tgl_ttd'] or '....................'}")
+    y -= 32
+    c.setFont("Helvetica-Bold", 10)
+    c.drawCentredString(col_c[0], y - 8 - 3.5, "PIHAK PERTAMA")
+    c.drawCentredString(col_c[1], y - 8 - 3.5, "PIHAK KEDUA")
+    y -= 16 * 4
+    for cx, nama, jab in ((col_c[0], f["p1_nama"], f["p1_jabatan"]), (col_c[1], f["p2_nama"], f["p2_jabatan"])):
+        c.setFont("Helvetica-Bold", 10)
+        nw = _sw(nama, "Helvetica-Bold", 10)
+        c.drawCentredString(cx, y - 2 - 10, nama)
+        c.line(cx - nw / 2, y - 2 - 10 - 1.5, cx + nw / 2, y - 2 - 10 - 1.5)
+        c.setFont("Helvetica", 10)
+        c.drawCentredString(cx, y - 2 - 10 - 12, jab)
+
+    # ---- lampiran foto (1 foto bisa 1 halaman penuh)
+    first = True
+    for ph in photos:
+        fn = ph.get("filename") or ""
+        img_path = os.path.join(STATIC_PHOTO_DIR, ph.get("print_filename") or fn)
+        if not fn or not os.path.exists(img_path):
+            continue
+
+        try:
+            img = ImageReader(img_path)
+            iw, ih = img.getSize()
+            scale = min(16.0 * cm / iw, 22.0 * cm / ih)
+            dw, dh = iw * scale, ih * scale
+        except Exception:
+            img, dw, dh = None, 0, 12
+
+        if first:
+            c.showPage()
+            y = top
+            center_lines([f"DOKUMENTASI FOTO BARANG - {bpu}"], "Helvetica-Bold", 12, 22, 6)
+            y -= 8
+            first = False
+        elif y - (11 + 4 + dh) < bottom:
+            c.showPage()
+            y = top
+
+        c.setFont("Helvetica", 9)
+        c.drawCentredString(xc, y - 9, f"Foto: {fn}")
+        y -= 11 + 2 + 4
+        if img is None:
+            body_lines(["(Gagal memuat gambar)"], 6)
+        else:
+            c.drawImage(img, xc - dw / 2, y - dh, dw, dh)
+            y -= dh
+        y -= 10
+
+    c.showPage()
+    c.save()
+    pdf = buf.getvalue()
+    buf.close()
+    return pdf
+
+
+@timed_section("pdf_bast")
+@_tanpa_a85
+def buat_pdf_bast(
+    bpu: str,
+    bku_rows,
+    detail_rows,
+    settings: dict | None = None,
+    fast: bool = True,
+) -> bytes:
+    """bku_rows / detail_rows: hasil get_bpu_bku_rows / get_bpu_bhp_detail."""
+    settings = get_settings() if settings is None else settings
+    bku_rows = _records(bku_rows)
+    detail_rows = _records(detail_rows)
     ov = get_bpu_override(bpu)
     photos = list_bpu_photos(bpu)
 
@@ -248,15 +586,14 @@ def buat_pdf_bast(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> by
         title=f"BAST {bpu}",
     )
 
-    styles = getSampleStyleSheet()
-
-    style_school = ParagraphStyle("school", parent=styles["Normal"], fontName="Helvetica-Bold", fontSize=12, alignment=1, spaceAfter=2)
-    style_meta = ParagraphStyle("meta", parent=styles["Normal"], fontName="Helvetica", fontSize=9, leading=11, alignment=1, spaceAfter=2)
-    style_title = ParagraphStyle("title", parent=styles["Title"], fontName="Helvetica-Bold", fontSize=12, alignment=1, spaceAfter=6)
-    style_body = ParagraphStyle("body", parent=styles["Normal"], fontName="Helvetica", fontSize=9.5, leading=12, alignment=0, spaceAfter=6)
-    style_kv = ParagraphStyle("kv", parent=styles["Normal"], fontName="Helvetica", fontSize=9.5, leading=12, alignment=0)
-    style_cell = ParagraphStyle("cell", parent=styles["Normal"], fontName="Helvetica", fontSize=9, leading=11, wordWrap="CJK")
-    style_cell_bold = ParagraphStyle("cellb", parent=style_cell, fontName="Helvetica-Bold")
+    st = _bast_styles()
+    style_school = st["school"]
+    style_meta = st["meta"]
+    style_title = st["title"]
+    style_body = st["body"]
+    style_kv = st["kv"]
+    style_cell = st["cell"]
+    style_cell_bold = st["cell_bold"]
 
     def _esc(s: str) -> str:
         s = "" if s is None else str(s)
@@ -310,12 +647,26 @@ def buat_pdf_bast(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> by
     p2_nama, p2_satdik, p2_alamat, p2_telp = map(_ph, [p2_nama, p2_satdik, p2_alamat, p2_telp])
 
     # Tanggal dari BKU
-    tgl_ttd = ""
-    try:
-        if df_bku is not None and (not df_bku.empty) and ("Tgl" in df_bku.columns):
-            tgl_ttd = str(df_bku["Tgl"].iloc[0] or "").strip()
-    except Exception:
-        tgl_ttd = ""
+    tgl_ttd = str(_col(bku_rows[0], "Tgl") or "").strip() if bku_rows else ""
+
+    items = _bast_items(bku_rows, detail_rows)
+
+    if fast:
+        pdf_bytes = _buat_pdf_bast_canvas(
+            bpu,
+            {
+                "nama_sekolah": nama_sekolah, "npsn": npsn, "alamat": alamat_satdik, "kab_kota": kab_kota,
+                "tahun": tahun, "tempat_ttd": tempat_ttd, "tgl_ttd": tgl_ttd,
+                "p1_nama": p1_nama, "p1_jabatan": p1_jabatan, "p1_perusahaan": p1_perusahaan,
+                "p1_alamat": p1_alamat, "p1_telp": p1_telp,
+                "p2_nama": p2_nama, "p2_jabatan": p2_jabatan, "p2_satdik": p2_satdik,
+                "p2_alamat": p2_alamat, "p2_telp": p2_telp,
+            },
+            items,
+            photos,
+        )
+        if pdf_bytes is not None:
+            return pdf_bytes
 
     story = []
     story.append(Paragraph(nama_sekolah if nama_sekolah else "—", style_school))
@@ -370,26 +721,6 @@ def buat_pdf_bast(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> by
     story.append(Spacer(1, 6))
 
     # tabel rincian
-    items = []
-    if df_detail is not None and (not df_detail.empty):
-        tmp = df_detail.copy()
-        if "Uraian" not in tmp.columns and "[Uraian]" in tmp.columns:
-            tmp["Uraian"] = tmp["[Uraian]"]
-        if "Jumlah Barang" not in tmp.columns and "[Jumlah Barang]" in tmp.columns:
-            tmp["Jumlah Barang"] = tmp["[Jumlah Barang]"]
-
-        tmp["Uraian"] = tmp.get("Uraian", "").astype(str).fillna("")
-        qty = pd.to_numeric(tmp.get("Jumlah Barang", 0), errors="coerce").fillna(0).astype(int)
-
-        for i, (ura, q) in enumerate(zip(tmp["Uraian"].tolist(), qty.tolist()), start=1):
-            items.append({"no": i, "barang": ura, "dipesan": q, "baik": q, "rusak": 0})
-    else:
-        tmp = df_bku.copy() if df_bku is not None else pd.DataFrame()
-        if not tmp.empty:
-            tmp["Uraian"] = tmp.get("Uraian", "").astype(str).fillna("")
-            for i, ura in enumerate(tmp["Uraian"].tolist(), start=1):
-                items.append({"no": i, "barang": ura, "dipesan": "", "baik": "", "rusak": ""})
-
     data_tbl = [
         [P("No", True), P("Barang/Jasa", True), P("Jumlah Dipesan", True),
          P("Jumlah Diterima\nKondisi Baik", True), P("Jumlah Diterima\nKondisi Rusak", True)]
@@ -423,7 +754,7 @@ def buat_pdf_bast(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> by
     story.append(Spacer(1, 14))
 
     # TTD
-    ttd_style = ParagraphStyle("ttd", parent=styles["Normal"], fontName="Helvetica", fontSize=10, leading=12, alignment=1)
+    ttd_style = st["ttd"]
     ttd = Table(
         [
             [Paragraph(f"{_esc(tempat_ttd)}, { _esc(tgl_ttd) if tgl_ttd else '....................' }", ttd_style), ""],
@@ -457,7 +788,8 @@ def buat_pdf_bast(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> by
 
         for ph in photos:
             fn = ph.get("filename") or ""
-            img_path = os.path.join(STATIC_PHOTO_DIR, fn)
+            # pakai varian cetak (sudah diputar & diperkecil), fallback file asli
+            img_path = os.path.join(STATIC_PHOTO_DIR, ph.get("print_filename") or fn)
             if not fn or not os.path.exists(img_path):
                 continue
 
@@ -487,8 +819,8 @@ def buat_pdf_bast(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> by
 # =========================================================
 # PUBLIC API
 # =========================================================
-def make_bast_pdf(bpu: str, df_bku: pd.DataFrame, df_detail: pd.DataFrame) -> bytes:
-    return buat_pdf_bast(bpu=bpu, df_bku=df_bku, df_detail=df_detail)
+def make_bast_pdf(bpu: str, df_bku, df_detail) -> bytes:
+    return buat_pdf_bast(bpu=bpu, bku_rows=df_bku, detail_rows=df_detail)
 
 
 def make_bkp_pdf(
@@ -0,0 +1,155 @@
+# arkas/photos.py
+from __future__ import annotations
+
+import os
+import sys
+
+from .config import (
+    PHOTO_JPEG_QUALITY,
+    PHOTO_PRINT_DPI,
+    PHOTO_PRINT_MAX_CM,
+    PHOTO_THUMB_PX,
+    STATIC_PHOTO_DIR,
+)
+from .db import get_conn
+from .render_cache import invalidate_render_cache
+
+
+# =========================================================
+# FOTO BPU: varian cetak (muat slot 16 x 22 cm di BAST) + thumbnail web
+#  - <nama>.print.jpg : sudah diputar sesuai EXIF, resolusi PHOTO_PRINT_DPI
+#  - <nama>.thumb.jpg : maks PHOTO_THUMB_PX untuk halaman edit / BAST
+# File asli tetap disimpan (link "lihat asli").
+# =========================================================
+def ensure_photo_variant_schema(cur):
+    existing = [r[1] for r in cur.execute("PRAGMA table_info(bpu_photos)").fetchall()]
+    for col_name, col_type in (
+        ("print_filename", "TEXT"),
+        ("thumb_filename", "TEXT"),
+        ("width", "INTEGER"),
+        ("height", "INTEGER"),
+    ):
+        if col_name not in existing:
+            cur.execute(f"ALTER TABLE bpu_photos ADD COLUMN {col_name} {col_type}")
+
+
+def _print_max_px() -> tuple[int, int]:
+    w_cm, h_cm = PHOTO_PRINT_MAX_CM
+    return int(round(w_cm / 2.54 * PHOTO_PRINT_DPI)), int(round(h_cm / 2.54 * PHOTO_PRINT_DPI))
+
+
+def variant_names(filename: str) -> tuple[str, str]:
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}.print.jpg", f"{stem}.thumb.jpg"
+
+
+def make_photo_variants(filename: str) -> dict:
+    """
+    Buat varian cetak + thumbnail dari file asli di STATIC_PHOTO_DIR.
+    Return {"print_filename", "thumb_filename", "width", "height"},
+    atau {} kalau file bukan gambar yang bisa dibaca Pillow.
+    """
+    from PIL import Image, ImageOps
+
+    src = os.path.join(STATIC_PHOTO_DIR, filename)
+    print_fn, thumb_fn = variant_names(filename)
+
+    try:
+        with Image.open(src) as im:
+            side = max(_print_max_px())
+            im.draft("RGB", (side, side))  # JPEG: decode langsung di resolusi lebih kecil
+            im = ImageOps.exif_transpose(im)
+            if im.mode != "RGB":
+                im = im.convert("RGB")
+
+            im.thumbnail(_print_max_px(), Image.LANCZOS)
+            im.save(
+                os.path.join(STATIC_PHOTO_DIR, print_fn),
+                "JPEG",
+                quality=PHOTO_JPEG_QUALITY,
+                optimize=True,
+                dpi=(PHOTO_PRINT_DPI, PHOTO_PRINT_DPI),
+            )
+            width, height = im.size
+
+            im.thumbnail((PHOTO_THUMB_PX, PHOTO_THUMB_PX), Image.LANCZOS)
+            im.save(os.path.join(STATIC_PHOTO_DIR, thumb_fn), "JPEG", quality=75, optimize=True)
+    except (OSError, ValueError):
+        return {}
+
+    return {"print_filename": print_fn, "thumb_filename": thumb_fn, "width": width, "height": height}
+
+
+def is_image_file(fileobj) -> bool:
+    """True kalau isi file bisa dibuka Pillow sebagai gambar. Posisi baca kembali ke awal."""
+    from PIL import Image
+
+    try:
+        fileobj.seek(0)
+        with Image.open(fileobj) as im:
+            im.verify()
+        return True
+    except Exception:  # Pillow: OSError / SyntaxError / struct.error ... untuk file rusak
+        return False
+    finally:
+        fileobj.seek(0)
+
+
+def remove_photo_files(filename: str):
+    """Hapus file asli + semua varian."""
+    for fn in (filename, *variant_names(filename)):
+        path = os.path.join(STATIC_PHOTO_DIR, fn)
+        if fn and os.path.exists(path):
+            os.remove(path)
+
+
+def backfill_photo_variants(force: bool = False, on_progress=None) -> tuple[int, int]:
+    """
+    Buat varian untuk foto lama yang belum punya (atau semua kalau force).
+    Return (jumlah_berhasil, jumlah_gagal).
+    """
+    conn = get_conn()
+    try:
+        sql = "SELECT id, bpu, filename FROM bpu_photos"
+        if not force:
+            sql += " WHERE print_filename IS NULL OR print_filename = ''"
+        rows = conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+    ok = failed = 0
+    touched = set()
+    for i, (pid, bpu, fn) in enumerate(rows, start=1):
+        v = make_photo_variants(fn or "")
+        if v:
+            conn = get_conn()
+            try:
+                conn.execute(
+                    "UPDATE bpu_photos SET print_filename=?, thumb_filename=?, width=?, height=? WHERE id=?",
+                    (v["print_filename"], v["thumb_filename"], v["width"], v["height"], pid),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            ok += 1
+            touched.add(bpu)
+        else:
+            failed += 1
+        if on_progress is not None:
+            on_progress(i, len(rows))
+
+    if touched:
+        invalidate_render_cache(sorted(touched))
+    return ok, failed
+
+
+if __name__ == "__main__":
+    # python -m arkas.photos [--force]
+    from .db_init import init_db
+
+    init_db()
+    ok, failed = backfill_photo_variants(
+        force="--force" in sys.argv[1:],
+        on_progress=lambda d, t: print(f"\r{d}/{t}", end="", flush=True),
+    )
+    print(f"\nSelesai: {ok} foto diproses, {failed} gagal.")
@@ -1,8 +1,98 @@
 # arkas/pihak1_history.py
 from __future__ import annotations
+import sqlite3
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from .db import get_conn
+from .config import PIHAK1_SEARCH_CACHE_SIZE
+from .db import get_conn, retry_on_busy
 
+
+# =========================================================
+# INDEX TRIGRAM (FTS5) untuk autocomplete nama / perusahaan
+# Diisi otomatis lewat trigger; SQLite tanpa tokenizer trigram
+# (< 3.34) tetap jalan dengan LIKE biasa.
+# =========================================================
+PIHAK1_FTS = "pihak1_history_fts"
+
+
+def ensure_pihak1_search_schema(cur, rebuild: bool = False):
+    try:
+        cur.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {PIHAK1_FTS} USING fts5(
+                nama, perusahaan,
+                content='pihak1_history',
+                content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return
+
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS pihak1_history_ai AFTER INSERT ON pihak1_history BEGIN
+            INSERT INTO {PIHAK1_FTS}(rowid, nama, perusahaan) VALUES (new.id, new.nama, new.perusahaan);
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS pihak1_history_ad AFTER DELETE ON pihak1_history BEGIN
+            INSERT INTO {PIHAK1_FTS}({PIHAK1_FTS}, rowid, nama, perusahaan) VALUES ('delete', old.id, old.nama, old.perusahaan);
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS pihak1_history_au AFTER UPDATE ON pihak1_history BEGIN
+            INSERT INTO {PIHAK1_FTS}({PIHAK1_FTS}, rowid, nama, perusahaan) VALUES ('delete', old.id, old.nama, old.perusahaan);
+            INSERT INTO {PIHAK1_FTS}(rowid, nama, perusahaan) VALUES (new.id, new.nama, new.perusahaan);
+        END
+    """)
+    if rebuild:
+        cur.execute(f"INSERT INTO {PIHAK1_FTS}({PIHAK1_FTS}) VALUES ('rebuild')")
+
+
+# =========================================================
+# LRU hasil pencarian per proses. Dibuang kalau history berubah
+# (cap MAX(id), MAX(last_used_at) -> murah, pakai index).
+# =========================================================
+_search_cache: OrderedDict = OrderedDict()
+_search_stamp = None
+_search_lock = threading.Lock()
+
+
+def _history_stamp(conn):
+    # 2 subquery terpisah: MAX() tunggal per SELECT dijawab langsung dari index
+    return tuple(conn.execute(
+        "SELECT (SELECT MAX(id) FROM pihak1_history), (SELECT MAX(last_used_at) FROM pihak1_history)"
+    ).fetchone())
+
+
+def _cache_get(qn: str, limit: int):
+    """Hasil dari cache; atau saring hasil prefix yang sudah lengkap (< limit baris)."""
+    hit = _search_cache.get((qn, limit))
+    if hit is not None:
+        _search_cache.move_to_end((qn, limit))
+        return hit
+    for n in range(len(qn) - 1, 2, -1):
+        prev = _search_cache.get((qn[:n], limit))
+        if prev is not None and len(prev) < limit:
+            return [it for it in prev if qn in it["nama"].lower() or qn in it["perusahaan"].lower()]
+    return None
+
+
+def _cache_put(qn: str, limit: int, items: list[dict]):
+    _search_cache[(qn, limit)] = items
+    _search_cache.move_to_end((qn, limit))
+    while len(_search_cache) > PIHAK1_SEARCH_CACHE_SIZE:
+        _search_cache.popitem(last=False)
+
+
+def invalidate_pihak1_cache():
+    global _search_stamp
+    with _search_lock:
+        _search_cache.clear()
+        _search_stamp = None
+
+
+@retry_on_busy
 def upsert_history_pihak1(nama: str, jabatan: str, perusahaan: str, alamat: str, telp: str):
     nama = (nama or "").strip()
     if not nama:
@@ -37,32 +127,64 @@ def upsert_history_pihak1(nama: str, jabatan: str, perusahaan: str, alamat: str,
         conn.commit()
     finally:
         conn.close()
+    invalidate_pihak1_cache()
 
 def search_history_pihak1(q: str, limit: int = 10) -> list[dict]:
     q = (q or "").strip()
     if len(q) < 3:
         return []
 
+    global _search_stamp
+    qn = q.lower()
+    limit = int(limit)
+
     conn = get_conn()
     try:
-        rows = conn.execute(
-            """
-            SELECT nama, jabatan, perusahaan, alamat, telp
-            FROM pihak1_history
-            WHERE lower(nama) LIKE lower(?)
-            ORDER BY last_used_at DESC, nama ASC
-            LIMIT ?
-            """,
-            (f"%{q}%", int(limit)),
-        ).fetchall()
+        stamp = _history_stamp(conn)
+        with _search_lock:
+            if stamp != _search_stamp:
+                _search_cache.clear()
+                _search_stamp = stamp
+            items = _cache_get(qn, limit)
+        if items is not None:
+            return items
 
-        return [
+        # cocok sebagian (substring) di nama ATAU perusahaan, lewat index trigram
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT nama, jabatan, perusahaan, alamat, telp
+                FROM pihak1_history
+                WHERE id IN (SELECT rowid FROM {PIHAK1_FTS} WHERE {PIHAK1_FTS} MATCH ?)
+                ORDER BY last_used_at DESC, nama ASC
+                LIMIT ?
+                """,
+                ('"' + q.replace('"', '""') + '"', limit),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = conn.execute(
+                """
+                SELECT nama, jabatan, perusahaan, alamat, telp
+                FROM pihak1_history
+                WHERE lower(nama) LIKE lower(?) OR lower(perusahaan) LIKE lower(?)
+                ORDER BY last_used_at DESC, nama ASC
+                LIMIT ?
+                """,
+                (f"%{q}%", f"%{q}%", limit),
+            ).fetchall()
+
+        items = [
             {"nama": r[0] or "", "jabatan": r[1] or "", "perusahaan": r[2] or "", "alamat": r[3] or "", "telp": r[4] or ""}
             for r in rows
         ]
     finally:
         conn.close()
 
+    with _search_lock:
+        if stamp == _search_stamp:
+            _cache_put(qn, limit, items)
+    return items
+
 def get_history_by_nama(nama: str) -> dict | None:
     nama = (nama or "").strip()
     if not nama:
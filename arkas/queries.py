@@ -3,10 +3,16 @@ from __future__ import annotations
 
 import math
 import re
-import pandas as pd
+import sqlite3
+from typing import TYPE_CHECKING
+
 from flask import request
 
-from .db import get_conn
+from .db import get_conn, is_busy_error, retry_on_busy
+from .search import fts_table, search_mode
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # =========================================================
@@ -14,86 +20,82 @@ from .db import get_conn
 # =========================================================
 def parse_dates(series: pd.Series) -> pd.Series:
     # Kept for compatibility, but date filtering is done in SQL for correct pagination.
+    import pandas as pd
+
     return pd.to_datetime(series.astype(str).str.strip(), errors="coerce", dayfirst=True)
 
 
+def fetch_rows(conn, sql: str, params=()) -> list[sqlite3.Row]:
+    """
+    Baris hasil query sebagai sqlite3.Row (akses row["Kolom"] seperti dict,
+    tanpa DataFrame). row_factory dipasang di cursor, koneksi pool tidak berubah.
+    """
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    return cur.execute(sql, params).fetchall()
+
+
+def as_float(v) -> float:
+    """Setara pd.to_numeric(errors="coerce").fillna(0) untuk 1 nilai."""
+    if v is None or isinstance(v, bool):
+        return float(v or 0)
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(f) else f
+
+
 def get_filter_options():
-    """Ambil opsi dropdown dari master (lebih stabil)."""
+    """Ambil opsi dropdown dari master (lebih stabil). Di-cache per data_version."""
     conn = get_conn()
     try:
-        keg = pd.read_sql(
-            """
-            SELECT DISTINCT nama_kegiatan
-            FROM master_kegiatan
-            WHERE nama_kegiatan IS NOT NULL AND TRIM(nama_kegiatan) <> ''
-            ORDER BY nama_kegiatan
-            """,
-            conn,
-        )
-        rek = pd.read_sql(
-            """
-            SELECT DISTINCT rekap_rekening_belanja
-            FROM master_rekening
-            WHERE rekap_rekening_belanja IS NOT NULL AND TRIM(rekap_rekening_belanja) <> ''
-            ORDER BY rekap_rekening_belanja
-            """,
-            conn,
-        )
-        kegiatan_list = keg["nama_kegiatan"].dropna().tolist() if not keg.empty else []
-        rekap_list = rek["rekap_rekening_belanja"].dropna().tolist() if not rek.empty else []
-        return kegiatan_list, rekap_list
+        kegiatan_list, rekap_list = _cached_data(conn, "filter_options", _load_filter_options)
+        return list(kegiatan_list), list(rekap_list)
     finally:
         conn.close()
 
 
+def _load_filter_options(conn):
+    keg = conn.execute(
+        """
+        SELECT DISTINCT nama_kegiatan
+        FROM master_kegiatan
+        WHERE nama_kegiatan IS NOT NULL AND TRIM(nama_kegiatan) <> ''
+        ORDER BY nama_kegiatan
+        """
+    ).fetchall()
+    rek = conn.execute(
+        """
+        SELECT DISTINCT rekap_rekening_belanja
+        FROM master_rekening
+        WHERE rekap_rekening_belanja IS NOT NULL AND TRIM(rekap_rekening_belanja) <> ''
+        ORDER BY rekap_rekening_belanja
+        """
+    ).fetchall()
+    return [r[0] for r in keg], [r[0] for r in rek]
+
+
 # =========================================================
-# BULAN OPTIONS (BKU Tgl biasanya dd-mm-yyyy)
+# BULAN OPTIONS (kolom ym diisi saat import)
 # =========================================================
 def get_bulan_options():
     conn = get_conn()
     try:
-        sql = """
-        SELECT DISTINCT
-            (substr(TRIM(CAST(b.[Tgl] AS TEXT)), 7, 4) || '-' ||
-             substr(TRIM(CAST(b.[Tgl] AS TEXT)), 4, 2)) AS ym
-        FROM bku b
-        WHERE b.[Bukti] LIKE 'BPU%'
-          AND b.[Tgl] IS NOT NULL
-          AND TRIM(CAST(b.[Tgl] AS TEXT)) <> ''
-          AND length(TRIM(CAST(b.[Tgl] AS TEXT))) >= 10
-        ORDER BY ym DESC
-        """
-        df = pd.read_sql(sql, conn)
-        return df["ym"].dropna().astype(str).str.strip().tolist() if not df.empty else []
+        return list(_cached_data(conn, "bulan_options", _load_bulan_options))
     finally:
         conn.close()
 
 
-# =========================================================
-# SQLITE DATE (support multiple formats) - ROBUST
-# =========================================================
-def _sqlite_date_expr(col: str) -> str:
-    """Return SQLite DATE() expression from text date in a column."""
-    c = f"TRIM(CAST({col} AS TEXT))"
-    return (
-        f"CASE "
-        f"WHEN {c} GLOB '____-__-__*' THEN date(substr({c},1,10)) "
-        f"WHEN {c} GLOB '__-__-____*' THEN date(substr({c},7,4)||'-'||substr({c},4,2)||'-'||substr({c},1,2)) "
-        f"WHEN {c} GLOB '__/__/____*' THEN date(substr({c},7,4)||'-'||substr({c},4,2)||'-'||substr({c},1,2)) "
-        f"ELSE NULL END"
-    )
-
-
-def _sqlite_ym_expr(col: str) -> str:
-    """Return YYYY-MM expression from a text date column."""
-    c = f"TRIM(CAST({col} AS TEXT))"
-    return (
-        f"CASE "
-        f"WHEN {c} GLOB '____-__-__*' THEN substr({c},1,7) "
-        f"WHEN {c} GLOB '__-__-____*' THEN (substr({c},7,4)||'-'||substr({c},4,2)) "
-        f"WHEN {c} GLOB '__/__/____*' THEN (substr({c},7,4)||'-'||substr({c},4,2)) "
-        f"ELSE '' END"
-    )
+def _load_bulan_options(conn):
+    sql = """
+    SELECT DISTINCT b.ym AS ym
+    FROM bku b
+    WHERE b.ym > ''
+      AND b.bpu_seq IS NOT NULL
+    ORDER BY b.ym DESC
+    """
+    return [str(r[0]).strip() for r in conn.execute(sql).fetchall()]
 
 
 # =========================================================
@@ -121,6 +123,106 @@ def get_paging_args(default_per_page: int = 25):
     return page, per_page
 
 
+def get_cursor_arg(name: str):
+    """Ambil cursor keyset rowid (after) dari request.values, None jika kosong."""
+    raw = (request.values.get(name) or "").strip()
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def get_spj_cursor_arg(name: str = "after_bpu"):
+    """
+    Cursor keyset SPJ "<bpu_seq>:<bpu>" -> (bpu_seq, bpu), None jika kosong.
+    bpu_seq tidak unik ("BPU1" dan "BPU01" sama-sama 1), jadi nomor BPU ikut.
+    """
+    raw = (request.values.get(name) or "").strip()
+    seq, sep, bpu = raw.partition(":")
+    try:
+        return (int(seq), bpu) if raw and sep else None
+    except ValueError:
+        return None
+
+
+# =========================================================
+# CACHE DATA PER PROSES (opsi dropdown, bulan, COUNT)
+# Valid selama data_version di SQLite tidak berubah. Import / convert /
+# master / reset menaikkan versi -> cache di semua worker proses ikut basi.
+# =========================================================
+_DATA_CACHE: dict = {}
+_COUNT_CACHE: dict = {}
+_COUNT_CACHE_MAX = 256
+_data_version: int | None = None
+
+
+def ensure_data_version_schema(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+
+
+def get_data_version(conn) -> int | None:
+    try:
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None  # db lama, belum di-migrate
+    return int(row[0]) if row else None
+
+
+def _sync_data_version(conn):
+    """Buang cache proses ini kalau proses lain sudah menaikkan data_version."""
+    global _data_version
+    v = get_data_version(conn)
+    if v is None or v != _data_version:
+        _DATA_CACHE.clear()
+        _COUNT_CACHE.clear()
+        _data_version = v
+
+
+def _cached_data(conn, name: str, loader):
+    _sync_data_version(conn)
+    if name not in _DATA_CACHE:
+        _DATA_CACHE[name] = loader(conn)
+    return _DATA_CACHE[name]
+
+
+@retry_on_busy
+def invalidate_data_cache():
+    """Dipanggil sesudah data berubah (import, convert, master, reset)."""
+    global _data_version
+    _DATA_CACHE.clear()
+    _COUNT_CACHE.clear()
+    _data_version = None
+
+    conn = get_conn()
+    try:
+        conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # versi wajib naik supaya cache worker lain ikut basi -> lock diulang
+        if is_busy_error(e):
+            raise
+    finally:
+        conn.close()
+
+
+def _cached_count(conn, sql: str, params: list) -> int:
+    _sync_data_version(conn)
+    key = (sql, tuple(params))
+    n = _COUNT_CACHE.get(key)
+    if n is None:
+        if len(_COUNT_CACHE) >= _COUNT_CACHE_MAX:
+            _COUNT_CACHE.clear()
+        n = int(conn.execute(sql, params).fetchone()[0] or 0)
+        _COUNT_CACHE[key] = n
+    return n
+
+
 def make_pagination(total_rows: int, page: int, per_page: int):
     total_pages = max(1, int(math.ceil(total_rows / float(per_page)))) if per_page else 1
     if page > total_pages:
@@ -138,53 +240,17 @@ def make_pagination(total_rows: int, page: int, per_page: int):
 
 
 # =========================================================
-# BKU: JOIN + FILTER + PAGING  (FILTER TANGGAL DI SQL!)
+# BKU / BHP/BHM: FROM + FILTER (dipakai tabel halaman & export)
 # =========================================================
-def ambil_data_bku(filters: dict, page: int, per_page: int):
-    conn = get_conn()
-    try:
-        base_from = """
+_LEDGER_VIEWS = {
+    "bku": {
+        "from": """
         FROM bku b
         LEFT JOIN master_kegiatan k ON b.[Keg] = k.[kode_kegiatan]
         LEFT JOIN master_rekening r ON b.[Rek] = r.[kode_rekening_belanja]
-        """
-
-        where = []
-        params = []
-
-        if filters.get("keyword"):
-            where.append("b.[Bukti] LIKE ?")
-            params.append(f"%{filters['keyword']}%")
-
-        if filters.get("kegiatan") and filters["kegiatan"] != "__ALL__":
-            where.append("k.[nama_kegiatan] = ?")
-            params.append(filters["kegiatan"])
-
-        if filters.get("rekap") and filters["rekap"] != "__ALL__":
-            where.append("r.[rekap_rekening_belanja] = ?")
-            params.append(filters["rekap"])
-
-        # FILTER TANGGAL (pindah ke SQL supaya pagination akurat)
-        tgl_from = (filters.get("tgl_from") or "").strip()
-        tgl_to = (filters.get("tgl_to") or "").strip()
-        if tgl_from:
-            where.append(_sqlite_date_expr("b.[Tgl]") + " >= date(?)")
-            params.append(tgl_from)
-        if tgl_to:
-            where.append(_sqlite_date_expr("b.[Tgl]") + " <= date(?)")
-            params.append(tgl_to)
-
-        where_sql = (" WHERE " + " AND ".join(where)) if where else ""
-
-        total_sql = "SELECT COUNT(1) AS n " + base_from + where_sql
-        total_rows = int(pd.read_sql(total_sql, conn, params=params)["n"].iloc[0])
-
-        pagination = make_pagination(total_rows, page, per_page)
-        offset = (pagination["page"] - 1) * pagination["per_page"]
-
-        sql = (
-            """
-            SELECT
+        """,
+        "bukti": "b.[Bukti]",
+        "select": """
                 b.[Tgl] AS Tgl,
                 b.[Keg] AS Keg,
                 k.[nama_kegiatan] AS NamaKegiatan,
@@ -196,75 +262,16 @@ def ambil_data_bku(filters: dict, page: int, per_page: int):
                 b.[In] AS [In],
                 b.[Out] AS [Out],
                 b.[Saldo] AS Saldo
-            """
-            + base_from
-            + where_sql
-            + """
-            ORDER BY b.rowid DESC
-            LIMIT ? OFFSET ?
-            """
-        )
-
-        df = pd.read_sql(sql, conn, params=params + [pagination["per_page"], offset])
-    finally:
-        conn.close()
-
-    summary = {
-        "rows": int(total_rows),
-        "total_in": float(pd.to_numeric(df.get("In", 0), errors="coerce").fillna(0).sum()) if len(df) else 0.0,
-        "total_out": float(pd.to_numeric(df.get("Out", 0), errors="coerce").fillna(0).sum()) if len(df) else 0.0,
-    }
-    return df, summary, pagination
-
-
-# =========================================================
-# BHP/BHM: JOIN + FILTER + PAGING  (FILTER TANGGAL DI SQL!)
-# =========================================================
-def ambil_data_bhp(filters: dict, page: int, per_page: int):
-    conn = get_conn()
-    try:
-        base_from = """
+            """,
+    },
+    "bhp_bhm": {
+        "from": """
         FROM bhp_bhm b
         LEFT JOIN master_kegiatan k ON b.[Kode Kegiatan] = k.[kode_kegiatan]
         LEFT JOIN master_rekening r ON b.[Kode Rekening] = r.[kode_rekening_belanja]
-        """
-
-        where = []
-        params = []
-
-        if filters.get("keyword"):
-            where.append("b.[No Bukti] LIKE ?")
-            params.append(f"%{filters['keyword']}%")
-
-        if filters.get("kegiatan") and filters["kegiatan"] != "__ALL__":
-            where.append("k.[nama_kegiatan] = ?")
-            params.append(filters["kegiatan"])
-
-        if filters.get("rekap") and filters["rekap"] != "__ALL__":
-            where.append("r.[rekap_rekening_belanja] = ?")
-            params.append(filters["rekap"])
-
-        # FILTER TANGGAL (pindah ke SQL supaya pagination akurat)
-        tgl_from = (filters.get("tgl_from") or "").strip()
-        tgl_to = (filters.get("tgl_to") or "").strip()
-        if tgl_from:
-            where.append(_sqlite_date_expr("b.[Tanggal]") + " >= date(?)")
-            params.append(tgl_from)
-        if tgl_to:
-            where.append(_sqlite_date_expr("b.[Tanggal]") + " <= date(?)")
-            params.append(tgl_to)
-
-        where_sql = (" WHERE " + " AND ".join(where)) if where else ""
-
-        total_sql = "SELECT COUNT(1) AS n " + base_from + where_sql
-        total_rows = int(pd.read_sql(total_sql, conn, params=params)["n"].iloc[0])
-
-        pagination = make_pagination(total_rows, page, per_page)
-        offset = (pagination["page"] - 1) * pagination["per_page"]
-
-        sql = (
-            """
-            SELECT
+        """,
+        "bukti": "b.[No Bukti]",
+        "select": """
                 b.[Tanggal] AS Tanggal,
                 b.[Kode Kegiatan] AS [Kode Kegiatan],
                 k.[nama_kegiatan] AS NamaKegiatan,
@@ -278,120 +285,331 @@ def ambil_data_bhp(filters: dict, page: int, per_page: int):
                 b.[Harga Satuan] AS [Harga Satuan],
                 b.[Realisasi] AS Realisasi,
                 b.[Sumber Data] AS [Sumber Data]
-            """
-            + base_from
-            + where_sql
-            + """
-            ORDER BY b.rowid DESC
-            LIMIT ? OFFSET ?
-            """
+            """,
+    },
+}
+
+
+def _ledger_filter(table: str, filters: dict) -> tuple[str, str, list, str | None]:
+    """
+    Return (from_sql, where_sql, params, match) untuk halaman BKU / BHP.
+    match = ekspresi FTS5 kalau mode "teks" (baris diurut relevansi), selain itu None.
+    """
+    view = _LEDGER_VIEWS[table]
+    base_from = view["from"]
+
+    # mode "teks": hanya baris yang cocok FTS5, urut relevansi
+    params = []
+    match = search_mode(filters)
+    if match is not None:
+        fts = fts_table(table)
+        base_from += f"JOIN (SELECT rowid AS fts_rowid, rank AS fts_rank FROM {fts} WHERE {fts} MATCH ?) f ON f.fts_rowid = b.rowid"
+        params.append(match)
+
+    where = []
+
+    if filters.get("keyword") and match is None:
+        where.append(f"{view['bukti']} LIKE ?")
+        params.append(f"%{filters['keyword']}%")
+
+    if filters.get("kegiatan") and filters["kegiatan"] != "__ALL__":
+        where.append("k.[nama_kegiatan] = ?")
+        params.append(filters["kegiatan"])
+
+    if filters.get("rekap") and filters["rekap"] != "__ALL__":
+        where.append("r.[rekap_rekening_belanja] = ?")
+        params.append(filters["rekap"])
+
+    # FILTER TANGGAL (kolom tgl_iso ter-index, pagination akurat)
+    tgl_from = (filters.get("tgl_from") or "").strip()
+    tgl_to = (filters.get("tgl_to") or "").strip()
+    if tgl_from:
+        where.append("b.tgl_iso >= date(?)")
+        params.append(tgl_from)
+    if tgl_to:
+        where.append("b.tgl_iso <= date(?)")
+        params.append(tgl_to)
+
+    where_sql = (" WHERE " + " AND ".join(where)) if where else ""
+    return base_from, where_sql, params, match
+
+
+def _ledger_page(conn, table: str, filters: dict, page: int, per_page: int, after: int | None, totals_sql: str):
+    base_from, where_sql, params, match = _ledger_filter(table, filters)
+
+    total_sql = "SELECT COUNT(1) AS n " + base_from + where_sql
+    total_rows = _cached_count(conn, total_sql, params)
+
+    pagination = make_pagination(total_rows, page, per_page)
+    offset = (pagination["page"] - 1) * pagination["per_page"]
+
+    # KEYSET: lanjut dari rowid terakhir halaman sebelumnya (tanpa OFFSET);
+    # urutan relevansi (mode teks) tetap pakai OFFSET
+    page_where_sql = where_sql
+    page_params = list(params)
+    if after is not None and match is None:
+        page_where_sql = (where_sql + " AND " if where_sql else " WHERE ") + "b.rowid < ?"
+        page_params.append(int(after))
+        offset = 0
+    rank_col = "f.fts_rank" if match is not None else "0"
+    order_sql = "f.fts_rank, b.rowid DESC" if match is not None else "b.rowid DESC"
+
+    # total (halaman) dihitung SQLite atas baris halaman ini saja
+    sql = (
+        f"""
+        WITH page AS (
+        SELECT
+            b.rowid AS _rowid,
+            {rank_col} AS _rank,
+            {_LEDGER_VIEWS[table]["select"]}
+        """
+        + base_from
+        + page_where_sql
+        + f"""
+        ORDER BY {order_sql}
+        LIMIT ? OFFSET ?
         )
+        SELECT page.*, {totals_sql}
+        FROM page
+        ORDER BY page._rank, page._rowid DESC
+        """
+    )
+
+    rows = fetch_rows(conn, sql, page_params + [pagination["per_page"], offset])
+    pagination["next_after"] = int(rows[-1]["_rowid"]) if rows and match is None else None
+    return rows, int(total_rows), pagination
+
+
+def iter_ledger_rows(conn, table: str, filters: dict) -> sqlite3.Cursor:
+    """
+    Semua baris hasil filter (urutan sama dengan tabel halaman), sebagai cursor:
+    dibaca bertahap oleh export, tidak dimuat sekaligus ke memori.
+    Nama kolom ada di cursor.description.
+    """
+    base_from, where_sql, params, match = _ledger_filter(table, filters)
+    order_sql = "f.fts_rank, b.rowid DESC" if match is not None else "b.rowid DESC"
+    return conn.execute(
+        f"SELECT {_LEDGER_VIEWS[table]['select']} {base_from}{where_sql} ORDER BY {order_sql}",
+        params,
+    )
+
 
-        df = pd.read_sql(sql, conn, params=params + [pagination["per_page"], offset])
+# =========================================================
+# BKU: JOIN + FILTER + PAGING  (FILTER TANGGAL DI SQL!)
+# =========================================================
+def ambil_data_bku(filters: dict, page: int, per_page: int, after: int | None = None):
+    conn = get_conn()
+    try:
+        rows, total_rows, pagination = _ledger_page(
+            conn, "bku", filters, page, per_page, after,
+            "SUM(page.[In]) OVER () AS _total_in, SUM(page.[Out]) OVER () AS _total_out",
+        )
     finally:
         conn.close()
 
-    jumlah_barang = pd.to_numeric(df.get("Jumlah Barang", 0), errors="coerce").fillna(0) if len(df) else pd.Series([0])
-    realisasi = pd.to_numeric(df.get("Realisasi", 0), errors="coerce").fillna(0) if len(df) else pd.Series([0])
-
     summary = {
-        "rows": int(total_rows),
-        "total_jumlah_barang": float(jumlah_barang.sum()) if len(df) else 0.0,
-        "total_realisasi": float(realisasi.sum()) if len(df) else 0.0,
+        "rows": total_rows,
+        "total_in": as_float(rows[0]["_total_in"]) if rows else 0.0,
+        "total_out": as_float(rows[0]["_total_out"]) if rows else 0.0,
     }
-    return df, summary, pagination
+    return rows, summary, pagination
 
 
 # =========================================================
-# SPJ per BPU (1 baris = 1 BPU), TotalOut = SUM Out
+# BHP/BHM: JOIN + FILTER + PAGING  (FILTER TANGGAL DI SQL!)
 # =========================================================
-def ambil_spj_per_bpu(filters: dict, page: int, per_page: int):
+def ambil_data_bhp(filters: dict, page: int, per_page: int, after: int | None = None):
     conn = get_conn()
     try:
-        base_from = """
-        FROM bku b
-        LEFT JOIN master_kegiatan k ON b.[Keg] = k.[kode_kegiatan]
-        LEFT JOIN master_rekening r ON b.[Rek] = r.[kode_rekening_belanja]
-        WHERE b.[Bukti] LIKE 'BPU%'
-        """
-
-        where = []
-        params = []
+        rows, total_rows, pagination = _ledger_page(
+            conn, "bhp_bhm", filters, page, per_page, after,
+            "SUM(page.[Jumlah Barang]) OVER () AS _total_jumlah_barang, "
+            "SUM(page.[Realisasi]) OVER () AS _total_realisasi",
+        )
+    finally:
+        conn.close()
 
-        if filters.get("keyword"):
-            where.append("b.[Bukti] LIKE ?")
-            params.append(f"%{filters['keyword']}%")
+    summary = {
+        "rows": total_rows,
+        "total_jumlah_barang": as_float(rows[0]["_total_jumlah_barang"]) if rows else 0.0,
+        "total_realisasi": as_float(rows[0]["_total_realisasi"]) if rows else 0.0,
+    }
+    return rows, summary, pagination
 
-        if filters.get("kegiatan") and filters["kegiatan"] != "__ALL__":
-            where.append("k.[nama_kegiatan] = ?")
-            params.append(filters["kegiatan"])
 
-        if filters.get("rekap") and filters["rekap"] != "__ALL__":
-            where.append("r.[rekap_rekening_belanja] = ?")
-            params.append(filters["rekap"])
+# =========================================================
+# SPJ per BPU (1 baris = 1 BPU) dari tabel bpu_summary
+# =========================================================
+_SPJ_FTS_HITS = f"""
+    SELECT b.[Bukti] AS bpu, f.rank AS rank
+    FROM {fts_table("bku")} f JOIN bku b ON b.rowid = f.rowid
+    WHERE {fts_table("bku")} MATCH ?
+    UNION ALL
+    SELECT h.[No Bukti], f.rank
+    FROM {fts_table("bhp_bhm")} f JOIN bhp_bhm h ON h.rowid = f.rowid
+    WHERE {fts_table("bhp_bhm")} MATCH ?
+"""
+
+
+def _spj_where(filters: dict) -> tuple[str, list]:
+    """WHERE untuk bpu_summary (alias s) dari filter halaman SPJ."""
+    where = []
+    params = []
+
+    match = search_mode(filters)
+    if match is not None:
+        # BPU yang uraian / ID barang / nomornya cocok FTS5 (BKU atau BHP/BHM)
+        where.append(f"s.bpu IN (SELECT bpu FROM ({_SPJ_FTS_HITS}))")
+        params += [match, match]
+    elif filters.get("keyword"):
+        where.append("s.bpu LIKE ?")
+        params.append(f"%{filters['keyword']}%")
+
+    # kegiatan / rekap / bulan dicocokkan per baris BKU (seperti sebelum ada
+    # bpu_summary): BPU lolos kalau ADA satu baris yang cocok semua filter,
+    # bukan hanya baris pertamanya
+    line_where = []
+    if filters.get("kegiatan") and filters["kegiatan"] != "__ALL__":
+        line_where.append("b.[Keg] IN (SELECT k.kode_kegiatan FROM master_kegiatan k WHERE k.nama_kegiatan = ?)")
+        params.append(filters["kegiatan"])
+
+    if filters.get("rekap") and filters["rekap"] != "__ALL__":
+        line_where.append(
+            "b.[Rek] IN (SELECT r.kode_rekening_belanja FROM master_rekening r WHERE r.rekap_rekening_belanja = ?)"
+        )
+        params.append(filters["rekap"])
+
+    # FILTER BULAN (YYYY-MM)
+    bulan = (filters.get("bulan") or "").strip()
+    if bulan and bulan != "__ALL__":
+        line_where.append("b.ym = ?")
+        params.append(bulan)
+
+    if line_where:
+        where.append(
+            "s.bpu IN (SELECT b.[Bukti] FROM bku b WHERE b.bpu_seq IS NOT NULL AND "
+            + " AND ".join(line_where) + ")"
+        )
 
-        # FILTER BULAN (YYYY-MM)
-        bulan = (filters.get("bulan") or "").strip()
-        if bulan and bulan != "__ALL__":
-            where.append(
-                "(substr(TRIM(CAST(b.[Tgl] AS TEXT)),7,4) || '-' || "
-                "substr(TRIM(CAST(b.[Tgl] AS TEXT)),4,2)) = ?"
-            )
-            params.append(bulan)
+    where_sql = (" WHERE " + " AND ".join(where)) if where else ""
+    return where_sql, params
 
-        where_sql = (" AND " + " AND ".join(where)) if where else ""
 
-        total_sql = """
-        SELECT COUNT(1) AS n
-        FROM (
-            SELECT b.[Bukti]
-        """ + base_from + where_sql + """
-            GROUP BY b.[Bukti], k.[nama_kegiatan], r.[rekap_rekening_belanja]
-        ) t
+def ambil_spj_per_bpu(filters: dict, page: int, per_page: int, after_bpu: tuple[int, str] | None = None):
+    conn = get_conn()
+    try:
+        base_from = """
+        FROM bpu_summary s
         """
-        total_rows = int(pd.read_sql(total_sql, conn, params=params)["n"].iloc[0])
+
+        where_sql, params = _spj_where(filters)
+
+        total_sql = "SELECT COUNT(1) AS n " + base_from + where_sql
+        total_rows = _cached_count(conn, total_sql, params)
 
         pagination = make_pagination(total_rows, page, per_page)
         offset = (pagination["page"] - 1) * pagination["per_page"]
 
-        sql = """
+        # mode "teks": urut skor terbaik per BPU (pakai OFFSET),
+        # selain itu KEYSET: lanjut dari nomor BPU terakhir halaman sebelumnya
+        match = search_mode(filters)
+        page_from = base_from
+        page_params = []
+        if match is not None:
+            page_from += f"JOIN (SELECT bpu, MIN(rank) AS fts_rank FROM ({_SPJ_FTS_HITS}) GROUP BY bpu) f ON f.bpu = s.bpu"
+            page_params += [match, match]
+        page_params += params
+
+        page_where_sql = where_sql
+        if after_bpu is not None and match is None:
+            page_where_sql = (where_sql + " AND " if where_sql else " WHERE ") + "(s.bpu_seq, s.bpu) > (?, ?)"
+            page_params += [int(after_bpu[0]), str(after_bpu[1])]
+            offset = 0
+        rank_col = "f.fts_rank" if match is not None else "0"
+        order_sql = "f.fts_rank, s.bpu_seq, s.bpu" if match is not None else "s.bpu_seq, s.bpu"
+
+        sql = f"""
+        WITH page AS (
         SELECT
-            b.[Bukti] AS Bukti,
-            MIN(b.[Tgl]) AS Tgl,
-            MIN(b.[Keg]) AS Keg,
-            k.[nama_kegiatan] AS NamaKegiatan,
-            MIN(b.[Rek]) AS Rek,
-            r.[rekap_rekening_belanja] AS RekapRekening,
-            GROUP_CONCAT(DISTINCT b.[Uraian]) AS UraianGabung,
-            SUM(CAST(b.[Out] AS REAL)) AS TotalOut
-        """ + base_from + where_sql + """
-        GROUP BY b.[Bukti], k.[nama_kegiatan], r.[rekap_rekening_belanja]
-        ORDER BY CAST(REPLACE(b.[Bukti], 'BPU', '') AS INTEGER) ASC
+            s.bpu_seq AS _bpu_seq,
+            {rank_col} AS _rank,
+            s.bpu AS Bukti,
+            s.tgl AS Tgl,
+            s.keg AS Keg,
+            s.nama_kegiatan AS NamaKegiatan,
+            s.rek AS Rek,
+            s.rekap_rekening AS RekapRekening,
+            s.uraian_gabung AS UraianGabung,
+            s.total_out AS TotalOut
+        """ + page_from + page_where_sql + f"""
+        ORDER BY {order_sql}
         LIMIT ? OFFSET ?
+        )
+        SELECT page.*, SUM(page.TotalOut) OVER () AS _total_out
+        FROM page
+        ORDER BY page._rank, page._bpu_seq, page.Bukti
         """
-        df = pd.read_sql(sql, conn, params=params + [pagination["per_page"], offset])
+        rows = fetch_rows(conn, sql, page_params + [pagination["per_page"], offset])
     finally:
         conn.close()
 
-    if not df.empty and "UraianGabung" in df.columns:
-        df["UraianGabung"] = df["UraianGabung"].fillna("").astype(str).str.replace(",", " | ")
+    pagination["next_after_bpu"] = (
+        f"{int(rows[-1]['_bpu_seq'])}:{rows[-1]['Bukti']}" if rows and match is None else None
+    )
 
     summary = {
         "rows": int(total_rows),
-        "total_out": float(pd.to_numeric(df.get("TotalOut", 0), errors="coerce").fillna(0).sum()) if len(df) else 0.0,
+        "total_out": as_float(rows[0]["_total_out"]) if rows else 0.0,
     }
-    return df, summary, pagination
+    return rows, summary, pagination
+
+
+def list_spj_bpus(filters: dict) -> list[str]:
+    """Semua nomor BPU yang lolos filter SPJ (urut nomor BPU), tanpa pagination."""
+    where_sql, params = _spj_where(filters)
+    conn = get_conn()
+    try:
+        rows = conn.execute(
+            "SELECT s.bpu FROM bpu_summary s" + where_sql + " ORDER BY s.bpu_seq, s.bpu",
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+    return [r[0] for r in rows]
+
+
+def iter_spj_rows(conn, filters: dict) -> sqlite3.Cursor:
+    """Semua baris SPJ per BPU hasil filter (urut nomor BPU) sebagai cursor, untuk export."""
+    where_sql, params = _spj_where(filters)
+    return conn.execute(
+        """
+        SELECT
+            s.tgl AS Tgl,
+            s.bpu AS Bukti,
+            s.keg AS Keg,
+            s.nama_kegiatan AS NamaKegiatan,
+            s.rek AS Rek,
+            s.rekap_rekening AS RekapRekening,
+            s.uraian_gabung AS UraianGabung,
+            s.total_out AS TotalOut
+        FROM bpu_summary s
+        """ + where_sql + " ORDER BY s.bpu_seq, s.bpu",
+        params,
+    )
 
 
 # =========================================================
 # DATA UNTUK DETAIL BPU (BAST PAGE / PDF)
 # =========================================================
-def get_bpu_bku_rows(bpu: str) -> pd.DataFrame:
+def get_bpu_bku_rows(bpu: str) -> list[sqlite3.Row]:
+    """Baris BKU 1 BPU (urut rowid); kolom _total_out = SUM(Out) semua baris BPU."""
     conn = get_conn()
     try:
-        return pd.read_sql(
+        return fetch_rows(
+            conn,
             """
             SELECT
+                b.rowid AS _rowid,
                 b.[Tgl] AS Tgl,
                 b.[Keg] AS Keg,
                 k.[nama_kegiatan] AS NamaKegiatan,
@@ -399,24 +617,25 @@ def get_bpu_bku_rows(bpu: str) -> pd.DataFrame:
                 r.[nama_rekening_belanja] AS NamaRekening,
                 r.[rekap_rekening_belanja] AS RekapRekening,
                 b.[Uraian] AS Uraian,
-                b.[Out] AS Out
+                b.[Out] AS Out,
+                SUM(b.[Out]) OVER () AS _total_out
             FROM bku b
             LEFT JOIN master_kegiatan k ON b.[Keg] = k.[kode_kegiatan]
             LEFT JOIN master_rekening r ON b.[Rek] = r.[kode_rekening_belanja]
             WHERE b.[Bukti] = ?
             ORDER BY b.rowid ASC
             """,
-            conn,
-            params=[bpu],
+            [bpu],
         )
     finally:
         conn.close()
 
 
-def get_bpu_bhp_detail(bpu: str) -> pd.DataFrame:
+def get_bpu_bhp_detail(bpu: str) -> list[sqlite3.Row]:
     conn = get_conn()
     try:
-        return pd.read_sql(
+        return fetch_rows(
+            conn,
             """
             SELECT
                 [ID Barang] AS [ID Barang],
@@ -429,12 +648,109 @@ def get_bpu_bhp_detail(bpu: str) -> pd.DataFrame:
             WHERE [No Bukti] = ?
             ORDER BY rowid ASC
             """,
-            conn,
-            params=[bpu],
-        )
-    except Exception:
-        return pd.DataFrame(
-            columns=["ID Barang", "Uraian", "Jumlah Barang", "Harga Satuan", "Realisasi", "Sumber Data"]
+            [bpu],
         )
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+
+# =========================================================
+# REKAP BULANAN (tabel rekap_bulanan / rekap_saldo, diisi saat import)
+# =========================================================
+def _rekap_pivot(conn, col: str, where_sql: str, params: list) -> list[dict]:
+    """Keluar (Out BKU) per `col` per bulan, urut total terbesar."""
+    out: dict = {}
+    for key, ym, bku_out, bhp in conn.execute(
+        f"""
+        SELECT {col}, ym, SUM(bku_out), SUM(bhp_realisasi)
+        FROM rekap_bulanan {where_sql}
+        GROUP BY {col}, ym
+        """,
+        params,
+    ):
+        item = out.setdefault(key, {"nama": key, "total_out": 0, "total_bhp": 0, "per_bulan": {}})
+        item["per_bulan"][ym] = int(bku_out or 0)
+        item["total_out"] += int(bku_out or 0)
+        item["total_bhp"] += int(bhp or 0)
+    return sorted(out.values(), key=lambda x: (-x["total_out"], x["nama"]))
+
+
+def _load_rekap(conn, tahun: str) -> dict:
+    where_sql, params = "", []
+    if tahun != "__ALL__":
+        where_sql, params = "WHERE ym LIKE ?", [f"{tahun}-%"]
+
+    bulan_rows = conn.execute(
+        f"""
+        SELECT r.ym, r.bku_in, r.bku_out, r.bhp_realisasi, r.n_bku, r.n_bhp, s.saldo_awal, s.saldo_akhir
+        FROM (
+            SELECT ym, SUM(bku_in) AS bku_in, SUM(bku_out) AS bku_out, SUM(bhp_realisasi) AS bhp_realisasi,
+                   SUM(n_bku) AS n_bku, SUM(n_bhp) AS n_bhp
+            FROM rekap_bulanan {where_sql}
+            GROUP BY ym
+        ) r
+        LEFT JOIN rekap_saldo s ON s.ym = r.ym
+        ORDER BY r.ym ASC
+        """,
+        params,
+    ).fetchall()
+    tahun_list = [
+        r[0]
+        for r in conn.execute(
+            "SELECT DISTINCT substr(ym, 1, 4) FROM rekap_bulanan WHERE ym <> '' ORDER BY 1 DESC"
+        ).fetchall()
+    ]
+
+    bulan = []
+    kum_in = kum_out = kum_bhp = 0
+    for ym, b_in, b_out, bhp, n_bku, n_bhp, saldo_awal, saldo_akhir in bulan_rows:
+        b_in, b_out, bhp = int(b_in or 0), int(b_out or 0), int(bhp or 0)
+        kum_in += b_in
+        kum_out += b_out
+        kum_bhp += bhp
+        bulan.append({
+            "ym": ym,
+            "bku_in": b_in,
+            "bku_out": b_out,
+            "bhp_realisasi": bhp,
+            "selisih": b_out - bhp,
+            "n_bku": int(n_bku or 0),
+            "n_bhp": int(n_bhp or 0),
+            "saldo_awal": saldo_awal,
+            "saldo_akhir": saldo_akhir,
+            "kumulatif_in": kum_in,
+            "kumulatif_out": kum_out,
+            "kumulatif_bhp": kum_bhp,
+        })
+
+    return {
+        "tahun": tahun,
+        "tahun_list": tahun_list,
+        "bulan": bulan,
+        "per_kegiatan": _rekap_pivot(conn, "nama_kegiatan", where_sql, params),
+        "per_rekap": _rekap_pivot(conn, "rekap_rekening", where_sql, params),
+        "total": {
+            "bku_in": kum_in,
+            "bku_out": kum_out,
+            "bhp_realisasi": kum_bhp,
+            "selisih": kum_out - kum_bhp,
+            "saldo_akhir": bulan[-1]["saldo_akhir"] if bulan else None,
+        },
+    }
+
+
+def ambil_rekap(tahun: str | None = None) -> dict:
+    """
+    Rekap per bulan (saldo, kumulatif, BKU vs BHP), per kegiatan dan per rekap rekening.
+    Dibaca dari tabel ringkasan, disimpan per versi data (tidak dihitung ulang tiap request).
+    """
+    tahun = (tahun or "").strip()
+    if not re.fullmatch(r"\d{4}", tahun):
+        tahun = "__ALL__"  # nilai lain tidak dijadikan key cache
+    conn = get_conn()
+    try:
+        return _cached_data(conn, f"rekap:{tahun}", lambda c: _load_rekap(c, tahun))
     finally:
         conn.close()
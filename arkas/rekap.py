@@ -0,0 +1,111 @@
+# arkas/rekap.py
+from __future__ import annotations
+
+
+# =========================================================
+# REKAP BULANAN (diisi saat import, dibaca dashboard /rekap)
+#  - rekap_bulanan : 1 baris = 1 (bulan, nama kegiatan, rekap rekening)
+#                    in/out BKU + realisasi BHP/BHM
+#  - rekap_saldo   : 1 baris = 1 bulan, saldo awal/akhir menurut BKU
+# Dibaca lewat queries.ambil_rekap (dashboard /rekap + /api/rekap).
+# =========================================================
+def ensure_rekap_schema(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS rekap_bulanan (
+            ym TEXT NOT NULL,
+            nama_kegiatan TEXT NOT NULL,
+            rekap_rekening TEXT NOT NULL,
+            bku_in INTEGER NOT NULL DEFAULT 0,
+            bku_out INTEGER NOT NULL DEFAULT 0,
+            bhp_realisasi INTEGER NOT NULL DEFAULT 0,
+            n_bku INTEGER NOT NULL DEFAULT 0,
+            n_bhp INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (ym, nama_kegiatan, rekap_rekening)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS rekap_saldo (
+            ym TEXT PRIMARY KEY,
+            saldo_awal INTEGER,
+            saldo_akhir INTEGER
+        )
+    """)
+
+
+_BKU_PART = """
+    SELECT b.ym, b.[Keg] AS keg, b.[Rek] AS rek,
+           SUM(COALESCE(b.in_amt, 0)) AS bku_in, SUM(COALESCE(b.out_amt, 0)) AS bku_out,
+           0 AS bhp_realisasi, COUNT(1) AS n_bku, 0 AS n_bhp
+    FROM bku b
+    WHERE b.ym IS NOT NULL {scope}
+    GROUP BY b.ym, b.[Keg], b.[Rek]
+"""
+
+_BHP_PART = """
+    SELECT h.ym, h.[Kode Kegiatan] AS keg, h.[Kode Rekening] AS rek,
+           0 AS bku_in, 0 AS bku_out, SUM(COALESCE(h.realisasi_amt, 0)) AS bhp_realisasi,
+           0 AS n_bku, COUNT(1) AS n_bhp
+    FROM bhp_bhm h
+    WHERE h.ym IS NOT NULL {scope}
+    GROUP BY h.ym, h.[Kode Kegiatan], h.[Kode Rekening]
+"""
+
+# baris baru (append / merge) cukup DITAMBAHKAN ke angka yang sudah ada
+_REKAP_UPSERT = """
+    INSERT INTO rekap_bulanan (
+        ym, nama_kegiatan, rekap_rekening, bku_in, bku_out, bhp_realisasi, n_bku, n_bhp
+    )
+    SELECT
+        t.ym,
+        COALESCE((SELECT k.nama_kegiatan FROM master_kegiatan k WHERE k.kode_kegiatan = t.keg LIMIT 1), ''),
+        COALESCE((SELECT r.rekap_rekening_belanja FROM master_rekening r WHERE r.kode_rekening_belanja = t.rek LIMIT 1), ''),
+        SUM(t.bku_in), SUM(t.bku_out), SUM(t.bhp_realisasi), SUM(t.n_bku), SUM(t.n_bhp)
+    FROM ({parts}) t
+    GROUP BY 1, 2, 3
+    ON CONFLICT (ym, nama_kegiatan, rekap_rekening) DO UPDATE SET
+        bku_in = bku_in + excluded.bku_in,
+        bku_out = bku_out + excluded.bku_out,
+        bhp_realisasi = bhp_realisasi + excluded.bhp_realisasi,
+        n_bku = n_bku + excluded.n_bku,
+        n_bhp = n_bhp + excluded.n_bhp
+"""
+
+# saldo akhir = kolom Saldo baris terakhir bulan itu (urutan BKU = urutan rowid),
+# saldo awal  = saldo sebelum baris pertama bulan itu
+_SALDO_INSERT = """
+    INSERT OR REPLACE INTO rekap_saldo (ym, saldo_awal, saldo_akhir)
+    SELECT
+        m.ym,
+        (SELECT COALESCE(f.saldo_amt, 0) + COALESCE(f.out_amt, 0) - COALESCE(f.in_amt, 0) FROM bku f WHERE f.rowid = m.first_id),
+        (SELECT l.saldo_amt FROM bku l WHERE l.rowid = m.last_id)
+    FROM (
+        SELECT b.ym, MIN(b.rowid) AS first_id, MAX(b.rowid) AS last_id
+        FROM bku b
+        WHERE b.ym IS NOT NULL {scope}
+        GROUP BY b.ym
+    ) m
+"""
+
+
+def rebuild_rekap(cur, table: str | None = None, after_rowid: int | None = None):
+    """
+    after_rowid None -> hitung ulang semua (import replace, master, reset).
+    after_rowid N    -> tambahkan baris `table` dengan rowid > N (import append / merge
+                        hanya menambah baris), saldo dihitung ulang untuk bulan itu saja.
+    """
+    if after_rowid is None:
+        cur.execute("DELETE FROM rekap_bulanan")
+        cur.execute("DELETE FROM rekap_saldo")
+        parts = _BKU_PART.format(scope="") + " UNION ALL " + _BHP_PART.format(scope="")
+        cur.execute(_REKAP_UPSERT.format(parts=parts))
+        cur.execute(_SALDO_INSERT.format(scope=""))
+        return
+
+    if table == "bku":
+        cur.execute(_REKAP_UPSERT.format(parts=_BKU_PART.format(scope="AND b.rowid > ?")), (int(after_rowid),))
+        cur.execute(
+            _SALDO_INSERT.format(scope="AND b.ym IN (SELECT DISTINCT ym FROM bku WHERE rowid > ?)"),
+            (int(after_rowid),),
+        )
+    else:
+        cur.execute(_REKAP_UPSERT.format(parts=_BHP_PART.format(scope="AND h.rowid > ?")), (int(after_rowid),))
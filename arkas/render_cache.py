@@ -0,0 +1,209 @@
+# arkas/render_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from .config import PDF_CACHE_DB, RENDER_CACHE_DIR, RENDER_CACHE_ENABLED, RENDER_CACHE_MAX_BYTES, STATIC_PHOTO_DIR
+from .db import get_conn
+
+
+# Naikkan jika layout BAST/BKP berubah (semua PDF lama otomatis tidak terpakai)
+RENDER_VERSION = "2"
+
+
+# =========================================================
+# CACHE PDF BAST / BKP YANG SUDAH DIRENDER
+#  - file: RENDER_CACHE_DIR/<key>.pdf
+#  - index: tabel render_cache di PDF_CACHE_DB (LRU, dibatasi ukuran)
+#  - key = sidik jari semua input dokumen -> data berubah = key baru
+# =========================================================
+def _connect():
+    conn = sqlite3.connect(PDF_CACHE_DB, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS render_cache (
+            key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            bpu TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_render_cache_bpu ON render_cache(bpu)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_render_cache_last_used ON render_cache(last_used)")
+    return conn
+
+
+def _path(key: str) -> str:
+    return os.path.join(RENDER_CACHE_DIR, f"{key}.pdf")
+
+
+def bpu_fingerprint(kind: str, bpu: str) -> str | None:
+    """
+    Sidik jari input dokumen 1 BPU: baris bku (+ nama master), baris bhp,
+    override, daftar foto (+ ukuran/mtime file) dan app_settings.
+    None kalau BPU tidak ada di BKU.
+    """
+    conn = get_conn()
+    try:
+        bku = conn.execute(
+            """
+            SELECT b.rowid, b.[Tgl], b.[Keg], k.[nama_kegiatan], b.[Rek],
+                   r.[nama_rekening_belanja], r.[rekap_rekening_belanja], b.[Uraian], b.[Out]
+            FROM bku b
+            LEFT JOIN master_kegiatan k ON b.[Keg] = k.[kode_kegiatan]
+            LEFT JOIN master_rekening r ON b.[Rek] = r.[kode_rekening_belanja]
+            WHERE b.[Bukti] = ?
+            ORDER BY b.rowid ASC
+            """,
+            (bpu,),
+        ).fetchall()
+        if not bku:
+            return None
+
+        bhp = conn.execute(
+            """
+            SELECT rowid, [ID Barang], [Uraian], [Jumlah Barang], [Harga Satuan], [Realisasi], [Sumber Data]
+            FROM bhp_bhm WHERE [No Bukti] = ? ORDER BY rowid ASC
+            """,
+            (bpu,),
+        ).fetchall()
+        ov = conn.execute("SELECT * FROM bpu_override WHERE bpu = ?", (bpu,)).fetchone()
+        photos = conn.execute(
+            "SELECT id, COALESCE(NULLIF(print_filename, ''), filename) FROM bpu_photos WHERE bpu = ? ORDER BY id",
+            (bpu,),
+        ).fetchall()
+        settings = conn.execute("SELECT * FROM app_settings WHERE id = 1").fetchone()
+    finally:
+        conn.close()
+
+    files = []
+    for pid, fn in photos:
+        try:
+            st = os.stat(os.path.join(STATIC_PHOTO_DIR, fn or ""))
+            files.append([pid, fn, st.st_size, st.st_mtime_ns])
+        except OSError:
+            files.append([pid, fn, None, None])
+
+    payload = [RENDER_VERSION, kind, bpu, bku, bhp, ov, files, settings]
+    raw = json.dumps(payload, default=str, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_pdf(kind: str, bpu: str, render_fn) -> tuple[str, str, float] | None:
+    """
+    Return (path_file_pdf, key, created_at) untuk dokumen `kind` BPU `bpu`.
+    Render ulang (render_fn(bpu) -> bytes | None) hanya kalau sidik jari berubah.
+    None kalau BPU tidak ada.
+    """
+    key = bpu_fingerprint(kind, bpu)
+    if key is None:
+        return None
+
+    path = _path(key)
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT created_at FROM render_cache WHERE key = ?", (key,)).fetchone()
+        if row and os.path.exists(path):
+            conn.execute("UPDATE render_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            return path, key, row[0]
+    finally:
+        conn.close()
+
+    pdf = render_fn(bpu)
+    if pdf is None:
+        return None
+
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+    # nama sementara unik per penulis (thread / worker lain bisa merender
+    # key yang sama bersamaan)
+    fd, tmp = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=RENDER_CACHE_DIR)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO render_cache (key, kind, bpu, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, kind, bpu, len(pdf), now, now),
+        )
+        _evict(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return path, key, now
+
+
+def render_cached(kind: str, bpu: str, render_fn) -> bytes | None:
+    """Sama seperti cached_pdf tapi return bytes PDF (cache dilewati kalau dimatikan)."""
+    if not RENDER_CACHE_ENABLED:
+        return render_fn(bpu)
+    hit = cached_pdf(kind, bpu, render_fn)
+    if hit is None:
+        return None
+    with open(hit[0], "rb") as f:
+        return f.read()
+
+
+def _remove(conn, keys: list[str]):
+    conn.executemany("DELETE FROM render_cache WHERE key = ?", [(k,) for k in keys])
+    for k in keys:
+        try:
+            os.remove(_path(k))
+        except OSError:
+            pass
+
+
+def _evict(conn):
+    total = int(conn.execute("SELECT COALESCE(SUM(size), 0) FROM render_cache").fetchone()[0])
+    if total <= RENDER_CACHE_MAX_BYTES:
+        return
+
+    doomed = []
+    for key, size in conn.execute("SELECT key, size FROM render_cache ORDER BY last_used ASC"):
+        doomed.append(key)
+        total -= int(size)
+        if total <= RENDER_CACHE_MAX_BYTES:
+            break
+    _remove(conn, doomed)
+
+
+def invalidate_render_cache(bpus=None):
+    """
+    Buang PDF cache milik BPU tertentu (list nomor BPU), atau semuanya kalau None
+    (settings / master / import replace berubah).
+    """
+    if bpus is not None:
+        bpus = [b for b in bpus if b]
+        if not bpus:
+            return
+
+    conn = _connect()
+    try:
+        if bpus is None:
+            keys = [r[0] for r in conn.execute("SELECT key FROM render_cache").fetchall()]
+        else:
+            keys = []
+            for i in range(0, len(bpus), 500):
+                part = bpus[i:i + 500]
+                keys += [
+                    r[0]
+                    for r in conn.execute(
+                        f"SELECT key FROM render_cache WHERE bpu IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                ]
+        _remove(conn, keys)
+        conn.commit()
+    finally:
+        conn.close()
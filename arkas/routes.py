@@ -3,11 +3,11 @@ from __future__ import annotations
 
 from io import BytesIO
 import os
+import time
 
 from flask import jsonify
 from .pihak1_history import search_history_pihak1, upsert_history_pihak1
 
-import pandas as pd
 from flask import (
     Blueprint,
     render_template,
@@ -17,8 +17,9 @@ from flask import (
     flash,
     send_file,
     abort,
+    Response,
+    stream_with_context,
 )
-from werkzeug.utils import secure_filename
 
 from .config import (
     UPLOAD_FOLDER,
@@ -26,6 +27,12 @@ from .config import (
     ALLOWED_EXT,
     ALLOWED_PDF,
     ALLOWED_IMG,
+    RENDER_CACHE_ENABLED,
+    PIHAK1_SEARCH_MAX_AGE,
+    MAX_PDF_UPLOAD_BYTES,
+    MAX_XLSX_UPLOAD_BYTES,
+    MAX_PHOTO_UPLOAD_BYTES,
+    UPLOAD_TMP_FOLDER,
 )
 from .db import get_conn
 from .settings import get_settings, save_settings
@@ -34,15 +41,29 @@ from .queries import (
     get_filter_options,
     get_bulan_options,
     get_paging_args,
+    get_cursor_arg,
+    get_spj_cursor_arg,
+    invalidate_data_cache,
     ambil_data_bku,
     ambil_data_bhp,
     ambil_spj_per_bpu,
     get_bpu_bku_rows,
     get_bpu_bhp_detail,
+    as_float,
+    ambil_rekap,
 )
 
-from .converters import convert_bku_pdfs, convert_bhp_pdfs
-from .pdf_docs import buat_pdf_bast, buat_pdf_kwitansi
+from .jobs import submit_job, get_job
+from .tasks import run_convert_job, run_import_output_job, run_spj_export_job
+from .bpu_summary import rebuild_bpu_summary
+from .ledger import IMPORT_MODES
+from .metrics import timed
+from .rekap import rebuild_rekap
+from .render_cache import cached_pdf, invalidate_render_cache
+from .search import refresh_search_index, search_ledger
+from .table_export import TABLE_EXPORT_FORMATS, TABLE_EXPORT_VIEWS, stream_table_export
+from .uploads import request_upload_dir, save_upload, streamed_upload
+from .spj_export import EXPORT_DOCS, EXPORT_FORMATS, prefill_kegiatan_from_bku, render_bast, render_bkp
 from .bpu_override import (
     get_bpu_override,
     upsert_bpu_override,
@@ -73,25 +94,17 @@ def allowed_img(filename: str) -> bool:
     return ext in ALLOWED_IMG
 
 
-def _prefill_kegiatan_from_bku(df_bku: pd.DataFrame) -> str:
-    """
-    Ambil kegiatan default dari BKU:
-    - pakai kolom NamaKegiatan jika ada
-    - fallback kolom Keg
-    """
-    if df_bku is None or df_bku.empty:
-        return ""
-    try:
-        v = str(df_bku.get("NamaKegiatan", pd.Series([""])).iloc[0] or "").strip()
-        if v:
-            return v
-    except Exception:
-        pass
-    try:
-        v = str(df_bku.get("Keg", pd.Series([""])).iloc[0] or "").strip()
-        return v
-    except Exception:
-        return ""
+def _wants_json() -> bool:
+    """Client API (Accept: application/json / ?format=json) dapat JSON, browser dapat redirect."""
+    if (request.values.get("format") or "").lower() == "json":
+        return True
+    return request.accept_mimetypes.best == "application/json"
+
+
+def _job_response(job_id: str):
+    if _wants_json():
+        return jsonify({"job_id": job_id, "status_url": url_for("main.api_job", job_id=job_id)}), 202
+    return redirect(url_for("main.page_job", job_id=job_id))
 
 
 # =========================================================
@@ -104,16 +117,17 @@ def page_bku():
 
     filters = {
         "keyword": request.values.get("keyword", "").strip(),
+        "search_in": request.values.get("search_in", "bukti"),
         "kegiatan": request.values.get("kegiatan", "__ALL__"),
         "rekap": request.values.get("rekap", "__ALL__"),
         "tgl_from": request.values.get("tgl_from", "").strip(),
         "tgl_to": request.values.get("tgl_to", "").strip(),
     }
 
-    df, summary, pagination = ambil_data_bku(filters, page, per_page)
+    rows, summary, pagination = ambil_data_bku(filters, page, per_page, after=get_cursor_arg("after"))
     return render_template(
         "bku.html",
-        data=df.to_dict(orient="records"),
+        data=rows,
         filters=filters,
         kegiatan_list=kegiatan_list,
         rekap_list=rekap_list,
@@ -129,16 +143,17 @@ def page_bhp():
 
     filters = {
         "keyword": request.values.get("keyword", "").strip(),
+        "search_in": request.values.get("search_in", "bukti"),
         "kegiatan": request.values.get("kegiatan", "__ALL__"),
         "rekap": request.values.get("rekap", "__ALL__"),
         "tgl_from": request.values.get("tgl_from", "").strip(),
         "tgl_to": request.values.get("tgl_to", "").strip(),
     }
 
-    df, summary, pagination = ambil_data_bhp(filters, page, per_page)
+    rows, summary, pagination = ambil_data_bhp(filters, page, per_page, after=get_cursor_arg("after"))
     return render_template(
         "bhp.html",
-        data=df.to_dict(orient="records"),
+        data=rows,
         filters=filters,
         kegiatan_list=kegiatan_list,
         rekap_list=rekap_list,
@@ -151,13 +166,11 @@ def page_bhp():
 def page_spj_bpu():
     kegiatan_list, rekap_list = get_filter_options()
     bulan_list = get_bulan_options()
-    import arkas.queries as q
-    print("USING QUERIES:", q.__file__)
-    print("BULAN LIST:", bulan_list[:10], "TOTAL:", len(bulan_list))
     page, per_page = get_paging_args()
 
     filters = {
         "keyword": request.values.get("keyword", "").strip(),
+        "search_in": request.values.get("search_in", "bukti"),
         "kegiatan": request.values.get("kegiatan", "__ALL__"),
         "rekap": request.values.get("rekap", "__ALL__"),
         "bulan": request.values.get("bulan", "__ALL__"),
@@ -165,22 +178,83 @@ def page_spj_bpu():
         "tgl_to": request.values.get("tgl_to", "").strip(),
     }
 
-    df, summary, pagination = ambil_spj_per_bpu(filters, page, per_page)
+    rows, summary, pagination = ambil_spj_per_bpu(
+        filters, page, per_page, after_bpu=get_spj_cursor_arg()
+    )
     return render_template(
         "spj_bpu.html",
-        data=df.to_dict(orient="records"),
+        data=rows,
         filters=filters,
         kegiatan_list=kegiatan_list,
         rekap_list=rekap_list,
+        bulan_list=bulan_list,
         summary=summary,
         pagination=pagination,
     )
 
 
+@bp.route("/spj-bpu/export", methods=["GET", "POST"])
+def export_spj_bpu():
+    """BAST/BKP semua BPU sesuai filter SPJ -> 1 ZIP / 1 PDF gabungan (background job)."""
+    filters = {
+        "keyword": request.values.get("keyword", "").strip(),
+        "search_in": request.values.get("search_in", "bukti"),
+        "kegiatan": request.values.get("kegiatan", "__ALL__"),
+        "rekap": request.values.get("rekap", "__ALL__"),
+        "bulan": request.values.get("bulan", "__ALL__"),
+    }
+    docs = request.values.get("docs", "both")
+    fmt = request.values.get("format", "zip")
+    if docs not in EXPORT_DOCS or fmt not in EXPORT_FORMATS:
+        abort(400, "Parameter docs / format tidak valid")
+
+    job_id = submit_job("spj_export", run_spj_export_job, filters, docs, fmt)
+    return _job_response(job_id)
+
+
+@bp.route("/export/<view>", methods=["GET"])
+def export_table(view: str):
+    """Semua baris hasil filter halaman BKU / BHP / SPJ sebagai CSV / XLSX (di-stream)."""
+    fmt = request.values.get("format", "csv")
+    if view not in TABLE_EXPORT_VIEWS or fmt not in TABLE_EXPORT_FORMATS:
+        abort(404)
+
+    filters = {
+        "keyword": request.values.get("keyword", "").strip(),
+        "search_in": request.values.get("search_in", "bukti"),
+        "kegiatan": request.values.get("kegiatan", "__ALL__"),
+        "rekap": request.values.get("rekap", "__ALL__"),
+        "bulan": request.values.get("bulan", "__ALL__"),
+        "tgl_from": request.values.get("tgl_from", "").strip(),
+        "tgl_to": request.values.get("tgl_to", "").strip(),
+    }
+    return Response(
+        stream_with_context(stream_table_export(view, filters, fmt)),
+        content_type=TABLE_EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{TABLE_EXPORT_VIEWS[view][0]}.{fmt}"'},
+    )
+
+
+# =========================================================
+# REKAP (dashboard + JSON), dari tabel rekap_bulanan / rekap_saldo
+# =========================================================
+@bp.route("/rekap", methods=["GET"])
+def page_rekap():
+    rekap = ambil_rekap(request.values.get("tahun", "__ALL__"))
+    return render_template("rekap.html", rekap=rekap)
+
+
+@bp.route("/api/rekap")
+def api_rekap():
+    """Rekap bulanan / per kegiatan / per rekap rekening (dari tabel ringkasan)."""
+    return jsonify(ambil_rekap(request.args.get("tahun", "__ALL__")))
+
+
 # =========================================================
 # EDIT BPU (Override kegiatan + pihak1 per BPU + Upload foto)
 # =========================================================
 @bp.route("/bpu/<bpu>/edit", methods=["GET", "POST"])
+@streamed_upload(UPLOAD_TMP_FOLDER, ALLOWED_IMG, MAX_PHOTO_UPLOAD_BYTES, per_request_dir=False)
 def page_edit_bpu(bpu: str):
     if request.method == "POST":
         kegiatan_override = (request.form.get("kegiatan_override") or "").strip()
@@ -215,7 +289,11 @@ def page_edit_bpu(bpu: str):
             if not allowed_img(f.filename):
                 flash("Format foto harus .jpg/.jpeg/.png/.webp", "error")
                 return redirect(url_for("main.page_edit_bpu", bpu=bpu))
-            fn = save_uploaded_photo(bpu, f)
+            try:
+                fn = save_uploaded_photo(bpu, f)
+            except ValueError as e:
+                flash(str(e), "error")
+                return redirect(url_for("main.page_edit_bpu", bpu=bpu))
             add_bpu_photo(bpu, fn)
 
         flash("✔ Data BPU tersimpan.", "ok")
@@ -225,8 +303,7 @@ def page_edit_bpu(bpu: str):
     ov = get_bpu_override(bpu)
     photos = list_bpu_photos(bpu)
 
-    df_bku = get_bpu_bku_rows(bpu)
-    default_kegiatan = _prefill_kegiatan_from_bku(df_bku)
+    default_kegiatan = prefill_kegiatan_from_bku(get_bpu_bku_rows(bpu))
 
     # Prefill: kalau override kosong, isi kegiatan BKU
     if (ov.get("kegiatan_override") or "").strip() == "" and default_kegiatan:
@@ -260,24 +337,26 @@ def delete_bpu_photo_route(bpu: str, photo_id: int):
 # =========================================================
 @bp.route("/bast/<bpu>", methods=["GET"])
 def page_bast_detail(bpu: str):
-    df_rows = get_bpu_bku_rows(bpu)
-    df_detail = get_bpu_bhp_detail(bpu)
+    bku_rows = get_bpu_bku_rows(bpu)
+    detail = get_bpu_bhp_detail(bpu)
 
-    if df_rows.empty:
+    if not bku_rows:
         abort(404, f"BPU {bpu} tidak ditemukan")
 
-    header = df_rows.iloc[0].to_dict()
-    total_out = float(pd.to_numeric(df_rows["Out"], errors="coerce").fillna(0).sum())
+    header = dict(bku_rows[0])
+    total_out = as_float(header["_total_out"])
 
-    rows = df_rows.copy()
-    rows["Out"] = pd.to_numeric(rows["Out"], errors="coerce").fillna(0).astype(float)
-    rows["Out"] = rows["Out"].apply(lambda v: "Rp {:,.0f}".format(v).replace(",", "."))
+    rows = []
+    for r in bku_rows:
+        row = dict(r)
+        row["Out"] = "Rp {:,.0f}".format(as_float(r["Out"])).replace(",", ".")
+        rows.append(row)
 
     ov = get_bpu_override(bpu)
     photos = list_bpu_photos(bpu)
 
     # Prefill kegiatan override (kalau kosong) supaya di BAST juga ikut kebaca
-    default_kegiatan = _prefill_kegiatan_from_bku(df_rows)
+    default_kegiatan = prefill_kegiatan_from_bku(bku_rows)
     if (ov.get("kegiatan_override") or "").strip() == "" and default_kegiatan:
         ov["kegiatan_override"] = default_kegiatan
 
@@ -286,28 +365,49 @@ def page_bast_detail(bpu: str):
         bpu=bpu,
         header=header,
         total_out=total_out,
-        rows=rows.to_dict(orient="records"),
-        detail=df_detail.to_dict(orient="records") if (df_detail is not None and not df_detail.empty) else [],
+        rows=rows,
+        detail=detail,
         override=ov,
         photos=photos,
     )
 
 
-@bp.route("/bast/<bpu>/pdf", methods=["GET"])
-def download_bast_pdf(bpu: str):
-    df_bku = get_bpu_bku_rows(bpu)
-    df_detail = get_bpu_bhp_detail(bpu)
-
-    if df_bku.empty:
+def _send_pdf(kind: str, bpu: str, render_fn, download_name: str):
+    """
+    Kirim PDF dari cache render (ETag = sidik jari input, Last-Modified = waktu render),
+    browser yang mengirim If-None-Match / If-Modified-Since cukup dapat 304.
+    """
+    if RENDER_CACHE_ENABLED:
+        for _ in range(2):
+            hit = cached_pdf(kind, bpu, render_fn)
+            if hit is None:
+                abort(404, f"BPU {bpu} tidak ditemukan")
+            path, key, created_at = hit
+            try:
+                return send_file(
+                    path,
+                    mimetype="application/pdf",
+                    as_attachment=True,
+                    download_name=download_name,
+                    etag=key,
+                    last_modified=created_at,
+                    conditional=True,
+                )
+            except FileNotFoundError:
+                # file dibuang invalidate_render_cache request lain (data BPU
+                # baru diubah) di antara cek cache dan kirim -> render ulang;
+                # masih kalah terus -> kirim tanpa cache
+                continue
+
+    pdf_bytes = render_fn(bpu)
+    if pdf_bytes is None:
         abort(404, f"BPU {bpu} tidak ditemukan")
+    return send_file(BytesIO(pdf_bytes), mimetype="application/pdf", as_attachment=True, download_name=download_name)
 
-    pdf_bytes = buat_pdf_bast(bpu, df_bku, df_detail)
-    return send_file(
-        BytesIO(pdf_bytes),
-        mimetype="application/pdf",
-        as_attachment=True,
-        download_name=f"BAST_{bpu}.pdf",
-    )
+
+@bp.route("/bast/<bpu>/pdf", methods=["GET"])
+def download_bast_pdf(bpu: str):
+    return _send_pdf("bast", bpu, render_bast, f"BAST_{bpu}.pdf")
 
 
 # =========================================================
@@ -315,38 +415,7 @@ def download_bast_pdf(bpu: str):
 # =========================================================
 @bp.route("/bkp/<bpu>/pdf", methods=["GET"])
 def download_bkp_pdf(bpu: str):
-    df = get_bpu_bku_rows(bpu)
-    if df.empty:
-        abort(404, f"BPU {bpu} tidak ditemukan")
-
-    total = float(pd.to_numeric(df["Out"], errors="coerce").fillna(0).sum())
-    tgl = str(df["Tgl"].iloc[0] or "").strip()
-
-    st = get_settings()
-    nama_sekolah = (st.get("nama_sekolah") or "").strip()
-
-    # kegiatan bisa dioverride per bpu
-    ov = get_bpu_override(bpu)
-    nama_kegiatan = (ov.get("kegiatan_override") or "").strip()
-    if not nama_kegiatan:
-        nama_kegiatan = _prefill_kegiatan_from_bku(df)
-
-    pdf_bytes = buat_pdf_kwitansi(
-        bpu,
-        {
-            "nomor": bpu,
-            "tgl": tgl,
-            "telah_terima_dari": f"Bendahara BOSP {nama_sekolah}".strip(),
-            "untuk_pembayaran": nama_kegiatan or "—",
-            "jumlah": total,
-        },
-    )
-    return send_file(
-        BytesIO(pdf_bytes),
-        mimetype="application/pdf",
-        as_attachment=True,
-        download_name=f"BKP_{bpu}.pdf",
-    )
+    return _send_pdf("bkp", bpu, render_bkp, f"BKP_{bpu}.pdf")
 
 
 # =========================================================
@@ -374,13 +443,40 @@ def import_menu():
 def api_pihak1_search():
     q = request.args.get("q", "").strip()
     items = search_history_pihak1(q, limit=10)
-    return jsonify(items)
+    # "q" ikut dikirim -> klien bisa buang respons yang sudah basi
+    resp = jsonify({"q": q, "items": items})
+    resp.headers["Cache-Control"] = f"private, max-age={PIHAK1_SEARCH_MAX_AGE}"
+    return resp
+
+
+@bp.route("/api/search")
+def api_search():
+    """Cari teks di BKU + BHP/BHM (FTS5, urut relevansi)."""
+    q = request.args.get("q", "").strip()
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        limit = 20
+    limit = max(1, min(limit, 100))
+
+    t0 = time.perf_counter()
+    conn = get_conn()
+    try:
+        result = search_ledger(conn, q, limit=limit)
+    finally:
+        conn.close()
+    result["q"] = q
+    result["took_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    return jsonify(result)
 
 
 @bp.route("/import/output", methods=["GET", "POST"])
+@streamed_upload(UPLOAD_FOLDER, ALLOWED_EXT, MAX_XLSX_UPLOAD_BYTES)
 def import_output_excel():
     if request.method == "POST":
         mode = request.form.get("mode", "append")
+        if mode not in IMPORT_MODES:
+            mode = "append"
         file = request.files.get("file")
 
         if not file or file.filename.strip() == "":
@@ -391,34 +487,16 @@ def import_output_excel():
             flash("File harus .xlsx", "error")
             return redirect(url_for("main.import_output_excel"))
 
-        filename = secure_filename(file.filename)
-        save_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(save_path)
+        save_path = save_upload(file, request_upload_dir(UPLOAD_FOLDER))
 
-        conn = get_conn()
-        try:
-            try:
-                df_bku = pd.read_excel(save_path, sheet_name="BKU")
-                df_bku.to_sql("bku", conn, if_exists=mode, index=False)
-                flash("✔ BKU berhasil diimport.", "ok")
-            except Exception as e:
-                flash(f"Sheet BKU tidak ditemukan / gagal dibaca: {e}", "error")
-
-            try:
-                df_bhp = pd.read_excel(save_path, sheet_name="BHP_BHM")
-                df_bhp.to_sql("bhp_bhm", conn, if_exists=mode, index=False)
-                flash("✔ BHP_BHM berhasil diimport.", "ok")
-            except Exception as e:
-                flash(f"Sheet BHP_BHM tidak ditemukan / gagal dibaca: {e}", "error")
-        finally:
-            conn.close()
-
-        return redirect(url_for("main.import_output_excel"))
+        job_id = submit_job("import_output", run_import_output_job, save_path, mode)
+        return _job_response(job_id)
 
     return render_template("import_output.html")
 
 
 @bp.route("/import/master/kegiatan", methods=["GET", "POST"])
+@streamed_upload(UPLOAD_FOLDER, ALLOWED_EXT, MAX_XLSX_UPLOAD_BYTES)
 def import_master_kegiatan():
     if request.method == "POST":
         file = request.files.get("file")
@@ -431,13 +509,14 @@ def import_master_kegiatan():
             flash("File harus .xlsx", "error")
             return redirect(url_for("main.import_master_kegiatan"))
 
-        filename = secure_filename(file.filename)
-        save_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(save_path)
+        save_path = save_upload(file, request_upload_dir(UPLOAD_FOLDER))
+
+        import pandas as pd  # hanya dipakai import master (tidak dimuat saat worker start)
 
         conn = get_conn()
         try:
-            df = pd.read_excel(save_path)
+            with timed("pandas_read_excel"):
+                df = pd.read_excel(save_path)
             needed = {"kode_kegiatan", "nama_kegiatan"}
             if not needed.issubset(set(df.columns.astype(str))):
                 flash(f"Kolom tidak sesuai. Kolom yang ada: {list(df.columns)}", "error")
@@ -449,11 +528,17 @@ def import_master_kegiatan():
 
             df.to_sql("master_kegiatan", conn, if_exists="replace", index=False)
             conn.execute("CREATE INDEX IF NOT EXISTS idx_master_kegiatan_kode ON master_kegiatan(kode_kegiatan)")
+            # nama kegiatan/rekap di bpu_summary + rekap bulanan ikut master
+            rebuild_bpu_summary(conn.cursor())
+            rebuild_rekap(conn.cursor())
+            conn.commit()
             flash("✔ Master Kegiatan berhasil diimport (replace).", "ok")
         except Exception as e:
             flash(f"Gagal import master kegiatan: {e}", "error")
         finally:
             conn.close()
+            invalidate_data_cache()
+            invalidate_render_cache()
 
         return redirect(url_for("main.import_master_kegiatan"))
 
@@ -461,6 +546,7 @@ def import_master_kegiatan():
 
 
 @bp.route("/import/master/rekening", methods=["GET", "POST"])
+@streamed_upload(UPLOAD_FOLDER, ALLOWED_EXT, MAX_XLSX_UPLOAD_BYTES)
 def import_master_rekening():
     if request.method == "POST":
         file = request.files.get("file")
@@ -473,13 +559,14 @@ def import_master_rekening():
             flash("File harus .xlsx", "error")
             return redirect(url_for("main.import_master_rekening"))
 
-        filename = secure_filename(file.filename)
-        save_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(save_path)
+        save_path = save_upload(file, request_upload_dir(UPLOAD_FOLDER))
+
+        import pandas as pd  # hanya dipakai import master (tidak dimuat saat worker start)
 
         conn = get_conn()
         try:
-            df = pd.read_excel(save_path)
+            with timed("pandas_read_excel"):
+                df = pd.read_excel(save_path)
             needed = {"kode_rekening_belanja", "nama_rekening_belanja", "rekap_rekening_belanja"}
             if not needed.issubset(set(df.columns.astype(str))):
                 flash(f"Kolom tidak sesuai. Kolom yang ada: {list(df.columns)}", "error")
@@ -492,11 +579,17 @@ def import_master_rekening():
 
             df.to_sql("master_rekening", conn, if_exists="replace", index=False)
             conn.execute("CREATE INDEX IF NOT EXISTS idx_master_rekening_kode ON master_rekening(kode_rekening_belanja)")
+            # nama kegiatan/rekap di bpu_summary + rekap bulanan ikut master
+            rebuild_bpu_summary(conn.cursor())
+            rebuild_rekap(conn.cursor())
+            conn.commit()
             flash("✔ Master Rekening berhasil diimport (replace).", "ok")
         except Exception as e:
             flash(f"Gagal import master rekening: {e}", "error")
         finally:
             conn.close()
+            invalidate_data_cache()
+            invalidate_render_cache()
 
         return redirect(url_for("main.import_master_rekening"))
 
@@ -510,12 +603,18 @@ def reset_data():
         cur = conn.cursor()
         cur.execute("DELETE FROM bku")
         cur.execute("DELETE FROM bhp_bhm")
+        cur.execute("DELETE FROM bpu_summary")
+        refresh_search_index(cur, "bku")
+        refresh_search_index(cur, "bhp_bhm")
+        rebuild_rekap(cur)
         conn.commit()
     except Exception as e:
         flash(f"Gagal reset data: {e}", "error")
         return redirect(url_for("main.import_menu"))
     finally:
         conn.close()
+        invalidate_data_cache()
+        invalidate_render_cache()
 
     flash("✔ Semua data BKU dan BHP/BHM berhasil direset.", "ok")
     return redirect(url_for("main.import_menu"))
@@ -530,10 +629,13 @@ def page_convert():
 
 
 @bp.route("/convert/run", methods=["POST"])
+@streamed_upload(PDF_UPLOAD_FOLDER, ALLOWED_PDF, MAX_PDF_UPLOAD_BYTES)
 def convert_run():
     mode = request.form.get("mode", "both")  # bku / bhp / both
     import_now = request.form.get("import_now") == "1"
-    db_mode = request.form.get("db_mode", "append")  # append / replace
+    db_mode = request.form.get("db_mode", "append")  # append / replace / merge
+    if db_mode not in IMPORT_MODES:
+        db_mode = "append"
 
     bku_files = request.files.getlist("bku_pdfs")
     bhp_files = request.files.getlist("bhp_pdfs")
@@ -541,21 +643,17 @@ def convert_run():
     saved_bku: list[str] = []
     saved_bhp: list[str] = []
 
+    # subfolder per jenis: nama file asli tetap (dipakai kolom Sumber Data);
+    # file sudah di-stream ke folder request ini -> cukup rename
     if mode in ("bku", "both"):
         for f in bku_files:
             if f and f.filename and allowed_pdf(f.filename):
-                name = secure_filename(f.filename)
-                path = os.path.join(PDF_UPLOAD_FOLDER, name)
-                f.save(path)
-                saved_bku.append(path)
+                saved_bku.append(save_upload(f, os.path.join(request_upload_dir(PDF_UPLOAD_FOLDER), "bku")))
 
     if mode in ("bhp", "both"):
         for f in bhp_files:
             if f and f.filename and allowed_pdf(f.filename):
-                name = secure_filename(f.filename)
-                path = os.path.join(PDF_UPLOAD_FOLDER, name)
-                f.save(path)
-                saved_bhp.append(path)
+                saved_bhp.append(save_upload(f, os.path.join(request_upload_dir(PDF_UPLOAD_FOLDER), "bhp")))
 
     if mode in ("bku", "both") and not saved_bku:
         flash("PDF BKU belum dipilih.", "error")
@@ -565,47 +663,42 @@ def convert_run():
         flash("PDF BHP/BHM belum dipilih.", "error")
         return redirect(url_for("main.page_convert"))
 
-    try:
-        df_bku = convert_bku_pdfs(saved_bku) if mode in ("bku", "both") else None
-        df_bhp = convert_bhp_pdfs(saved_bhp) if mode in ("bhp", "both") else None
-    except Exception as e:
-        flash(f"Gagal convert: {e}", "error")
-        return redirect(url_for("main.page_convert"))
-
-    if import_now:
-        conn = get_conn()
-        try:
-            if df_bku is not None:
-                df_bku.to_sql("bku", conn, if_exists=db_mode, index=False)
-                flash("✔ BKU hasil convert berhasil diimport ke database.", "ok")
+    job_id = submit_job("convert", run_convert_job, mode, saved_bku, saved_bhp, import_now, db_mode)
+    return _job_response(job_id)
 
-            if df_bhp is not None:
-                df_bhp.to_sql("bhp_bhm", conn, if_exists=db_mode, index=False)
-                flash("✔ BHP_BHM hasil convert berhasil diimport ke database.", "ok")
-
-        except Exception as e:
-            flash(f"Gagal import ke database: {e}", "error")
-            return redirect(url_for("main.page_convert"))
-        finally:
-            conn.close()
-
-        if mode == "bku":
-            return redirect(url_for("main.page_bku"))
-        if mode == "bhp":
-            return redirect(url_for("main.page_bhp"))
-        return redirect(url_for("main.page_spj_bpu"))
-
-    out = BytesIO()
-    with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        if df_bku is not None:
-            df_bku.to_excel(writer, sheet_name="BKU", index=False)
-        if df_bhp is not None:
-            df_bhp.to_excel(writer, sheet_name="BHP_BHM", index=False)
-    out.seek(0)
 
+# =========================================================
+# JOBS: status (JSON), halaman progress, unduh hasil
+# =========================================================
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def api_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "job tidak ditemukan"}), 404
+    path = job.pop("result_path")
+    job["result_url"] = url_for("main.download_job_result", job_id=job_id) if path else None
+    return jsonify(job)
+
+
+@bp.route("/jobs/<job_id>/view", methods=["GET"])
+def page_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        abort(404, "Job tidak ditemukan")
+    return render_template("job.html", job=job)
+
+
+@bp.route("/jobs/<job_id>/result", methods=["GET"])
+def download_job_result(job_id: str):
+    job = get_job(job_id)
+    if job is None or job["status"] != "done" or not job["result_path"]:
+        abort(404, "Hasil job belum tersedia")
+    if not os.path.exists(job["result_path"]):
+        abort(404, "File hasil job sudah tidak ada")
     return send_file(
-        out,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        job["result_path"],
+        mimetype=(job["result"] or {}).get("mimetype")
+        or "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         as_attachment=True,
-        download_name="OUTPUT_ARKAS.xlsx",
+        download_name=(job["result"] or {}).get("download_name") or os.path.basename(job["result_path"]),
     )
\ No newline at end of file
@@ -0,0 +1,128 @@
+# arkas/search.py
+from __future__ import annotations
+
+import re
+import sqlite3
+
+
+# =========================================================
+# FULL-TEXT SEARCH (SQLite FTS5) atas uraian & nomor bukti
+#  - bku_fts     : [Bukti], [Uraian]               (content = bku)
+#  - bhp_bhm_fts : [No Bukti], [Uraian], [ID Barang] (content = bhp_bhm)
+# Tabel FTS "external content": teks tidak disimpan 2x, index diisi
+# saat import (baris baru) / dibangun ulang (replace, reset).
+# =========================================================
+SEARCH_COLUMNS = {
+    "bku": ("Bukti", "Uraian"),
+    "bhp_bhm": ("No Bukti", "Uraian", "ID Barang"),
+}
+
+SEARCH_MODES = ("bukti", "teks")
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def ensure_search_schema(cur, rebuild: bool = False):
+    for table, cols in SEARCH_COLUMNS.items():
+        col_sql = ", ".join(f'"{c}"' for c in cols)
+        cur.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table(table)} USING fts5(
+                {col_sql},
+                content='{table}',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+        if rebuild:
+            refresh_search_index(cur, table)
+
+
+def refresh_search_index(cur, table: str, after_rowid: int | None = None):
+    """
+    Sinkron index FTS dengan tabel ledger:
+    - after_rowid None -> bangun ulang semua (import replace, reset data)
+    - selain itu hanya baris dengan rowid > after_rowid (append / merge)
+    """
+    fts = fts_table(table)
+    if after_rowid is None:
+        cur.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        return
+    cols = SEARCH_COLUMNS[table]
+    col_sql = ", ".join(f"[{c}]" for c in cols)
+    cur.execute(
+        f"INSERT INTO {fts}(rowid, {col_sql}) SELECT rowid, {col_sql} FROM {table} WHERE rowid > ?",
+        (int(after_rowid),),
+    )
+
+
+def fts_match_expr(text: str) -> str | None:
+    """
+    Kata kunci bebas -> ekspresi MATCH FTS5: semua kata wajib ada,
+    tiap kata dicari sebagai prefix ("lapt" ketemu "laptop").
+    None kalau tidak ada kata yang bisa dicari.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_mode(filters: dict) -> str | None:
+    """Ekspresi MATCH kalau filter halaman minta cari teks (mode "teks"), selain itu None."""
+    if filters.get("search_in") != "teks":
+        return None
+    return fts_match_expr(filters.get("keyword") or "")
+
+
+def search_ledger(conn, text: str, limit: int = 20) -> dict:
+    """
+    Cari di BKU + BHP/BHM, urut relevansi (bm25). Dipakai /api/search.
+    Return {"bku": [...], "bhp_bhm": [...], "bpu": [...]}; "bpu" = nomor BPU
+    unik dari kedua hasil, urut skor terbaik.
+    """
+    expr = fts_match_expr(text)
+    out = {"bku": [], "bhp_bhm": [], "bpu": []}
+    if expr is None:
+        return out
+
+    cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
+    bku = cur.execute(
+        """
+        SELECT b.rowid AS id, b.[Tgl] AS tgl, b.[Bukti] AS bukti, b.[Uraian] AS uraian, b.[Out] AS out,
+               snippet(bku_fts, 1, '[', ']', '…', 12) AS snippet, f.rank AS score
+        FROM bku_fts f
+        JOIN bku b ON b.rowid = f.rowid
+        WHERE bku_fts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+        """,
+        (expr, int(limit)),
+    ).fetchall()
+    bhp = cur.execute(
+        """
+        SELECT h.rowid AS id, h.[Tanggal] AS tgl, h.[No Bukti] AS bukti, h.[ID Barang] AS id_barang,
+               h.[Uraian] AS uraian, h.[Jumlah Barang] AS jumlah, h.[Realisasi] AS realisasi,
+               snippet(bhp_bhm_fts, 1, '[', ']', '…', 12) AS snippet, f.rank AS score
+        FROM bhp_bhm_fts f
+        JOIN bhp_bhm h ON h.rowid = f.rowid
+        WHERE bhp_bhm_fts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+        """,
+        (expr, int(limit)),
+    ).fetchall()
+
+    out["bku"] = [dict(r) for r in bku]
+    out["bhp_bhm"] = [dict(r) for r in bhp]
+
+    best: dict = {}
+    for r in (*out["bku"], *out["bhp_bhm"]):
+        b = r["bukti"]
+        if b and (b not in best or r["score"] < best[b]):
+            best[b] = r["score"]
+    out["bpu"] = sorted(best, key=best.get)
+    return out
@@ -1,4 +1,5 @@
-from .db import get_conn
+from .db import get_conn, retry_on_busy
+from .render_cache import invalidate_render_cache
 
 def get_settings() -> dict:
     conn = get_conn()
@@ -37,6 +38,7 @@ def get_settings() -> dict:
     return defaults
 
 
+@retry_on_busy
 def save_settings(form: dict):
     conn = get_conn()
     try:
@@ -90,4 +92,5 @@ def save_settings(form: dict):
         )
         conn.commit()
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+    invalidate_render_cache()
\ No newline at end of file
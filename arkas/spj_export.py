@@ -0,0 +1,179 @@
+# arkas/spj_export.py
+from __future__ import annotations
+
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from .bpu_override import get_bpu_override
+from .config import EXPORT_BPUS_PER_TASK, EXPORT_WORKERS, PROCESS_START_METHOD
+from .queries import as_float, get_bpu_bhp_detail, get_bpu_bku_rows
+from .render_cache import render_cached
+from .settings import get_settings
+
+
+EXPORT_DOCS = ("bast", "bkp", "both")
+EXPORT_FORMATS = ("zip", "pdf")
+
+
+def prefill_kegiatan_from_bku(bku_rows) -> str:
+    """
+    Ambil kegiatan default dari BKU (baris get_bpu_bku_rows):
+    - pakai kolom NamaKegiatan jika ada
+    - fallback kolom Keg
+    """
+    if not bku_rows:
+        return ""
+    first = bku_rows[0]
+    for col in ("NamaKegiatan", "Keg"):
+        v = str((first[col] if col in first.keys() else "") or "").strip()
+        if v:
+            return v
+    return ""
+
+
+# =========================================================
+# RENDER 1 BPU (dipakai route download & export massal)
+# =========================================================
+def render_bast(bpu: str, settings: dict | None = None) -> bytes | None:
+    """PDF BAST satu BPU, None kalau BPU tidak ada di BKU."""
+    bku_rows = get_bpu_bku_rows(bpu)
+    if not bku_rows:
+        return None
+    from .pdf_docs import buat_pdf_bast  # reportlab baru dimuat saat PDF pertama dibuat
+
+    return buat_pdf_bast(bpu, bku_rows, get_bpu_bhp_detail(bpu), settings=settings)
+
+
+def render_bkp(bpu: str, settings: dict | None = None) -> bytes | None:
+    """PDF BKP (kwitansi) satu BPU, None kalau BPU tidak ada di BKU."""
+    rows = get_bpu_bku_rows(bpu)
+    if not rows:
+        return None
+
+    st = get_settings() if settings is None else settings
+    total = as_float(rows[0]["_total_out"])
+    tgl = str(rows[0]["Tgl"] or "").strip()
+    nama_sekolah = (st.get("nama_sekolah") or "").strip()
+
+    # kegiatan bisa dioverride per bpu
+    ov = get_bpu_override(bpu)
+    nama_kegiatan = (ov.get("kegiatan_override") or "").strip()
+    if not nama_kegiatan:
+        nama_kegiatan = prefill_kegiatan_from_bku(rows)
+
+    from .pdf_docs import buat_pdf_kwitansi  # reportlab baru dimuat saat PDF pertama dibuat
+
+    return buat_pdf_kwitansi(
+        bpu,
+        {
+            "nomor": bpu,
+            "tgl": tgl,
+            "telah_terima_dari": f"Bendahara BOSP {nama_sekolah}".strip(),
+            "untuk_pembayaran": nama_kegiatan or "—",
+            "jumlah": total,
+        },
+        settings=st,
+    )
+
+
+# =========================================================
+# EXPORT MASSAL (ZIP / 1 PDF gabungan), paralel per potongan BPU
+# =========================================================
+_worker_settings: dict | None = None
+
+
+def _init_worker():
+    """Settings dibaca sekali per proses worker, bukan per dokumen."""
+    global _worker_settings
+    _worker_settings = get_settings()
+
+
+def _render_chunk(task: tuple[str, list[str]]) -> list[tuple[str, bytes]]:
+    docs, bpus = task
+    settings = _worker_settings if _worker_settings is not None else get_settings()
+    out = []
+    for bpu in bpus:
+        if docs in ("bast", "both"):
+            pdf = render_cached("bast", bpu, lambda b: render_bast(b, settings))
+            if pdf:
+                out.append((f"BAST_{bpu}.pdf", pdf))
+        if docs in ("bkp", "both"):
+            pdf = render_cached("bkp", bpu, lambda b: render_bkp(b, settings))
+            if pdf:
+                out.append((f"BKP_{bpu}.pdf", pdf))
+    return out
+
+
+def _iter_rendered(bpus: list[str], docs: str, workers: int):
+    """Yield (n_bpu_selesai, [(nama_file, pdf_bytes), ...]) sesuai urutan `bpus`."""
+    step = max(1, int(EXPORT_BPUS_PER_TASK))
+    tasks = [(docs, bpus[i:i + step]) for i in range(0, len(bpus), step)]
+
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker()
+        for t in tasks:
+            yield len(t[1]), _render_chunk(t)
+        return
+
+    ctx = multiprocessing.get_context(PROCESS_START_METHOD)
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=ctx, initializer=_init_worker) as ex:
+        # map() menjaga urutan hasil = urutan BPU
+        for t, files in zip(tasks, ex.map(_render_chunk, tasks)):
+            yield len(t[1]), files
+
+
+def export_spj_documents(
+    bpus: list[str],
+    out_path: str,
+    docs: str = "both",
+    fmt: str = "zip",
+    workers: int | None = None,
+    on_progress=None,
+) -> int:
+    """
+    Render BAST/BKP untuk semua `bpus` lalu tulis ke `out_path`:
+    - fmt "zip": 1 file PDF per dokumen
+    - fmt "pdf": semua dokumen digabung jadi 1 PDF (urut BPU, BAST lalu BKP)
+    Return jumlah dokumen.
+    """
+    if docs not in EXPORT_DOCS:
+        raise ValueError(f"Jenis dokumen tidak dikenal: {docs}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format export tidak dikenal: {fmt}")
+
+    workers = EXPORT_WORKERS if workers is None else int(workers)
+    done = 0
+    n_docs = 0
+
+    if fmt == "zip":
+        with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for n, files in _iter_rendered(bpus, docs, workers):
+                for name, pdf in files:
+                    zf.writestr(name, pdf)
+                n_docs += len(files)
+                done += n
+                if on_progress is not None:
+                    on_progress(done, len(bpus))
+        return n_docs
+
+    # gabung PDF pakai pypdfium2 (sudah ikut terpasang sebagai dependency pdfplumber)
+    import pypdfium2 as pdfium
+
+    merged = pdfium.PdfDocument.new()
+    try:
+        for n, files in _iter_rendered(bpus, docs, workers):
+            for _name, pdf in files:
+                src = pdfium.PdfDocument(pdf)
+                try:
+                    merged.import_pages(src)
+                finally:
+                    src.close()
+            n_docs += len(files)
+            done += n
+            if on_progress is not None:
+                on_progress(done, len(bpus))
+        merged.save(out_path)
+    finally:
+        merged.close()
+    return n_docs
@@ -0,0 +1,112 @@
+# arkas/table_export.py
+from __future__ import annotations
+
+import csv
+import io
+import re
+import tempfile
+
+from .config import TABLE_EXPORT_CHUNK_ROWS
+from .db import get_conn
+from .queries import iter_ledger_rows, iter_spj_rows
+
+
+# =========================================================
+# EXPORT TABEL (hasil filter halaman BKU / BHP / SPJ) -> CSV / XLSX
+# Baris dibaca bertahap dari cursor SQLite dan dikirim sebagai
+# stream, jadi memori tetap kecil berapa pun jumlah barisnya.
+# =========================================================
+TABLE_EXPORT_VIEWS = {
+    "bku": ("BKU", lambda conn, f: iter_ledger_rows(conn, "bku", f)),
+    "bhp": ("BHP_BHM", lambda conn, f: iter_ledger_rows(conn, "bhp_bhm", f)),
+    "spj-bpu": ("SPJ_per_BPU", iter_spj_rows),
+}
+
+# dipakai sebagai content_type (utuh, tanpa ditambah charset lagi)
+TABLE_EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# Sel teks yang diawali karakter ini dibaca Excel / LibreOffice sebagai
+# rumus -> diberi awalan ' (tetap teks). Angka bertanda ("-1.234,56") aman.
+_CSV_FORMULA_START = ("=", "+", "-", "@", "\t", "\r")
+_CSV_ANGKA = re.compile(r"[+-]?\d[\d.,]*")
+
+
+def _csv_cell(v):
+    if isinstance(v, str) and v.startswith(_CSV_FORMULA_START) and not _CSV_ANGKA.fullmatch(v):
+        return "'" + v
+    return v
+
+
+def iter_csv(columns: list[str], rows, chunk_rows: int = TABLE_EXPORT_CHUNK_ROWS):
+    """
+    Yield bytes CSV per potongan `chunk_rows` baris (header langsung dikirim).
+    Teks yang bisa terbaca sebagai rumus diberi awalan ' (lihat _csv_cell).
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")  # BOM: Excel langsung membaca sebagai UTF-8
+    writer.writerow(columns)
+    yield buf.getvalue().encode("utf-8")
+    buf.seek(0)
+    buf.truncate()
+
+    n = 0
+    for row in rows:
+        writer.writerow([_csv_cell(v) for v in row])
+        n += 1
+        if n % chunk_rows == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_xlsx(columns: list[str], rows, sheet_title: str = "Data", chunk_bytes: int = 64 * 1024):
+    """
+    XLSX dengan openpyxl mode write-only (baris langsung ditulis ke file sementara).
+    File zip baru lengkap setelah baris terakhir, lalu dikirim per potongan.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    ws.append(columns)
+    for row in rows:
+        out = []
+        for v in row:
+            if isinstance(v, str) and v.startswith("="):
+                # teks "=..." tetap teks, bukan rumus
+                v = WriteOnlyCell(ws, value=v)
+                v.data_type = "s"
+            out.append(v)
+        ws.append(out)
+
+    with tempfile.TemporaryFile(suffix=".xlsx") as f:
+        wb.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_table_export(view: str, filters: dict, fmt: str):
+    """Generator bytes untuk Response (pakai stream_with_context: koneksi milik request)."""
+    sheet_title, query = TABLE_EXPORT_VIEWS[view]
+    conn = get_conn()
+    try:
+        cur = query(conn, filters)
+        columns = [d[0] for d in cur.description]
+        if fmt == "csv":
+            yield from iter_csv(columns, cur)
+        else:
+            yield from iter_xlsx(columns, cur, sheet_title)
+    finally:
+        conn.close()
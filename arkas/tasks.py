@@ -0,0 +1,145 @@
+# arkas/tasks.py
+from __future__ import annotations
+
+import os
+
+from .config import JOB_RESULT_FOLDER
+from .db import get_conn
+from .jobs import JobContext
+from .ledger import import_ledger_df, import_ledger_xlsx
+from .metrics import timed
+from .queries import invalidate_data_cache, list_spj_bpus
+from .spj_export import export_spj_documents
+
+
+# =========================================================
+# JOB: CONVERT PDF -> EXCEL (+ optional import ke DB)
+# =========================================================
+def run_convert_job(
+    ctx: JobContext,
+    mode: str,
+    bku_paths: list[str],
+    bhp_paths: list[str],
+    import_now: bool,
+    db_mode: str,
+) -> dict:
+    # pandas + pdfplumber baru dimuat saat ada job convert
+    import pandas as pd
+
+    from .converters import convert_bhp_pdfs, convert_bku_pdfs, count_pdf_pages
+
+    n_bku = count_pdf_pages(bku_paths) if mode in ("bku", "both") else 0
+    n_bhp = count_pdf_pages(bhp_paths) if mode in ("bhp", "both") else 0
+    total = n_bku + n_bhp
+    ctx.progress(0, total, "Membaca PDF...")
+
+    df_bku = None
+    df_bhp = None
+    if mode in ("bku", "both"):
+        with timed("convert_bku"):
+            df_bku = convert_bku_pdfs(
+                bku_paths, on_progress=lambda d, _t: ctx.progress(d, total, "Convert BKU")
+            )
+    if mode in ("bhp", "both"):
+        with timed("convert_bhp"):
+            df_bhp = convert_bhp_pdfs(
+                bhp_paths, on_progress=lambda d, _t: ctx.progress(n_bku + d, total, "Convert BHP/BHM")
+            )
+
+    rows = {
+        "bku": len(df_bku) if df_bku is not None else 0,
+        "bhp_bhm": len(df_bhp) if df_bhp is not None else 0,
+    }
+    messages = []
+
+    if import_now:
+        conn = get_conn()
+        satuan = "baris baru" if db_mode == "merge" else "baris"
+        try:
+            if df_bku is not None:
+                n = import_ledger_df(conn, "bku", df_bku, db_mode)
+                messages.append(["ok", f"✔ BKU hasil convert berhasil diimport ke database ({n} {satuan})."])
+
+            if df_bhp is not None:
+                n = import_ledger_df(conn, "bhp_bhm", df_bhp, db_mode)
+                messages.append(["ok", f"✔ BHP_BHM hasil convert berhasil diimport ke database ({n} {satuan})."])
+        finally:
+            conn.close()
+            invalidate_data_cache()
+
+        next_url = {"bku": "/", "bhp": "/bhp"}.get(mode, "/spj-bpu")
+        return {"messages": messages, "rows": rows, "next_url": next_url}
+
+    out_path = os.path.join(JOB_RESULT_FOLDER, f"OUTPUT_ARKAS_{ctx.job_id}.xlsx")
+    with timed("pandas_excel"), pd.ExcelWriter(out_path, engine="openpyxl") as writer:
+        if df_bku is not None:
+            df_bku.to_excel(writer, sheet_name="BKU", index=False)
+        if df_bhp is not None:
+            df_bhp.to_excel(writer, sheet_name="BHP_BHM", index=False)
+
+    messages.append(["ok", "✔ Convert selesai. File Excel siap diunduh."])
+    return {"messages": messages, "rows": rows, "file": out_path, "download_name": "OUTPUT_ARKAS.xlsx"}
+
+
+# =========================================================
+# JOB: IMPORT OUTPUT EXCEL (sheet BKU + BHP_BHM)
+# =========================================================
+def run_import_output_job(ctx: JobContext, save_path: str, mode: str) -> dict:
+    rows = {"bku": 0, "bhp_bhm": 0}
+    messages = []
+    satuan = "baris baru" if mode == "merge" else "baris"
+    ctx.progress(0, 2, "Import sheet BKU...")
+
+    conn = get_conn()
+    try:
+        try:
+            rows["bku"] = import_ledger_xlsx(
+                conn, "bku", save_path, "BKU", mode,
+                on_progress=lambda n: ctx.progress(0, 2, f"Import sheet BKU... {n} baris"),
+            )
+            messages.append(["ok", f"✔ BKU berhasil diimport ({rows['bku']} {satuan})."])
+        except Exception as e:
+            messages.append(["error", f"Sheet BKU tidak ditemukan / gagal dibaca: {e}"])
+        ctx.progress(1, 2, "Import sheet BHP_BHM...")
+
+        try:
+            rows["bhp_bhm"] = import_ledger_xlsx(
+                conn, "bhp_bhm", save_path, "BHP_BHM", mode,
+                on_progress=lambda n: ctx.progress(1, 2, f"Import sheet BHP_BHM... {n} baris"),
+            )
+            messages.append(["ok", f"✔ BHP_BHM berhasil diimport ({rows['bhp_bhm']} {satuan})."])
+        except Exception as e:
+            messages.append(["error", f"Sheet BHP_BHM tidak ditemukan / gagal dibaca: {e}"])
+        ctx.progress(2, 2, "Selesai")
+    finally:
+        conn.close()
+        invalidate_data_cache()
+
+    return {"messages": messages, "rows": rows, "next_url": "/import/output"}
+
+
+# =========================================================
+# JOB: EXPORT MASSAL BAST/BKP (sesuai filter SPJ)
+# =========================================================
+def run_spj_export_job(ctx: JobContext, filters: dict, docs: str, fmt: str) -> dict:
+    bpus = list_spj_bpus(filters)
+    if not bpus:
+        return {"messages": [["error", "Tidak ada BPU yang cocok dengan filter."]], "next_url": "/spj-bpu"}
+
+    ctx.progress(0, len(bpus), f"Render {len(bpus)} BPU...")
+    out_path = os.path.join(JOB_RESULT_FOLDER, f"SPJ_{ctx.job_id}.{fmt}")
+    n_docs = export_spj_documents(
+        bpus, out_path, docs, fmt,
+        on_progress=lambda d, t: ctx.progress(d, t, f"Render BPU {d}/{t}"),
+    )
+
+    bulan = (filters.get("bulan") or "").strip()
+    suffix = f"_{bulan}" if bulan and bulan != "__ALL__" else ""
+    label = {"bast": "BAST", "bkp": "BKP"}.get(docs, "BAST_BKP")
+    return {
+        "messages": [["ok", f"✔ {n_docs} dokumen ({len(bpus)} BPU) siap diunduh."]],
+        "rows": {"bpu": len(bpus), "dokumen": n_docs},
+        "file": out_path,
+        "download_name": f"SPJ_{label}{suffix}.{fmt}",
+        "mimetype": "application/zip" if fmt == "zip" else "application/pdf",
+    }
@@ -0,0 +1,247 @@
+# arkas/uploads.py
+from __future__ import annotations
+
+import errno
+import functools
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+
+from flask import Request, request
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from .pdf_cache import remember_sha256
+
+
+# =========================================================
+# SIMPAN FILE UPLOAD (aman untuk beberapa worker / request bersamaan)
+# Tanpa file lock: tiap request dapat folder unik, file ditulis ke nama
+# sementara lalu di-rename (atomic di filesystem yang sama). Dua upload
+# dengan nama file sama tidak saling menimpa, dan job tidak pernah membaca
+# file yang belum selesai ditulis.
+# =========================================================
+def new_upload_dir(folder: str) -> str:
+    """Folder baru yang unik di bawah `folder` untuk upload satu request."""
+    os.makedirs(folder, exist_ok=True)
+    prefix = datetime.now().strftime("%Y%m%d_%H%M%S_")
+    return tempfile.mkdtemp(prefix=prefix, dir=folder)
+
+
+def save_upload(file_storage, folder: str, filename: str | None = None) -> str:
+    """
+    Simpan FileStorage ke folder/filename (default: nama asli yang sudah
+    di-secure_filename). Return path file.
+
+    Upload yang sudah di-stream ke disk (lihat UploadRequest) cukup
+    di-rename, tanpa salin ulang. SHA-256 isi file dicatat untuk
+    pdf_cache.file_sha256 (convert tidak perlu membaca file lagi).
+    """
+    name = filename or secure_filename(file_storage.filename or "") or "upload"
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+
+    stream = file_storage.stream
+    if isinstance(stream, UploadFile):
+        digest = stream.commit(path)
+    else:
+        digest = _copy_hashed(stream, folder, path)
+    remember_sha256(path, digest)
+    return path
+
+
+def _copy_hashed(stream, folder: str, path: str) -> str:
+    """Fallback (stream bukan UploadFile): salin per potongan sambil hash."""
+    h = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(prefix=".part-", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_BYTES), b""):
+                h.update(chunk)
+                f.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        _silent_remove(tmp)
+        raise
+    return h.hexdigest()
+
+
+def _silent_remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# =========================================================
+# STREAMING UPLOAD: multipart langsung ke folder tujuan
+# Default werkzeug menampung file di memori (<= 500 KB) / file sementara
+# di TMP, lalu f.save() menyalin lagi. Route yang diberi @streamed_upload
+# menulis tiap potongan langsung ke folder tujuan sambil menghitung SHA-256
+# dan ukuran, jadi memori per upload = satu potongan parser (64 KB).
+# =========================================================
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadFile:
+    """
+    Wadah satu file upload di disk (file .part-* di folder tujuan).
+    Batas ukuran dicek setiap potongan masuk -> 413 sebelum sisa body dibaca.
+    """
+
+    def __init__(self, folder: str, max_bytes: int | None):
+        fd, self.path = tempfile.mkstemp(prefix=".part-", dir=folder)
+        self._f = os.fdopen(fd, "w+b")
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.committed = False
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            self.discard()
+            raise RequestEntityTooLarge(
+                f"File upload lebih besar dari {self.max_bytes // (1024 * 1024)} MB."
+            )
+        self._hash.update(data)
+        return self._f.write(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def commit(self, path: str) -> str:
+        """Pindahkan file ke `path` (rename, bukan salin). Return SHA-256."""
+        self._f.close()
+        try:
+            os.replace(self.path, path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # folder tujuan di filesystem lain: salin (tetap lewat .part-* + rename)
+            with open(self.path, "rb") as src:
+                _copy_hashed(src, os.path.dirname(path), path)
+            _silent_remove(self.path)
+        self.path = path
+        self.committed = True
+        return self.sha256
+
+    def discard(self):
+        """Buang file yang tidak dipakai route (ekstensi salah, validasi gagal)."""
+        if not self._f.closed:
+            self._f.close()
+        if not self.committed:
+            _silent_remove(self.path)
+
+    def __getattr__(self, name):
+        # read / seek / tell / close / flush ... -> file aslinya
+        if name == "_f":
+            raise AttributeError(name)
+        return getattr(self._f, name)
+
+
+class _DiscardFile:
+    """Tujuan file yang ekstensinya tidak diizinkan: isi dibuang, tidak ke disk."""
+
+    size = 0
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def seek(self, *args) -> int:
+        return 0
+
+    def tell(self) -> int:
+        return 0
+
+    def read(self, *args) -> bytes:
+        return b""
+
+    readline = read
+
+    def close(self):
+        pass
+
+
+class _UploadSpec:
+    def __init__(self, folder: str, allowed: set[str] | None, max_bytes: int | None, per_request_dir: bool):
+        self.folder = folder
+        self.allowed = allowed
+        self.max_bytes = max_bytes
+        self.per_request_dir = per_request_dir
+        self.dir: str | None = None
+
+    def target_dir(self) -> str:
+        if self.dir is None:
+            self.dir = new_upload_dir(self.folder) if self.per_request_dir else self.folder
+            os.makedirs(self.dir, exist_ok=True)
+        return self.dir
+
+
+class UploadRequest(Request):
+    """Request Flask yang memakai _UploadSpec route (kalau ada) untuk file upload."""
+
+    upload_spec: _UploadSpec | None = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        spec = self.upload_spec
+        if spec is None:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        if spec.allowed is not None:
+            _, ext = os.path.splitext((filename or "").lower())
+            if ext not in spec.allowed:
+                return _DiscardFile()
+        stream = UploadFile(spec.target_dir(), spec.max_bytes)
+        self._upload_files.append(stream)
+        return stream
+
+    @property
+    def _upload_files(self) -> list[UploadFile]:
+        return self.__dict__.setdefault("_arkas_upload_files", [])
+
+    def close(self):
+        super().close()
+        # file yang tidak di-save_upload route -> buang dari disk
+        for stream in self.__dict__.get("_arkas_upload_files", ()):
+            stream.discard()
+        spec = self.upload_spec
+        if spec is not None and spec.per_request_dir and spec.dir is not None:
+            try:
+                os.rmdir(spec.dir)  # hanya kalau kosong (semua upload ditolak)
+            except OSError:
+                pass
+
+
+def streamed_upload(folder: str, allowed: set[str] | None = None, max_bytes: int | None = None,
+                    per_request_dir: bool = True):
+    """
+    Decorator route upload: file di-stream ke `folder` (subfolder unik per
+    request kalau per_request_dir). Harus terpasang sebelum route membaca
+    request.form / request.files (form diparse saat pertama diakses).
+    """
+
+    def deco(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if isinstance(request._get_current_object(), UploadRequest):
+                request.upload_spec = _UploadSpec(folder, allowed, max_bytes, per_request_dir)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+def request_upload_dir(folder: str) -> str:
+    """Folder tujuan upload request ini (dari @streamed_upload), atau folder unik baru."""
+    spec = getattr(request, "upload_spec", None)
+    if spec is not None:
+        return spec.target_dir()
+    return new_upload_dir(folder)
+
+
+def init_app(app):
+    app.request_class = UploadRequest
@@ -0,0 +1,47 @@
+# bench/__init__.py
+"""
+Benchmark ARKAS: data sintetis (bench.datagen) + pengukuran (bench.run).
+
+Semua file (database, cache PDF, foto, PDF/XLSX hasil generate) ditaruh di
+satu folder kerja, arkas.db milik aplikasi tidak pernah disentuh.
+
+    python -m bench.datagen --rows 100000 --workdir /tmp/arkas-bench
+    python -m bench.run --rows 100000 --workdir /tmp/arkas-bench
+    python -m bench.run --compare bench/results/lama.json bench/results/baru.json
+    python -m bench.load --server gunicorn --workers 1,4,16      # load test HTTP
+"""
+from __future__ import annotations
+
+import os
+
+
+def use_workdir(workdir: str) -> dict:
+    """
+    Arahkan modul arkas ke folder kerja benchmark (harus dipanggil sebelum
+    koneksi database pertama). Return path yang dipakai.
+    """
+    from arkas import bpu_override, converters, db, pdf_cache, pdf_docs, photos, render_cache
+
+    workdir = os.path.abspath(workdir)
+    paths = {
+        "workdir": workdir,
+        "db": os.path.join(workdir, "arkas.db"),
+        "pdf_cache_db": os.path.join(workdir, "pdf_cache.db"),
+        "render_cache_dir": os.path.join(workdir, "render_cache"),
+        "photo_dir": os.path.join(workdir, "photos"),
+        "pdf_dir": os.path.join(workdir, "pdf"),
+        "xlsx": os.path.join(workdir, "OUTPUT_ARKAS.xlsx"),
+    }
+    for key in ("workdir", "photo_dir", "pdf_dir", "render_cache_dir"):
+        os.makedirs(paths[key], exist_ok=True)
+
+    db.DB_PATH = paths["db"]
+    pdf_cache.PDF_CACHE_DB = paths["pdf_cache_db"]
+    render_cache.PDF_CACHE_DB = paths["pdf_cache_db"]
+    render_cache.RENDER_CACHE_DIR = paths["render_cache_dir"]
+    # yang diukur render PDF-nya, bukan cache hasil render
+    render_cache.RENDER_CACHE_ENABLED = False
+    converters.PDF_CACHE_ENABLED = False
+    for mod in (bpu_override, pdf_docs, photos, render_cache):
+        mod.STATIC_PHOTO_DIR = paths["photo_dir"]
+    return paths
@@ -0,0 +1,377 @@
+# bench/datagen.py
+"""
+Generator data ARKAS sintetis untuk benchmark.
+
+Isi database mengikuti pola data asli: BPU bernomor urut lintas tahun,
+1 BPU = 1 tanggal + 1..6 baris BKU, BPU belanja barang punya rincian
+BHP/BHM (Realisasi = Jumlah x Harga, total = Out BKU), saldo berjalan,
+penerimaan dana per tahap (Januari & Juli). Data dimasukkan lewat
+import_ledger_rows, jadi bpu_summary, rekap, index FTS dll. ikut terisi
+persis seperti import dari aplikasi.
+
+Seed sama -> data sama (bisa dibandingkan antar commit).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from . import use_workdir
+
+
+BKU_HEADER = ["Tgl", "Keg", "Rek", "Bukti", "Uraian", "In", "Out", "Saldo"]
+BHP_HEADER = [
+    "Tanggal", "Kode Kegiatan", "Kode Rekening", "No Bukti", "ID Barang",
+    "Uraian", "Jumlah Barang", "Harga Satuan", "Realisasi", "Sumber Data",
+]
+
+_KEGIATAN_KATA = (
+    "Pengembangan Perpustakaan", "Penerimaan Peserta Didik Baru", "Kegiatan Pembelajaran",
+    "Kegiatan Ekstrakurikuler", "Asesmen dan Evaluasi Pembelajaran", "Administrasi Kegiatan Sekolah",
+    "Pengembangan Profesi Guru", "Langganan Daya dan Jasa", "Pemeliharaan Sarana dan Prasarana",
+    "Penyediaan Alat Multimedia Pembelajaran", "Pembayaran Honor", "Perjalanan Dinas",
+)
+_REKAP = (
+    "Belanja Bahan Habis Pakai", "Belanja Bahan Material", "Belanja Jasa Kantor",
+    "Belanja Honorarium", "Belanja Perjalanan Dinas", "Belanja Pemeliharaan",
+    "Belanja Modal Peralatan dan Mesin", "Belanja Modal Buku",
+)
+_BARANG = (
+    "Kertas HVS A4 70gr", "Tinta Printer Epson 003", "Spidol Whiteboard", "Buku Tulis 38 lbr",
+    "Sapu Ijuk", "Cairan Pembersih Lantai", "Lampu LED 18W", "Kabel Roll 10m", "Map Plastik",
+    "Buku Paket Matematika Kelas 4", "Flashdisk 32GB", "Akses Point", "Semen 50kg", "Cat Tembok 5kg",
+)
+_JASA = (
+    "Transport Pengambilan Dana BOS", "Honor Guru Ekstrakurikuler", "Internet Kantor",
+    "Langganan Listrik", "Konsumsi Rapat Komite", "Biaya Administrasi Bank", "Fotokopi Soal Ujian",
+)
+_NAMA = ("Andri", "Budi Santoso", "Siti Aminah", "Dewi Lestari", "Rahmat Hidayat", "Sri Wahyuni", "Agus Salim")
+_TOKO = ("CV Maju Jaya", "Toko Sinar Abadi", "PT Sumber Ilmu", "UD Berkah", "Toko Buku Cerdas", "CV Mitra Sekolah")
+
+
+def _masters(rnd: random.Random, n_kegiatan: int, n_rekening: int):
+    kegiatan = []
+    for i in range(n_kegiatan):
+        kode = f"{i // 100 + 1:02d}.{i // 10 % 10 + 1:02d}.{i % 10 + 1:02d}."
+        kegiatan.append((kode, f"{rnd.choice(_KEGIATAN_KATA)} {i + 1}"))
+    rekening = []
+    for i in range(n_rekening):
+        jenis = "5.2.02" if i % 5 == 4 else "5.1.02"  # sebagian belanja modal
+        kode = f"{jenis}.{i // 100 + 1:02d}.01.{i % 100 + 1:04d}"
+        rekap = rnd.choice(_REKAP[6:] if jenis == "5.2.02" else _REKAP[:6])
+        rekening.append((kode, f"Belanja {rnd.choice(_BARANG + _JASA)} {i + 1}", rekap))
+    return kegiatan, rekening
+
+
+def iter_bpus(bku_rows: int, years: list[int], seed: int, kegiatan: list, rekening: list):
+    """
+    Yield 1 dict per BPU (urut tanggal): {bpu, tgl, keg, rek, bku: [(uraian, in, out)], bhp: [...]}.
+    Deterministik: dipanggil 2x dengan argumen sama -> hasil sama (BKU & BHP
+    bisa ditulis terpisah tanpa menyimpan semuanya di memori).
+    """
+    rnd = random.Random(seed)
+    per_year = max(1, bku_rows // len(years))
+    bpu_no = 0
+    for year in years:
+        start = date(year, 1, 2)
+        days = (date(year, 12, 20) - start).days
+        # baris 0 = penerimaan tahap 1, baris tengah = tahap 2
+        n = 0
+        tahap2_done = False
+        yield {
+            "bpu": f"BPU{bpu_no + 1:02d}",
+            "tgl": start,
+            "keg": kegiatan[0][0],
+            "rek": rekening[0][0],
+            "bku": [(f"Penerimaan Dana BOS Tahap 1 {year}", per_year * 1_000_000, 0)],
+            "bhp": [],
+        }
+        bpu_no += 1
+        n += 1
+        while n < per_year:
+            tgl = start + timedelta(days=days * n // per_year)
+            if not tahap2_done and tgl.month >= 7:
+                tahap2_done = True
+                bpu_no += 1
+                n += 1
+                yield {
+                    "bpu": f"BPU{bpu_no:02d}",
+                    "tgl": tgl,
+                    "keg": kegiatan[0][0],
+                    "rek": rekening[0][0],
+                    "bku": [(f"Penerimaan Dana BOS Tahap 2 {year}", per_year * 1_000_000, 0)],
+                    "bhp": [],
+                }
+                continue
+
+            bpu_no += 1
+            bpu = f"BPU{bpu_no:02d}"
+            keg = rnd.choice(kegiatan)[0]
+            rek = rnd.choice(rekening)[0]
+            if rnd.random() < 0.45:
+                # belanja barang: 1 baris BKU, rincian barang di BHP/BHM
+                items = []
+                for _ in range(rnd.choice((1, 1, 2, 3, 4, 6))):
+                    jumlah = rnd.randint(1, 20)
+                    harga = rnd.randint(5, 300) * 1000
+                    items.append((
+                        f"1.1.7.{rnd.randint(1, 9):02d}.{rnd.randint(1, 99):02d}.{rnd.randint(1, 999):03d}.{rnd.randint(1, 9999):04d}",
+                        rnd.choice(_BARANG),
+                        jumlah,
+                        harga,
+                        jumlah * harga,
+                    ))
+                total = sum(it[4] for it in items)
+                rows = [(f"Belanja {items[0][1]}" + (" dkk" if len(items) > 1 else ""), 0, total)]
+            else:
+                items = []
+                rows = [
+                    (f"{rnd.choice(_JASA)} {rnd.choice(_NAMA)}", 0, rnd.randint(10, 1500) * 1000)
+                    for _ in range(rnd.choice((1, 1, 1, 2, 2, 3, 4, 6)))
+                ]
+            n += len(rows)
+            yield {"bpu": bpu, "tgl": tgl, "keg": keg, "rek": rek, "bku": rows, "bhp": items}
+
+
+def iter_bku_rows(bpus):
+    saldo = 0
+    for b in bpus:
+        tgl = b["tgl"].strftime("%d-%m-%Y")
+        for uraian, masuk, keluar in b["bku"]:
+            saldo += masuk - keluar
+            yield (tgl, b["keg"], b["rek"], b["bpu"], uraian, masuk, keluar, saldo)
+
+
+def iter_bhp_rows(bpus, sumber: str = "bhp-sintetis.pdf"):
+    for b in bpus:
+        tgl = b["tgl"].strftime("%d-%m-%Y")
+        for id_barang, uraian, jumlah, harga, realisasi in b["bhp"]:
+            yield (tgl, b["keg"], b["rek"], b["bpu"], id_barang, uraian, jumlah, harga, realisasi, sumber)
+
+
+# =========================================================
+# DATABASE
+# =========================================================
+def _fill_settings(conn):
+    conn.execute(
+        """
+        UPDATE app_settings SET
+            nama_sekolah = 'SD Negeri 1 Sintetis', npsn = '10800000', alamat = 'Jl. Pendidikan No. 1',
+            kab_kota = 'Lampung Tengah', tahun = '2025', tempat_ttd = 'Sintetis',
+            kepala_sekolah_nama = 'Kepala Sekolah, S.Pd.', kepala_sekolah_nip = '197500000000000001',
+            bendahara_nama = 'Bendahara, S.Pd.', bendahara_nip = '198700000000000002',
+            pihak1_nama = 'Penyedia', pihak1_jabatan = 'Direktur', pihak1_perusahaan = 'CV Maju Jaya',
+            pihak2_nama = 'Kepala Sekolah, S.Pd.', pihak2_jabatan = 'Kepala Sekolah'
+        WHERE id = 1
+        """
+    )
+
+
+def _make_photo(path: str, seed: int, size=(1600, 1200)):
+    from PIL import Image, ImageDraw
+
+    rnd = random.Random(seed)
+    im = Image.new("RGB", size, tuple(rnd.randint(60, 200) for _ in range(3)))
+    draw = ImageDraw.Draw(im)
+    for _ in range(40):
+        x, y = rnd.randint(0, size[0]), rnd.randint(0, size[1])
+        draw.rectangle((x, y, x + rnd.randint(20, 400), y + rnd.randint(20, 300)),
+                       fill=tuple(rnd.randint(0, 255) for _ in range(3)))
+    im.save(path, "JPEG", quality=90)
+
+
+def generate_db(
+    workdir: str,
+    bku_rows: int = 10_000,
+    years: list[int] | None = None,
+    seed: int = 1,
+    n_kegiatan: int = 150,
+    n_rekening: int = 300,
+    override_ratio: float = 0.1,
+    n_photos: int = 20,
+) -> dict:
+    """Buat workdir/arkas.db baru. Return ringkasan (jumlah baris, BPU, durasi)."""
+    paths = use_workdir(workdir)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(paths["db"] + suffix):
+            os.remove(paths["db"] + suffix)
+
+    from arkas.bpu_override import add_bpu_photo
+    from arkas.bpu_summary import rebuild_bpu_summary
+    from arkas.db import get_conn
+    from arkas.db_init import init_db
+    from arkas.ledger import BHP_COLUMNS, BKU_COLUMNS, import_ledger_rows
+    from arkas.rekap import rebuild_rekap
+
+    t0 = time.perf_counter()
+    years = years or [2023, 2024, 2025]
+    init_db()
+
+    rnd = random.Random(seed)
+    kegiatan, rekening = _masters(rnd, n_kegiatan, n_rekening)
+
+    conn = get_conn()
+    try:
+        conn.executemany("INSERT INTO master_kegiatan (kode_kegiatan, nama_kegiatan) VALUES (?, ?)", kegiatan)
+        conn.executemany(
+            "INSERT INTO master_rekening (kode_rekening_belanja, nama_rekening_belanja, rekap_rekening_belanja) "
+            "VALUES (?, ?, ?)",
+            rekening,
+        )
+        _fill_settings(conn)
+        conn.commit()
+
+        assert BKU_COLUMNS == BKU_HEADER and BHP_COLUMNS == BHP_HEADER
+        n_bku = import_ledger_rows(
+            conn, "bku", BKU_HEADER, iter_bku_rows(iter_bpus(bku_rows, years, seed, kegiatan, rekening)), "replace"
+        )
+        n_bhp = import_ledger_rows(
+            conn, "bhp_bhm", BHP_HEADER, iter_bhp_rows(iter_bpus(bku_rows, years, seed, kegiatan, rekening)), "replace"
+        )
+
+        bpus = [r[0] for r in conn.execute("SELECT bpu FROM bpu_summary ORDER BY bpu_seq").fetchall()]
+        ov = rnd.sample(bpus, int(len(bpus) * override_ratio))
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        conn.executemany(
+            """
+            INSERT INTO bpu_override
+              (bpu, kegiatan_override, pihak1_nama, pihak1_jabatan, pihak1_perusahaan, pihak1_alamat, pihak1_telp, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (b, f"{rnd.choice(_KEGIATAN_KATA)} (override)", rnd.choice(_NAMA), "Pemilik", rnd.choice(_TOKO),
+                 "Jl. Raya No. 10", f"08{rnd.randint(10**9, 10**10 - 1)}", now)
+                for b in ov
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO pihak1_history (nama, jabatan, perusahaan, alamat, telp, last_used_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"{n} {i}", "Pemilik", t, "Jl. Raya No. 10", "0812000000", now)
+             for i in range(max(10, len(ov) // 5)) for n, t in [(rnd.choice(_NAMA), rnd.choice(_TOKO))]],
+        )
+        rebuild_bpu_summary(conn.cursor())
+        rebuild_rekap(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+    # foto lewat jalur upload asli (varian cetak + thumbnail)
+    photo_bpus = [b for b in bpus if b not in ov][: n_photos // 2] + ov[: n_photos - n_photos // 2]
+    for i, b in enumerate(photo_bpus):
+        fn = f"{b}_foto{i}.jpg"
+        _make_photo(os.path.join(paths["photo_dir"], fn), seed + i)
+        add_bpu_photo(b, fn)
+
+    info = {
+        "bku_rows": bku_rows,
+        "years": years,
+        "seed": seed,
+        "n_kegiatan": n_kegiatan,
+        "n_rekening": n_rekening,
+        "override_ratio": override_ratio,
+        "n_photos": n_photos,
+        "rows": {"bku": n_bku, "bhp_bhm": n_bhp, "bpu": len(bpus), "override": len(ov), "photos": len(photo_bpus)},
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+    with open(os.path.join(paths["workdir"], "datagen.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+# =========================================================
+# FILE INPUT: workbook OUTPUT_ARKAS (import) & PDF laporan (converter)
+# =========================================================
+def write_output_xlsx(path: str, bku_rows: int, years: list[int], seed: int = 1):
+    """Workbook format OUTPUT_ARKAS (sheet BKU + BHP_BHM), ditulis mode write-only."""
+    from openpyxl import Workbook
+
+    kegiatan, rekening = _masters(random.Random(seed), 150, 300)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("BKU")
+    ws.append(BKU_HEADER)
+    for row in iter_bku_rows(iter_bpus(bku_rows, years, seed, kegiatan, rekening)):
+        ws.append(row)
+    ws = wb.create_sheet("BHP_BHM")
+    ws.append(BHP_HEADER)
+    for row in iter_bhp_rows(iter_bpus(bku_rows, years, seed, kegiatan, rekening)):
+        ws.append(row)
+    wb.save(path)
+
+
+def _rupiah(v: int, sen: bool = True) -> str:
+    # laporan BKU pakai ",00", laporan BHP/BHM tanpa desimal
+    return f"{v:,}".replace(",", ".") + (",00" if sen else "")
+
+
+def write_report_pdfs(pdf_dir: str, pages: int, rows_per_page: int = 25, seed: int = 1) -> dict:
+    """
+    PDF tabel bergaris mirip laporan BKU / BHP-BHM ARKAS (dibaca pdfplumber
+    seperti file asli). Return {"bku": path, "bhp": path}.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
+
+    kegiatan, rekening = _masters(random.Random(seed), 150, 300)
+    style = TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.black), ("FONTSIZE", (0, 0), (-1, -1), 6)])
+    need = pages * rows_per_page
+
+    def bpus():
+        # BHP/BHM ~0.7 baris per baris BKU, jadi dibuat lebih banyak lalu dipotong
+        return iter_bpus(need * 4 + 100, [2025], seed, kegiatan, rekening)
+
+    out = {"bku": os.path.join(pdf_dir, "bku-sintetis.pdf"), "bhp": os.path.join(pdf_dir, "bhp-sintetis.pdf")}
+
+    bku = iter_bku_rows(bpus())
+    story = []
+    for _ in range(pages):
+        data = [["Tanggal", "Kode Kegiatan", "Kode Rekening", "No. Bukti", "Uraian", "Penerimaan", "Pengeluaran", "Saldo"]]
+        for tgl, keg, rek, bukti, uraian, masuk, keluar, saldo in (next(bku) for _ in range(rows_per_page)):
+            data.append([tgl, keg, rek, bukti, uraian, _rupiah(masuk), _rupiah(keluar), _rupiah(saldo)])
+        story += [Table(data, style=style), PageBreak()]
+    SimpleDocTemplate(out["bku"], pagesize=landscape(A4)).build(story)
+
+    bhp = iter_bhp_rows(bpus())
+    story = []
+    for _ in range(pages):
+        data = [["Tanggal", "Kode Kegiatan", "Kode Rekening", "No Bukti", "ID Barang", "Uraian", "Jumlah", "Harga", "Realisasi"]]
+        for tgl, keg, rek, bukti, id_barang, uraian, jumlah, harga, realisasi, _src in (
+            next(bhp) for _ in range(rows_per_page)
+        ):
+            data.append([tgl, keg, rek, bukti, id_barang, uraian, str(jumlah), _rupiah(harga, False), _rupiah(realisasi, False)])
+        story += [Table(data, style=style), PageBreak()]
+    SimpleDocTemplate(out["bhp"], pagesize=landscape(A4)).build(story)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate data ARKAS sintetis untuk benchmark")
+    ap.add_argument("--workdir", default=os.path.join("bench", "work"))
+    ap.add_argument("--rows", type=int, default=10_000, help="jumlah baris BKU (1k .. 1M)")
+    ap.add_argument("--years", default="2023,2024,2025")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--override-ratio", type=float, default=0.1)
+    ap.add_argument("--photos", type=int, default=20)
+    ap.add_argument("--pdf-pages", type=int, default=0, help="juga buat PDF laporan (jumlah halaman)")
+    ap.add_argument("--xlsx", action="store_true", help="juga buat workbook OUTPUT_ARKAS.xlsx")
+    args = ap.parse_args(argv)
+
+    years = [int(y) for y in args.years.split(",") if y.strip()]
+    info = generate_db(
+        args.workdir, args.rows, years, args.seed, override_ratio=args.override_ratio, n_photos=args.photos
+    )
+    print(json.dumps(info, indent=2))
+    paths = use_workdir(args.workdir)
+    if args.xlsx:
+        write_output_xlsx(paths["xlsx"], args.rows, years, args.seed)
+        print("xlsx:", paths["xlsx"])
+    if args.pdf_pages:
+        print("pdf:", write_report_pdfs(paths["pdf_dir"], args.pdf_pages, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
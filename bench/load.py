@@ -0,0 +1,302 @@
+# bench/load.py
+"""
+Load test HTTP (gaya wrk): beberapa klien keep-alive menembak campuran
+halaman ARKAS selama N detik, lalu lapor request/detik + latensi.
+
+    # server dijalankan sendiri oleh script, 1 / 4 / 16 worker gunicorn
+    python -m bench.load --server gunicorn --workers 1,4,16 --rows 100000
+
+    # server yang sudah jalan
+    python -m bench.load --url http://127.0.0.1:8000 --workdir bench/work
+
+Data = database sintetis bench.datagen di --workdir (dibuat kalau belum ada);
+server yang dijalankan script diarahkan ke sana lewat environment ARKAS_*.
+--write-ratio > 0 menambah POST edit BPU (uji lock SQLite antar worker).
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# =========================================================
+# SKENARIO
+# =========================================================
+def scenario(db_path: str) -> list[tuple[str, str, int]]:
+    """(method, path, bobot) dari isi database benchmark."""
+    conn = sqlite3.connect(db_path)
+    try:
+        one = lambda sql: conn.execute(sql).fetchone()[0]  # noqa: E731
+        bpu = one("SELECT bpu FROM bpu_summary ORDER BY bpu_seq LIMIT 1 OFFSET (SELECT COUNT(1) / 2 FROM bpu_summary)")
+        kegiatan = one("SELECT nama_kegiatan FROM bpu_summary GROUP BY 1 ORDER BY COUNT(1) DESC LIMIT 1")
+        word = (one("SELECT Uraian FROM bku WHERE Uraian > '' LIMIT 1 OFFSET 100") or "belanja").split()[0]
+    finally:
+        conn.close()
+
+    return [
+        ("GET", "/", 20),
+        ("GET", "/?page=5", 10),
+        ("GET", "/?" + urlencode({"kegiatan": kegiatan}), 10),
+        ("GET", "/bhp", 10),
+        ("GET", "/spj-bpu", 10),
+        ("GET", "/rekap", 5),
+        ("GET", "/api/search?" + urlencode({"q": word}), 10),
+        ("GET", "/api/pihak1/search?q=a", 10),
+        ("GET", f"/bast/{quote(bpu)}", 5),
+        ("GET", f"/bkp/{quote(bpu)}/pdf", 5),
+        ("POST", f"/bpu/{quote(bpu)}/edit", 0),
+    ]
+
+
+def _write_body(i: int) -> bytes:
+    return urlencode({
+        "kegiatan_override": "",
+        "pihak1_nama": f"CV Beban Uji {i % 50}",
+        "pihak1_jabatan": "Direktur",
+        "pihak1_perusahaan": f"CV Beban Uji {i % 50}",
+        "pihak1_alamat": "Jl. Sintetis",
+        "pihak1_telp": "0800",
+    }).encode()
+
+
+# =========================================================
+# KLIEN (proses x thread, koneksi keep-alive per thread)
+# =========================================================
+def _client_thread(host, port, plan, deadline, seed, out):
+    rnd = random.Random(seed)
+    lat, errors, status = [], 0, {}
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    i = 0
+    while time.perf_counter() < deadline:
+        method, path = rnd.choice(plan)
+        body, headers = None, {}
+        if method == "POST":
+            body = _write_body(seed * 100_000 + i)
+            headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+            continue
+        lat.append(time.perf_counter() - t0)
+        status[resp.status] = status.get(resp.status, 0) + 1
+        if resp.will_close:
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+    conn.close()
+    out.append((lat, errors, status))
+
+
+def _client_process(host, port, plan, duration, threads, seed, queue):
+    out: list = []
+    deadline = time.perf_counter() + duration
+    ts = [
+        threading.Thread(target=_client_thread, args=(host, port, plan, deadline, seed * 1000 + k, out))
+        for k in range(threads)
+    ]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    lat = [x for o in out for x in o[0]]
+    status: dict = {}
+    for o in out:
+        for k, v in o[2].items():
+            status[k] = status.get(k, 0) + v
+    queue.put((lat, sum(o[1] for o in out), status))
+
+
+def load(url: str, plan: list[str], duration: float, concurrency: int, processes: int) -> dict:
+    """Tembak `url` selama `duration` detik dengan `concurrency` koneksi."""
+    u = urlsplit(url)
+    host, port = u.hostname, u.port or 80
+    processes = max(1, min(processes, concurrency))
+    per_proc = [concurrency // processes + (1 if k < concurrency % processes else 0) for k in range(processes)]
+
+    queue = multiprocessing.Queue()
+    procs = [
+        multiprocessing.Process(target=_client_process, args=(host, port, plan, duration, n, k + 1, queue))
+        for k, n in enumerate(per_proc)
+    ]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    parts = [queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    lat = sorted(x for part in parts for x in part[0])
+    status: dict = {}
+    for part in parts:
+        for k, v in part[2].items():
+            status[str(k)] = status.get(str(k), 0) + v
+    q = lambda p: lat[min(len(lat) - 1, int(p * len(lat)))] * 1000 if lat else None  # noqa: E731
+    return {
+        "requests": len(lat),
+        "errors": sum(part[1] for part in parts),
+        "status": status,
+        "seconds": round(elapsed, 2),
+        "rps": round(len(lat) / duration, 1),
+        "p50_ms": q(0.50),
+        "p95_ms": q(0.95),
+        "p99_ms": q(0.99),
+        "mean_ms": statistics.fmean(lat) * 1000 if lat else None,
+    }
+
+
+# =========================================================
+# SERVER LOKAL
+# =========================================================
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_env(workdir: str) -> dict:
+    workdir = os.path.abspath(workdir)
+    env = dict(os.environ)
+    env.update({
+        "ARKAS_DB_PATH": os.path.join(workdir, "arkas.db"),
+        "ARKAS_PDF_CACHE_DB": os.path.join(workdir, "pdf_cache.db"),
+        "ARKAS_RENDER_CACHE_DIR": os.path.join(workdir, "render_cache"),
+        "ARKAS_UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "ARKAS_PDF_UPLOAD_FOLDER": os.path.join(workdir, "pdf_uploads"),
+        "ARKAS_JOB_RESULT_FOLDER": os.path.join(workdir, "job_results"),
+        "ARKAS_SECRET_KEY": "bench",
+        "PYTHONPATH": ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return env
+
+
+def start_server(kind: str, workers: int, threads: int, workdir: str) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    bind = f"127.0.0.1:{port}"
+    env = _server_env(workdir)
+    env.update({"ARKAS_BIND": bind, "ARKAS_WORKERS": str(workers), "ARKAS_THREADS": str(threads)})
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+               "--log-level", "warning", "wsgi:app"]
+    elif kind == "waitress":
+        # waitress: satu proses, worker = thread
+        env["ARKAS_THREADS"] = str(workers * threads)
+        cmd = [sys.executable, os.path.join(ROOT, "wsgi.py")]
+    else:
+        raise ValueError(f"server tidak dikenal: {kind}")
+
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    url = f"http://{bind}"
+    t_end = time.time() + 60
+    while time.time() < t_end:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{kind} berhenti saat start (exit {proc.returncode})")
+        try:
+            c = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            c.request("GET", "/rekap")
+            c.getresponse().read()
+            c.close()
+            return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{kind} tidak merespons di {url}")
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def _ensure_data(workdir: str, rows: int):
+    from .datagen import generate_db
+
+    if not os.path.exists(os.path.join(workdir, "datagen.json")):
+        print(f"generate data sintetis: {rows} baris BKU -> {workdir}")
+        generate_db(workdir, bku_rows=rows)
+    # server menjalankan migrasi sendiri saat start (init_db)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test HTTP ARKAS")
+    ap.add_argument("--url", help="server yang sudah jalan (tanpa --server)")
+    ap.add_argument("--server", choices=("gunicorn", "waitress"), default="gunicorn")
+    ap.add_argument("--workers", default="1,4,16", help="jumlah worker yang dicoba (pisah koma)")
+    ap.add_argument("--threads", type=int, default=1, help="thread per worker gunicorn")
+    ap.add_argument("--workdir", default=os.path.join("bench", "work"))
+    ap.add_argument("--rows", type=int, default=10_000, help="baris BKU kalau data belum ada")
+    ap.add_argument("--duration", type=float, default=15.0, help="detik per putaran")
+    ap.add_argument("--warmup", type=float, default=3.0, help="detik pemanasan (tidak dihitung)")
+    ap.add_argument("--concurrency", type=int, default=32, help="koneksi klien bersamaan")
+    ap.add_argument("--client-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--write-ratio", type=float, default=0.0, help="porsi request POST edit BPU (0..1)")
+    ap.add_argument("--out", help="file JSON hasil (default bench/results/load-<waktu>.json)")
+    args = ap.parse_args(argv)
+
+    _ensure_data(args.workdir, args.rows)
+    weighted = scenario(os.path.join(args.workdir, "arkas.db"))
+    reads = [(m, p) for m, p, w in weighted for _ in range(w) if m == "GET"]
+    writes = [(m, p) for m, p, _ in weighted if m == "POST"]
+    n_write = round(len(reads) * args.write_ratio / max(1e-9, 1 - args.write_ratio)) if args.write_ratio else 0
+    plan = reads + writes * n_write
+
+    runs = []
+    targets = [("url", 0)] if args.url else [(args.server, int(w)) for w in args.workers.split(",")]
+    for kind, workers in targets:
+        proc = None
+        url = args.url
+        if kind != "url":
+            proc, url = start_server(kind, workers, args.threads, args.workdir)
+        try:
+            if args.warmup:
+                load(url, plan, args.warmup, args.concurrency, args.client_procs)
+            r = load(url, plan, args.duration, args.concurrency, args.client_procs)
+        finally:
+            if proc is not None:
+                stop_server(proc)
+        r.update({"server": kind, "workers": workers, "threads": args.threads})
+        runs.append(r)
+        print(f"{kind:9s} workers={workers:<3d} {r['rps']:8.1f} req/s   p50 {r['p50_ms']:7.1f} ms   "
+              f"p95 {r['p95_ms']:7.1f} ms   p99 {r['p99_ms']:7.1f} ms   errors {r['errors']}   status {r['status']}")
+
+    out = args.out or os.path.join("bench", "results", f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpu_count": os.cpu_count(),
+                     "concurrency": args.concurrency, "duration": args.duration,
+                     "write_ratio": args.write_ratio, "plan": sorted(set(p for _, p in plan))},
+            "runs": runs,
+        }, f, indent=2)
+    print(f"hasil: {out}")
+
+
+if __name__ == "__main__":
+    main()
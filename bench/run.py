@@ -0,0 +1,514 @@
+# bench/run.py
+"""
+Jalankan benchmark ARKAS di atas data sintetis, simpan hasil sebagai JSON.
+
+    python -m bench.run --rows 100000                     # generate (kalau perlu) + ukur
+    python -m bench.run --only spj,pdf --repeat 20         # sebagian kasus saja
+    python -m bench.run --compare lama.json baru.json      # bandingkan 2 hasil
+
+Angka utama = median detik per panggilan. Kasus "*_cold" membuang cache
+proses (opsi filter, hitungan baris) sebelum tiap panggilan; kasus lain
+mengukur keadaan normal server yang sudah "panas".
+"""
+from __future__ import annotations
+
+import argparse
+import calendar
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+
+from . import use_workdir
+
+
+# =========================================================
+# DAFTAR KASUS
+# =========================================================
+CASES: list[tuple[str, object]] = []
+
+
+def case(name: str):
+    """Daftarkan kasus: fungsi(ctx) -> callable tanpa argumen yang diukur."""
+    def deco(setup):
+        CASES.append((name, setup))
+        return setup
+    return deco
+
+
+_ALL = {"keyword": "", "search_in": "bukti", "kegiatan": "__ALL__", "rekap": "__ALL__",
+        "bulan": "__ALL__", "tgl_from": "", "tgl_to": ""}
+
+
+def _filters(**kw) -> dict:
+    return {**_ALL, **kw}
+
+
+def _rentang_bulan(ym: str) -> dict:
+    """Filter tgl_from / tgl_to satu bulan penuh (BKU / BHP memfilter per tanggal, bukan "bulan")."""
+    tahun, bulan = (int(x) for x in ym.split("-"))
+    akhir = calendar.monthrange(tahun, bulan)[1]
+    return {"tgl_from": f"{ym}-01", "tgl_to": f"{ym}-{akhir:02d}"}
+
+
+def _clear_process_cache():
+    from arkas import queries
+
+    queries._DATA_CACHE.clear()
+    queries._COUNT_CACHE.clear()
+
+
+@case("ambil_data_bku/page1")
+def _(ctx):
+    from arkas.queries import ambil_data_bku
+    return lambda: ambil_data_bku(_filters(), 1, 25)
+
+
+@case("ambil_data_bku/page1_cold")
+def _(ctx):
+    from arkas.queries import ambil_data_bku
+
+    def run():
+        _clear_process_cache()
+        ambil_data_bku(_filters(), 1, 25)
+    return run
+
+
+@case("ambil_data_bku/last_page")
+def _(ctx):
+    from arkas.queries import ambil_data_bku
+    last = max(1, -(-ctx["rows"]["bku"] // 25))
+    return lambda: ambil_data_bku(_filters(), last, 25)
+
+
+@case("ambil_data_bku/filter_tanggal_kegiatan")
+def _(ctx):
+    from arkas.queries import ambil_data_bku
+    f = _filters(kegiatan=ctx["kegiatan"], **_rentang_bulan(ctx["bulan"]))
+    return lambda: ambil_data_bku(f, 1, 25)
+
+
+@case("ambil_data_bku/cari_bukti")
+def _(ctx):
+    from arkas.queries import ambil_data_bku
+    f = _filters(keyword=ctx["bpu"])
+    return lambda: ambil_data_bku(f, 1, 25)
+
+
+@case("ambil_data_bku/cari_teks")
+def _(ctx):
+    from arkas.queries import ambil_data_bku
+    f = _filters(keyword="honor", search_in="teks")
+    return lambda: ambil_data_bku(f, 1, 25)
+
+
+@case("ambil_data_bhp/page1")
+def _(ctx):
+    from arkas.queries import ambil_data_bhp
+    return lambda: ambil_data_bhp(_filters(), 1, 25)
+
+
+@case("ambil_data_bhp/filter_tanggal")
+def _(ctx):
+    from arkas.queries import ambil_data_bhp
+    f = _filters(**_rentang_bulan(ctx["bulan"]))
+    return lambda: ambil_data_bhp(f, 1, 25)
+
+
+@case("ambil_spj_per_bpu/page1")
+def _(ctx):
+    from arkas.queries import ambil_spj_per_bpu
+    return lambda: ambil_spj_per_bpu(_filters(), 1, 25)
+
+
+@case("ambil_spj_per_bpu/filter_rekap_bulan")
+def _(ctx):
+    from arkas.queries import ambil_spj_per_bpu
+    f = _filters(rekap=ctx["rekap"], bulan=ctx["bulan"])
+    return lambda: ambil_spj_per_bpu(f, 1, 25)
+
+
+@case("get_bulan_options")
+def _(ctx):
+    from arkas.queries import get_bulan_options
+    return get_bulan_options
+
+
+@case("get_bulan_options_cold")
+def _(ctx):
+    from arkas.queries import get_bulan_options
+
+    def run():
+        _clear_process_cache()
+        get_bulan_options()
+    return run
+
+
+# koneksi per request: pinjam dari pool vs buka baru (connect + pragma),
+# masing-masing 10 query pendek seperti helper dalam satu request
+@case("db/request_10_queries_pooled")
+def _(ctx):
+    from arkas.db import get_conn
+
+    def run():
+        for _ in range(10):
+            conn = get_conn()
+            try:
+                conn.execute("SELECT nama_sekolah FROM app_settings WHERE id = 1").fetchone()
+            finally:
+                conn.close()
+    return run
+
+
+@case("db/request_10_queries_new_conn")
+def _(ctx):
+    from arkas.db import _connect
+
+    def run():
+        for _ in range(10):
+            conn = _connect()
+            try:
+                conn.execute("SELECT nama_sekolah FROM app_settings WHERE id = 1").fetchone()
+            finally:
+                conn.close()
+    return run
+
+
+@case("pdf/buat_pdf_bast")
+def _(ctx):
+    from arkas.pdf_docs import buat_pdf_bast
+    from arkas.queries import get_bpu_bhp_detail, get_bpu_bku_rows
+    from arkas.settings import get_settings
+
+    bpu = ctx["bpu_barang"]
+    bku, detail, st = get_bpu_bku_rows(bpu), get_bpu_bhp_detail(bpu), get_settings()
+    return lambda: buat_pdf_bast(bpu, bku, detail, settings=st)
+
+
+@case("pdf/buat_pdf_bast_foto")
+def _(ctx):
+    from arkas.pdf_docs import buat_pdf_bast
+    from arkas.queries import get_bpu_bhp_detail, get_bpu_bku_rows
+    from arkas.settings import get_settings
+
+    bpu = ctx["bpu_foto"]
+    bku, detail, st = get_bpu_bku_rows(bpu), get_bpu_bhp_detail(bpu), get_settings()
+    return lambda: buat_pdf_bast(bpu, bku, detail, settings=st)
+
+
+@case("pdf/buat_pdf_kwitansi")
+def _(ctx):
+    from arkas.pdf_docs import buat_pdf_kwitansi
+    from arkas.settings import get_settings
+
+    st = get_settings()
+    data = {"nomor": ctx["bpu"], "tgl": "02-03-2025", "telah_terima_dari": "Bendahara BOSP SD Negeri 1 Sintetis",
+            "untuk_pembayaran": "Pengembangan Perpustakaan", "jumlah": 1_234_500}
+    return lambda: buat_pdf_kwitansi(ctx["bpu"], data, settings=st)
+
+
+@case("convert/bku_pdf")
+def _(ctx):
+    from arkas.converters import convert_bku_pdfs
+    path = ctx["pdf"]["bku"]
+    return lambda: convert_bku_pdfs([path], workers=1)
+
+
+@case("convert/bhp_pdf")
+def _(ctx):
+    from arkas.converters import convert_bhp_pdfs
+    path = ctx["pdf"]["bhp"]
+    return lambda: convert_bhp_pdfs([path], workers=1)
+
+
+# helper pembersih kolom hasil convert di 100k baris (tanpa parse PDF)
+def _kolom_convert(n: int = 100_000, seed: int = 1):
+    import random
+
+    import pandas as pd
+
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        amount = f"{rng.randint(0, 50_000_000):,}".replace(",", ".")
+        id_barang = str(rng.randint(10, 99_999)) if rng.random() < 0.3 else f"1.1.12.{i % 97:02d}.{i % 89:02d}"
+        rek = f"5.1.02.{i % 7:02d}.\n01.{i % 1000:04d}"
+        rows.append([rek, f"{amount},{i % 100:02d}", amount, id_barang])
+    return pd.DataFrame(rows, columns=["Rek", "Out", "Realisasi", "ID Barang"])
+
+
+@case("convert/clean_rek_100k")
+def _(ctx):
+    from arkas.converters import clean_rek_series
+    df = _kolom_convert()
+    return lambda: clean_rek_series(df["Rek"])
+
+
+@case("convert/to_num_id_100k")
+def _(ctx):
+    from arkas.converters import to_num_id_series
+    df = _kolom_convert()
+    return lambda: to_num_id_series(df["Out"])
+
+
+@case("convert/to_num_plain_100k")
+def _(ctx):
+    from arkas.converters import to_num_plain_series
+    df = _kolom_convert()
+    return lambda: to_num_plain_series(df["Realisasi"])
+
+
+@case("convert/gabung_id_barang_100k")
+def _(ctx):
+    from arkas.converters import gabung_id_barang
+    df = _kolom_convert()
+    return lambda: gabung_id_barang(df)
+
+
+# PDF banyak halaman: serial vs pool proses (termasuk start worker forkserver /
+# spawn per panggilan, sama seperti satu job convert)
+@case("convert/bku_pdf_multipage_serial")
+def _(ctx):
+    from arkas.converters import convert_bku_pdfs
+    path = ctx["pdf_multi"]["bku"]
+    return lambda: convert_bku_pdfs([path], workers=1)
+
+
+@case("convert/bku_pdf_multipage_workers")
+def _(ctx):
+    from arkas.config import CONVERT_WORKERS
+    from arkas.converters import convert_bku_pdfs
+    path = ctx["pdf_multi"]["bku"]
+    return lambda: convert_bku_pdfs([path], workers=max(2, CONVERT_WORKERS))
+
+
+@case("import/output_xlsx_replace")
+def _(ctx):
+    from arkas.ledger import import_ledger_xlsx
+
+    # database terpisah: kasus lain tetap membaca data asli generator
+    scratch = os.path.join(ctx["paths"]["workdir"], "import_scratch.db")
+    shutil.copyfile(ctx["paths"]["db"], scratch)
+    xlsx = ctx["paths"]["xlsx"]
+
+    def run():
+        conn = sqlite3.connect(scratch)
+        try:
+            import_ledger_xlsx(conn, "bku", xlsx, "BKU", "replace")
+            import_ledger_xlsx(conn, "bhp_bhm", xlsx, "BHP_BHM", "replace")
+        finally:
+            conn.close()
+    return run
+
+
+# =========================================================
+# PENGUKURAN
+# =========================================================
+def measure(fn, repeat: int, max_seconds: float) -> dict:
+    fn()  # pemanasan (import modul, statement cache, page cache OS)
+    times = []
+    t_end = time.perf_counter() + max_seconds
+    while len(times) < repeat and (len(times) < 3 or time.perf_counter() < t_end):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "rounds": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "max": max(times),
+    }
+
+
+def _context(paths: dict, info: dict) -> dict:
+    from arkas.db import get_conn
+
+    conn = get_conn()
+    try:
+        one = lambda sql: conn.execute(sql).fetchone()[0]  # noqa: E731
+        return {
+            "paths": paths,
+            "rows": info["rows"],
+            "year": max(info["years"]),
+            "bulan": one("SELECT ym FROM bku WHERE ym > '' GROUP BY ym ORDER BY COUNT(1) DESC LIMIT 1"),
+            "kegiatan": one("SELECT nama_kegiatan FROM bpu_summary GROUP BY 1 ORDER BY COUNT(1) DESC LIMIT 1"),
+            "rekap": one("SELECT rekap_rekening FROM bpu_summary GROUP BY 1 ORDER BY COUNT(1) DESC LIMIT 1"),
+            "bpu": one("SELECT bpu FROM bpu_summary ORDER BY bpu_seq LIMIT 1 OFFSET (SELECT COUNT(1) / 2 FROM bpu_summary)"),
+            "bpu_barang": one(
+                "SELECT [No Bukti] FROM bhp_bhm GROUP BY 1 HAVING COUNT(1) >= 3 ORDER BY MIN(rowid) LIMIT 1"
+            ),
+            "bpu_foto": one("SELECT bpu FROM bpu_photos ORDER BY id LIMIT 1"),
+        }
+    finally:
+        conn.close()
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def prepare(args) -> tuple[dict, dict]:
+    """Pakai data di workdir kalau parameternya sama, selain itu generate ulang."""
+    from .datagen import generate_db, write_output_xlsx, write_report_pdfs
+
+    paths = use_workdir(args.workdir)
+    years = [int(y) for y in args.years.split(",") if y.strip()]
+    want = {"bku_rows": args.rows, "years": years, "seed": args.seed}
+
+    info = None
+    meta = os.path.join(paths["workdir"], "datagen.json")
+    if os.path.exists(meta) and os.path.exists(paths["db"]):
+        with open(meta, encoding="utf-8") as f:
+            info = json.load(f)
+        if any(info.get(k) != v for k, v in want.items()):
+            info = None
+    if info is None:
+        print(f"generate data: {args.rows} baris BKU, tahun {years} ...", flush=True)
+        info = generate_db(args.workdir, args.rows, years, args.seed)
+
+    import_rows = min(args.rows, args.import_rows)
+    if not os.path.exists(paths["xlsx"]) or info.get("xlsx_rows") != import_rows:
+        write_output_xlsx(paths["xlsx"], import_rows, years, args.seed)
+        info["xlsx_rows"] = import_rows
+    pdf = {"bku": os.path.join(paths["pdf_dir"], "bku-sintetis.pdf"),
+           "bhp": os.path.join(paths["pdf_dir"], "bhp-sintetis.pdf")}
+    if not all(os.path.exists(p) for p in pdf.values()) or info.get("pdf_pages") != args.pdf_pages:
+        pdf = write_report_pdfs(paths["pdf_dir"], args.pdf_pages, seed=args.seed)
+        info["pdf_pages"] = args.pdf_pages
+    multi_dir = os.path.join(paths["pdf_dir"], "multi")
+    pdf_multi = {"bku": os.path.join(multi_dir, "bku-sintetis.pdf"),
+                 "bhp": os.path.join(multi_dir, "bhp-sintetis.pdf")}
+    if not all(os.path.exists(p) for p in pdf_multi.values()) or info.get("pdf_multi_pages") != args.pdf_multi_pages:
+        os.makedirs(multi_dir, exist_ok=True)
+        pdf_multi = write_report_pdfs(multi_dir, args.pdf_multi_pages, seed=args.seed)
+        info["pdf_multi_pages"] = args.pdf_multi_pages
+    with open(meta, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+
+    ctx = _context(paths, info)
+    ctx["pdf"] = pdf
+    ctx["pdf_multi"] = pdf_multi
+    return ctx, info
+
+
+def run(args) -> dict:
+    from flask import Flask
+
+    from arkas.db import init_app as init_db_pool
+
+    ctx, info = prepare(args)
+    only = [s.strip() for s in (args.only or "").split(",") if s.strip()]
+
+    # seperti request web: 1 koneksi pool per pemanggilan
+    app = Flask(__name__)
+    init_db_pool(app)
+
+    results = {}
+    for name, setup in CASES:
+        if only and not any(s in name for s in only):
+            continue
+        with app.app_context():
+            fn = setup(ctx)
+
+        def in_request(fn=fn):
+            with app.app_context():
+                return fn()
+
+        r = measure(in_request, args.repeat, args.max_seconds)
+        results[name] = r
+        print(f"{name:45s} median {r['median'] * 1000:10.2f} ms   min {r['min'] * 1000:10.2f} ms   n={r['rounds']}",
+              flush=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "data": {k: info.get(k) for k in ("bku_rows", "years", "seed", "rows", "xlsx_rows", "pdf_pages", "pdf_multi_pages")},
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+# =========================================================
+# BANDINGKAN 2 HASIL
+# =========================================================
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """Cetak rasio median baru/lama. Return jumlah kasus yang lebih lambat dari threshold."""
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"lama: {base['meta'].get('commit')} ({base['meta']['data'].get('bku_rows')} baris)   "
+          f"baru: {new['meta'].get('commit')} ({new['meta']['data'].get('bku_rows')} baris)")
+    if base["meta"]["data"] != new["meta"]["data"]:
+        print("PERINGATAN: data benchmark berbeda, angka tidak sebanding langsung")
+
+    slower = 0
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        a, b = base["results"].get(name), new["results"].get(name)
+        if a is None or b is None:
+            print(f"{name:45s} {'-' if a is None else 'ada':>10s} -> {'-' if b is None else 'ada':>10s}")
+            continue
+        ratio = b["median"] / a["median"] if a["median"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  LEBIH LAMBAT"
+            slower += 1
+        elif ratio < 1 / threshold:
+            flag = "  lebih cepat"
+        print(f"{name:45s} {a['median'] * 1000:10.2f} -> {b['median'] * 1000:10.2f} ms  x{ratio:5.2f}{flag}")
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark ARKAS (data sintetis)")
+    ap.add_argument("--workdir", default=os.path.join("bench", "work"))
+    ap.add_argument("--rows", type=int, default=10_000, help="jumlah baris BKU (1k .. 1M)")
+    ap.add_argument("--years", default="2023,2024,2025")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--import-rows", type=int, default=20_000, help="baris BKU di workbook kasus import")
+    ap.add_argument("--pdf-pages", type=int, default=10, help="halaman PDF kasus convert")
+    ap.add_argument("--pdf-multi-pages", type=int, default=64, help="halaman PDF kasus convert multipage (serial vs worker)")
+    ap.add_argument("--repeat", type=int, default=30, help="maks. putaran per kasus")
+    ap.add_argument("--max-seconds", type=float, default=10.0, help="batas waktu per kasus (min. 3 putaran)")
+    ap.add_argument("--only", help="hanya kasus yang namanya mengandung salah satu teks ini (pisah koma)")
+    ap.add_argument("--out", help="file JSON hasil (default bench/results/<waktu>_<commit>.json)")
+    ap.add_argument("--compare", nargs=2, metavar=("LAMA", "BARU"), help="bandingkan 2 file hasil, tanpa mengukur")
+    ap.add_argument("--threshold", type=float, default=1.2, help="rasio median yang dianggap regresi")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    result = run(args)
+    out = args.out or os.path.join(
+        "bench", "results", f"{time.strftime('%Y%m%d-%H%M%S')}_{result['meta']['commit'] or 'nogit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print("hasil:", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# gunicorn.conf.py
+"""
+Konfigurasi gunicorn:  gunicorn -c gunicorn.conf.py wsgi:app
+
+Semua worker berbagi arkas.db (SQLite WAL, busy timeout + retry di
+arkas/db.py), status job di tabel jobs, dan cache data divalidasi lewat
+data_version, jadi request boleh jatuh ke worker mana saja. Job convert /
+import berjalan di thread worker yang menerimanya. /metrics (kalau aktif)
+per worker.
+"""
+import multiprocessing
+import os
+
+
+def _env(name, default):
+    return os.environ.get(f"ARKAS_{name}") or default
+
+
+bind = _env("BIND", "127.0.0.1:8000")
+workers = int(_env("WORKERS", min(multiprocessing.cpu_count(), 4)))
+# gthread: satu proses melayani beberapa request (halaman lambat / download
+# tidak memblokir polling status job)
+worker_class = "gthread"
+threads = int(_env("THREADS", 4))
+
+# convert / import jalan di background job, tapi upload besar + render PDF
+# BAST/BKP masih di dalam request
+timeout = int(_env("TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# muat app (migrasi schema, import modul) sekali di master lalu fork;
+# tidak ada koneksi SQLite yang terbuka saat fork (init_db menutupnya)
+preload_app = _env("PRELOAD", "1") not in ("0", "false", "no")
+
+# restart worker berkala (batasi memori pandas / reportlab) default mati:
+# job background ikut terputus kalau worker-nya di-restart
+max_requests = int(_env("MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = _env("ACCESS_LOG", None)
+errorlog = "-"
+loglevel = _env("LOG_LEVEL", "info")
@@ -0,0 +1,156 @@
+# tests/test_converters.py
+"""
+Helper convert PDF versi kolom (clean_rek_series, to_num_*_series,
+gabung_id_barang) harus sama persis dengan versi lama per sel / per baris
+(df.loc), di atas tabel acak berisi sel-sel seperti hasil pdfplumber.
+"""
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from arkas.converters import (
+    clean_rek,
+    clean_rek_series,
+    gabung_id_barang,
+    to_num_id,
+    to_num_id_series,
+    to_num_plain,
+    to_num_plain_series,
+)
+
+
+# =========================================================
+# IMPLEMENTASI LAMA (referensi)
+# =========================================================
+def _gabung_id_barang_lama(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty or "ID Barang" not in df.columns:
+        return df
+
+    rows = []
+    skip_next = False
+    for i in range(len(df)):
+        if skip_next:
+            skip_next = False
+            continue
+
+        id_barang = str(df.loc[i, "ID Barang"]).strip()
+
+        if i + 1 < len(df):
+            next_id = str(df.loc[i + 1, "ID Barang"]).strip()
+            if next_id.replace(" ", "").isdigit():
+                id_barang = (id_barang + next_id).strip()
+                skip_next = True
+
+        row = df.loc[i].copy()
+        row["ID Barang"] = id_barang
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+# =========================================================
+# DATA ACAK
+# =========================================================
+SEEDS = [1, 2, 3, 4, 5]
+
+_ANGKA_TETAP = [
+    "", " ", None, np.nan, "nan", "-", "0", "1.234,56", "-1.234,56", "1.234.567,89",
+    "-12", "12,5", "1.234", "1,234", "12 34", "\n1.000\n", "abc", "1.2.3,4,5", "+7", "1e3",
+]
+_REK_TETAP = ["", " ", None, np.nan, "5.1.02.\n01.01.0024", " 5.2.05 .01 ", "5.1.02.01.01.0052\n"]
+
+
+def _angka(rng: random.Random):
+    if rng.random() < 0.3:
+        return rng.choice(_ANGKA_TETAP)
+    n = rng.randint(-10_000_000, 10_000_000)
+    ribuan = f"{abs(n):,}".replace(",", ".")
+    teks = ("-" if n < 0 else "") + ribuan
+    if rng.random() < 0.5:
+        teks += f",{rng.randint(0, 99):02d}"
+    return teks
+
+
+def _rek(rng: random.Random):
+    if rng.random() < 0.3:
+        return rng.choice(_REK_TETAP)
+    kode = ".".join(str(rng.randint(1, 99)) for _ in range(rng.randint(3, 6)))
+    i = rng.randint(0, len(kode))
+    return kode[:i] + rng.choice(["", "\n", " ", " \n"]) + kode[i:]
+
+
+def _id_barang(rng: random.Random):
+    r = rng.random()
+    if r < 0.35:
+        return str(rng.randint(0, 99_999))  # potongan ID (hanya digit)
+    if r < 0.45:
+        return rng.choice(["", " ", None, np.nan, "12 34", " 0042 ", "\n"])
+    return f"1.1.12.{rng.randint(1, 99):02d}.{rng.randint(1, 99):02d}"
+
+
+def _kolom(rng: random.Random, gen, n: int) -> pd.Series:
+    return pd.DataFrame([[gen(rng)] for _ in range(n)])[0]
+
+
+# =========================================================
+# TEST
+# =========================================================
+@pytest.mark.parametrize("seed", SEEDS)
+def test_clean_rek_series_sama_dengan_per_sel(seed):
+    rng = random.Random(seed)
+    s = _kolom(rng, _rek, rng.randint(1, 3000))
+    pd.testing.assert_series_equal(clean_rek_series(s), s.apply(clean_rek), check_dtype=False)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("baru, lama", [(to_num_id_series, to_num_id), (to_num_plain_series, to_num_plain)])
+def test_to_num_series_sama_dengan_per_sel(seed, baru, lama):
+    rng = random.Random(seed)
+    s = _kolom(rng, _angka, rng.randint(1, 3000))
+    pd.testing.assert_series_equal(baru(s), s.apply(lama).astype("float64"), check_dtype=False)
+
+
+def test_to_num_contoh():
+    s = pd.Series(["1.234,56", "-1.234,56", "", None, "abc", "0"])
+    assert to_num_id_series(s).tolist()[:2] == [1234.56, -1234.56]
+    assert to_num_id_series(s).isna().tolist() == [False, False, True, True, True, False]
+    assert to_num_plain_series(pd.Series(["1.234", "-1.234.567", "1,234"])).tolist() == [1234, -1234567, 1234]
+
+
+def _tabel_bhp(rng: random.Random, ids: list) -> pd.DataFrame:
+    rows = [[f"0{rng.randint(1, 9)}-03-2025", id_b, f"uraian {i}", _angka(rng)] for i, id_b in enumerate(ids)]
+    return pd.DataFrame(rows, columns=["Tanggal", "ID Barang", "Uraian", "Realisasi"])
+
+
+def _sama_dengan_lama(df: pd.DataFrame):
+    baru = gabung_id_barang(df)
+    lama = _gabung_id_barang_lama(df)
+    pd.testing.assert_frame_equal(baru.astype(object), lama.astype(object))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_gabung_id_barang_acak(seed):
+    rng = random.Random(seed)
+    ids = [_id_barang(rng) for _ in range(rng.randint(1, 2000))]
+    _sama_dengan_lama(_tabel_bhp(rng, ids))
+
+
+@pytest.mark.parametrize("panjang", [1, 2, 3, 4, 5, 6, 7])
+@pytest.mark.parametrize("di_awal", [False, True])
+def test_gabung_id_barang_deret_digit(panjang, di_awal):
+    # deretan baris digit berurutan (ganjil / genap), di awal tabel atau sesudah ID biasa
+    rng = random.Random(panjang)
+    digit = [str(rng.randint(10, 999)) for _ in range(panjang)]
+    ids = digit + ["1.1.12.01.01"] if di_awal else ["1.1.12.01.01"] + digit + ["1.1.12.01.02", "77"]
+    _sama_dengan_lama(_tabel_bhp(rng, ids))
+
+
+def test_gabung_id_barang_tanpa_kolom_atau_kosong():
+    df = pd.DataFrame({"Uraian": ["a", "b"]})
+    assert gabung_id_barang(df) is df
+    kosong = pd.DataFrame(columns=["ID Barang"])
+    assert gabung_id_barang(kosong) is kosong
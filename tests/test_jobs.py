@@ -0,0 +1,120 @@
+# tests/test_jobs.py
+"""
+Penandaan job terputus (stale) dan status akhir _run harus bersyarat:
+job yang sudah selesai tidak ditimpa error, job yang sudah ditandai error
+tidak hidup lagi jadi done, dan job error selagi antre tidak dijalankan.
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from arkas import db, jobs
+
+LAMA = "2000-01-01 00:00:00"
+
+
+@pytest.fixture
+def db_jobs(tmp_path, monkeypatch):
+    path = str(tmp_path / "arkas.db")
+    monkeypatch.setattr(db, "DB_PATH", path)
+    conn = sqlite3.connect(path)
+    jobs.ensure_jobs_schema(conn.cursor())
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _job(job_id: str, status: str, updated_at: str = LAMA):
+    conn = db.get_conn()
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, created_at, updated_at) VALUES (?, 'import', ?, ?, ?)",
+            (job_id, status, updated_at, updated_at),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _row(job_id: str) -> tuple:
+    conn = db.get_conn()
+    try:
+        return conn.execute("SELECT status, message, result_json FROM jobs WHERE id=?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+
+
+def _jadikan_lama(job_id: str):
+    conn = db.get_conn()
+    try:
+        conn.execute("UPDATE jobs SET updated_at=? WHERE id=?", (LAMA, job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# =========================================================
+# TEST
+# =========================================================
+def test_stale_menandai_job_lama(db_jobs):
+    _job("a", "running")
+    assert jobs._fail_stale_job("a")
+    assert _row("a")[:2] == ("error", jobs.STALE_JOB_MESSAGE)
+
+
+@pytest.mark.parametrize("status", ["done", "error"])
+def test_stale_tidak_menimpa_job_selesai(db_jobs, status):
+    # job selesai di antara SELECT get_job dan UPDATE penandaan stale
+    _job("a", status)
+    assert not jobs._fail_stale_job("a")
+    assert _row("a")[0] == status
+
+
+def test_stale_tidak_menimpa_job_yang_baru_heartbeat(db_jobs):
+    _job("a", "running", updated_at=jobs._now())
+    assert not jobs._fail_stale_job("a")
+    assert _row("a")[0] == "running"
+
+
+def test_run_tidak_menghidupkan_job_yang_sudah_error(db_jobs):
+    _job("a", "queued", updated_at=jobs._now())
+
+    def fn(ctx):
+        # proses lain menandai job ini stale selagi masih jalan
+        _jadikan_lama(ctx.job_id)
+        assert jobs._fail_stale_job(ctx.job_id)
+        return {"rows": 3}
+
+    jobs._run("a", fn, (), {})
+    status, message, result_json = _row("a")
+    assert status == "error"
+    assert message == jobs.LATE_FINISH_MESSAGE
+    assert result_json == '{"rows": 3}'
+
+
+def test_run_error_tidak_menimpa_status_lain(db_jobs):
+    _job("a", "queued", updated_at=jobs._now())
+
+    def fn(ctx):
+        _jadikan_lama(ctx.job_id)
+        jobs._fail_stale_job(ctx.job_id)
+        raise RuntimeError("gagal")
+
+    jobs._run("a", fn, (), {})
+    assert _row("a")[:2] == ("error", jobs.STALE_JOB_MESSAGE)
+
+
+def test_run_lewati_job_error_selagi_antre(db_jobs):
+    _job("a", "error")
+    dipanggil = []
+    jobs._run("a", lambda ctx: dipanggil.append(1), (), {})
+    assert dipanggil == []
+    assert _row("a")[0] == "error"
+
+
+def test_run_normal(db_jobs):
+    _job("a", "queued", updated_at=jobs._now())
+    jobs._run("a", lambda ctx: {"rows": 1, "file": "/tmp/x.xlsx"}, (), {})
+    assert _row("a") == ("done", None, '{"rows": 1}')
@@ -0,0 +1,113 @@
+# tests/test_pdf_cache.py
+"""
+Key cache per halaman (page_sha256) harus ikut membedakan /Resources:
+dua PDF dengan content stream identik ("q /Fm1 Do Q") tetapi Form XObject /
+font berbeda tidak boleh saling memakai hasil ekstrak tabel dari cache.
+"""
+from __future__ import annotations
+
+import pdfplumber
+import pytest
+from pdfminer.pdftypes import resolve1
+
+from arkas import converters, pdf_cache
+from arkas.pdf_cache import page_sha256
+
+PAGE_CONTENT = b"q /Fm1 Do Q"
+
+
+# =========================================================
+# PDF MINIMAL (ditulis manual, xref dihitung)
+# =========================================================
+def _stream(attrs: str, data: bytes) -> bytes:
+    return f"<< {attrs} /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream"
+
+
+def _form_tabel(sel: list[list[str]]) -> bytes:
+    """Form XObject: grid garis + teks per sel (cukup untuk deteksi tabel pdfplumber)."""
+    ops = ["0.5 w"]
+    for r, baris in enumerate(sel):
+        for c, teks in enumerate(baris):
+            x, y = 50 + c * 100, 700 - r * 20
+            ops.append(f"{x} {y} 100 20 re S")
+            ops.append(f"BT /F1 10 Tf {x + 5} {y + 6} Td ({teks}) Tj ET")
+    return "\n".join(ops).encode()
+
+
+def _tulis_pdf(path, sel: list[list[str]], font: str = "Helvetica"):
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        b"/Resources << /XObject << /Fm1 5 0 R >> >> >>",
+        _stream("", PAGE_CONTENT),
+        _stream(
+            "/Type /XObject /Subtype /Form /BBox [0 0 595 842] /Resources << /Font << /F1 6 0 R >> >>",
+            _form_tabel(sel),
+        ),
+        f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} >>".encode(),
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for n, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+    return str(path)
+
+
+def _key(path: str) -> str:
+    with pdfplumber.open(path) as pdf:
+        return page_sha256(pdf.pages[0])
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_cache, "PDF_CACHE_DB", str(tmp_path / "pdf_cache.db"))
+
+
+TABEL_A = [["A1", "A2"], ["A3", "A4"]]
+TABEL_B = [["B1", "B2"], ["B3", "B4"]]
+
+
+# =========================================================
+# TEST
+# =========================================================
+def test_key_beda_jika_xobject_beda(tmp_path):
+    a = _tulis_pdf(tmp_path / "a.pdf", TABEL_A)
+    b = _tulis_pdf(tmp_path / "b.pdf", TABEL_B)
+    with pdfplumber.open(a) as pa, pdfplumber.open(b) as pb:
+        # content stream halaman memang identik
+        assert resolve1(pa.pages[0].page_obj.contents[0]).get_data() == PAGE_CONTENT
+        assert resolve1(pb.pages[0].page_obj.contents[0]).get_data() == PAGE_CONTENT
+    assert _key(a) != _key(b)
+
+
+def test_key_beda_jika_font_beda(tmp_path):
+    a = _tulis_pdf(tmp_path / "a.pdf", TABEL_A, font="Helvetica")
+    b = _tulis_pdf(tmp_path / "b.pdf", TABEL_A, font="Courier")
+    assert _key(a) != _key(b)
+
+
+def test_key_sama_untuk_halaman_identik(tmp_path):
+    a = _tulis_pdf(tmp_path / "a.pdf", TABEL_A)
+    b = _tulis_pdf(tmp_path / "b.pdf", TABEL_A)
+    assert _key(a) == _key(b)
+
+
+def test_extract_tidak_memakai_tabel_pdf_lain(tmp_path, cache_db):
+    a = _tulis_pdf(tmp_path / "a.pdf", TABEL_A)
+    b = _tulis_pdf(tmp_path / "b.pdf", TABEL_B)
+
+    hasil_a = converters.extract_pdf_tables([a], workers=1, use_cache=True)
+    hasil_b = converters.extract_pdf_tables([b], workers=1, use_cache=True)
+    assert [t for _, t in hasil_a] == [TABEL_A]
+    assert [t for _, t in hasil_b] == [TABEL_B]
+
+    # panggilan kedua dari cache (per file) tetap benar
+    assert converters.extract_pdf_tables([b, a], workers=1, use_cache=True) == hasil_b + hasil_a
@@ -0,0 +1,39 @@
+# wsgi.py
+"""
+Entry point production.
+
+Linux (gunicorn, beberapa proses worker):
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Windows (waitress, satu proses banyak thread):
+    python wsgi.py
+
+Konfigurasi lewat environment ARKAS_* (lihat arkas/config.py dan
+gunicorn.conf.py), misalnya ARKAS_SECRET_KEY, ARKAS_DB_PATH, ARKAS_BIND,
+ARKAS_WORKERS, ARKAS_THREADS.
+"""
+from __future__ import annotations
+
+import os
+
+import arkas.pdf_docs  # noqa: F401
+from app2 import app
+
+# arkas.pdf_docs (reportlab + PIL) sengaja diimport di sini, bukan lazy seperti
+# di spj_export: dengan gunicorn preload_app modul ini dimuat sekali di master
+# sebelum fork, jadi semua worker berbagi modulnya (copy-on-write) dan tidak
+# ada request PDF pertama per worker yang menanggung import-nya. Script dan
+# `python app2.py` tetap memuatnya saat PDF pertama dibuat.
+
+if __name__ == "__main__":
+    from waitress import serve
+
+    host, _, port = os.environ.get("ARKAS_BIND", "127.0.0.1:8000").rpartition(":")
+    serve(
+        app,
+        host=host or "127.0.0.1",
+        port=int(port),
+        threads=int(os.environ.get("ARKAS_THREADS", "8")),
+        # upload PDF/XLSX besar: waitress menampung body sampai batas ini
+        max_request_body_size=app.config["MAX_CONTENT_LENGTH"],
+    )